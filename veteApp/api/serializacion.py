@@ -0,0 +1,136 @@
+# api/serializacion.py
+#
+# JSON de las respuestas del servicio.
+#
+# Las filas versionadas (ver database/versiones.py) se codifican una vez
+# por versión y se guardan ya codificadas en un caché LRU limitado en
+# bytes. Cada escritura cambia la versión de la fila, así que lo
+# cacheado no hay que invalidarlo: una versión nueva reemplaza a la
+# anterior. Las listas se arman pegando los fragmentos guardados.
+#
+# Solo hay que cachear filas confirmadas: la versión que se asigna en
+# una transacción que después se revierte vuelve a usarse.
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import cache
+from typing import Any
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.hybrid import HybridExtensionType
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional, solo acelera el JSON
+    orjson = None
+
+from database.models import Versionado
+
+MAXIMO_BYTES = 32 * 1024 * 1024
+
+# Columnas derivadas que no se exponen.
+_OCULTOS = {"dni_normalizado", "telefono_normalizado", "email_normalizado", "nombre_fonetico"}
+
+
+# ---------------------------------------------------------
+# CACHÉ DE FILAS CODIFICADAS
+# ---------------------------------------------------------
+class CacheSerializacion:
+    """
+    JSON de filas por (tabla, id), junto con la versión codificada.
+    Seguro entre hilos; descarta las menos usadas al pasar `maximo_bytes`.
+    """
+
+    def __init__(self, maximo_bytes: int = MAXIMO_BYTES):
+        self.maximo_bytes = maximo_bytes
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._filas: OrderedDict[tuple[str, int], tuple[int, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._filas)
+
+    def obtener(self, clave: tuple[str, int], version: int) -> bytes | None:
+        with self._lock:
+            guardada = self._filas.get(clave)
+            if guardada is None or guardada[0] != version:
+                self.fallos += 1
+                return None
+            self._filas.move_to_end(clave)
+            self.aciertos += 1
+            return guardada[1]
+
+    def guardar(self, clave: tuple[str, int], version: int, cuerpo: bytes) -> None:
+        if len(cuerpo) > self.maximo_bytes:
+            return
+        with self._lock:
+            anterior = self._filas.pop(clave, None)
+            if anterior is not None:
+                if anterior[0] > version:  # un lector atrasado no pisa una versión nueva
+                    self._filas[clave] = anterior
+                    return
+                self.bytes -= len(anterior[1])
+            self._filas[clave] = (version, cuerpo)
+            self.bytes += len(cuerpo)
+            while self.bytes > self.maximo_bytes:
+                _, (_, descartado) = self._filas.popitem(last=False)
+                self.bytes -= len(descartado)
+
+
+# ---------------------------------------------------------
+# SERIALIZACIÓN
+# ---------------------------------------------------------
+@cache
+def _campos(clase: type) -> tuple[str, ...]:
+    """Columnas y propiedades híbridas (especie, raza...) de un modelo."""
+
+    mapper = inspect(clase)
+    columnas = [c.key for c in mapper.column_attrs]
+    hibridas = [
+        nombre for nombre, descriptor in mapper.all_orm_descriptors.items()
+        if descriptor.extension_type is HybridExtensionType.HYBRID_PROPERTY
+    ]
+    return tuple(c for c in (*columnas, *hibridas) if c not in _OCULTOS)
+
+
+def _a_json(valor: Any) -> Any:
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    if isinstance(valor, list):
+        return [_a_json(v) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _a_json(v) for k, v in valor.items()}
+    if isinstance(valor, tuple) and hasattr(valor, "_asdict"):
+        return {k: _a_json(v) for k, v in valor._asdict().items()}
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return {campo: _a_json(getattr(valor, campo)) for campo in _campos(type(valor))}
+
+
+def _codificar(datos: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def serializar(valor: Any, cache: CacheSerializacion | None = None) -> bytes:
+    """JSON de `valor`. Con `cache`, reusa las filas versionadas ya codificadas."""
+
+    if cache is None:
+        return _codificar(_a_json(valor))
+    if isinstance(valor, list):
+        return b"[" + b",".join([serializar(v, cache) for v in valor]) + b"]"
+    if not isinstance(valor, Versionado):
+        return _codificar(_a_json(valor))
+
+    clave = (valor.__tablename__, valor.id)
+    version = valor.version
+    cuerpo = cache.obtener(clave, version)
+    if cuerpo is None:
+        cuerpo = _codificar(_a_json(valor))
+        cache.guardar(clave, version, cuerpo)
+    return cuerpo
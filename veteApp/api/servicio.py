@@ -0,0 +1,685 @@
+# api/servicio.py
+#
+# Servicio HTTP local (ASGI) sobre database/crud: los clientes de
+# escritorio le hablan a este proceso en lugar de abrir vete.db, así el
+# bloqueo del archivo deja de serializar a toda la clínica.
+#
+# - Una sola conexión escribe. Las escrituras se encolan y las ejecuta en
+#   orden un hilo escritor, cada una en su propia transacción.
+# - Las lecturas usan un pool de conexiones de solo lectura desde un pool
+#   de hilos. La base pasa a modo WAL, así leer no espera al escritor.
+# - Cada tabla tiene un contador de generación que el escritor incrementa
+#   al confirmar. El ETag de una lectura sale de las generaciones de las
+#   tablas de las que depende, así que un If-None-Match vigente se
+#   responde 304 sin tocar la base.
+# - Las filas leídas se codifican una vez por versión (api/serializacion.py).
+#
+# Los contadores viven en memoria: cambios hechos a vete.db por fuera del
+# servicio (migraciones, purga) no invalidan los ETag hasta reiniciarlo.
+#
+# Uso (desde veteApp/):
+#     python -m api.servidor [--puerto 8750]   # servidor incluido (stdlib)
+#     uvicorn api.servicio:app                  # o cualquier servidor ASGI
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, NamedTuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.serializacion import MAXIMO_BYTES, CacheSerializacion, serializar
+from database.agenda import indice_turnos
+from database.auditoria import activar_auditoria, auditoria_desactivada
+from database.crud.archivo_clinico import (
+    desactivar_archivo_clinico,
+    listar_archivos_por_consulta,
+    obtener_archivo_por_id
+)
+from database.crud.consulta import (
+    actualizar_consulta,
+    desactivar_consulta,
+    listar_consultas_por_paciente,
+    obtener_consulta_por_id
+)
+from database.crud.dosis import dosis_pendientes
+from database.crud.dueno import (
+    actualizar_dni_dueno,
+    actualizar_dueno,
+    crear_dueno,
+    desactivar_dueno,
+    listar_duenos_opciones,
+    obtener_dueno_por_id
+)
+from database.crud.paciente import (
+    actualizar_paciente,
+    cambiar_dueno_paciente,
+    crear_paciente,
+    desactivar_paciente,
+    listar_especies,
+    listar_pacientes,
+    listar_pacientes_por_dueno_opciones,
+    listar_pacientes_por_especie,
+    obtener_paciente_por_id
+)
+from database.crud.timeline import EventoTimeline, timeline_paciente
+from database.crud.tratamiento import (
+    actualizar_tratamiento,
+    desactivar_tratamiento,
+    listar_tratamientos_por_consulta,
+    obtener_tratamiento_por_id
+)
+from database.crud.turno import (
+    crear_turno,
+    desactivar_turno,
+    listar_turnos_por_veterinario,
+    obtener_turno_por_id,
+    reprogramar_turno
+)
+from database.crud.veterinario import (
+    actualizar_matricula_veterinario,
+    actualizar_veterinario,
+    crear_veterinario,
+    desactivar_veterinario,
+    listar_veterinarios_opciones,
+    obtener_veterinario_por_id
+)
+from database.init_db import DB_NAME, activar_claves_foraneas
+from database.lectura_archivos import abrir_archivo, parsear_rango
+from database.servicios import (
+    crear_archivo_clinico_validado,
+    crear_consulta_validada,
+    crear_tratamiento_validado
+)
+from database.tipos import activar_compresion, recargar_diccionarios
+from database.versiones import LIMITE, VERSIONADOS, cambios_desde, version_actual
+from exceptions.domain import (
+    ArchivoClinicoInexistente,
+    ArchivoClinicoNoEncontrado,
+    ConsultaNoEncontrada,
+    DomainError,
+    DuenoNoEncontrado,
+    PacienteNoEncontrado,
+    TratamientoNoEncontrado,
+    TurnoNoEncontrado,
+    VeterinarioNoEncontrado
+)
+
+logger = logging.getLogger(__name__)
+
+LECTORES = 4
+
+_ESTADOS = {
+    DuenoNoEncontrado: 404,
+    PacienteNoEncontrado: 404,
+    VeterinarioNoEncontrado: 404,
+    ConsultaNoEncontrada: 404,
+    TratamientoNoEncontrado: 404,
+    ArchivoClinicoNoEncontrado: 404,
+    TurnoNoEncontrado: 404,
+    ArchivoClinicoInexistente: 410,
+}
+
+# Campos de fecha que llegan como texto ISO en el cuerpo o la query.
+_FECHAS = {
+    "fecha_nacimiento": date.fromisoformat,
+    "fecha_inicio": date.fromisoformat,
+    "fecha_fin": date.fromisoformat,
+    "inicio": datetime.fromisoformat,
+    "desde": datetime.fromisoformat,
+    "hasta": datetime.fromisoformat,
+    "antes_fecha": datetime.fromisoformat,
+}
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class Respuesta(NamedTuple):
+    estado: int
+    cuerpo: bytes | Iterator[memoryview] = b""
+    encabezados: tuple[tuple[bytes, bytes], ...] = ()
+
+
+# ---------------------------------------------------------
+# GENERACIONES Y ETAG
+# ---------------------------------------------------------
+class Generaciones:
+    """Contador de cambios por tabla. Lo incrementa el escritor al confirmar."""
+
+    def __init__(self):
+        self._epoca = secrets.token_hex(4)  # otro proceso: otros ETag
+        self._valores: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, tablas) -> None:
+        with self._lock:
+            for tabla in tablas:
+                self._valores[tabla] = self._valores.get(tabla, 0) + 1
+
+    def etag(self, tablas: tuple[str, ...]) -> str:
+        valores = "-".join(str(self._valores.get(tabla, 0)) for tabla in tablas)
+        return f'W/"{self._epoca}-{valores}"'
+
+
+def _coincide(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = {parte.strip() for parte in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
+
+
+# ---------------------------------------------------------
+# ESCRITOR
+# ---------------------------------------------------------
+_TABLAS_TOCADAS = "api_tablas_tocadas"  # clave en Session.info
+
+
+class Escritor:
+    """
+    Hilo dueño de la única conexión de escritura. Ejecuta las escrituras
+    en el orden en que llegan; al confirmar cada una incrementa la
+    generación de las tablas que tocó.
+    """
+
+    def __init__(self, sesiones: sessionmaker, generaciones: Generaciones):
+        self._sesiones = sesiones
+        self._generaciones = generaciones
+        self._cola: queue.SimpleQueue = queue.SimpleQueue()
+        self._hilo = threading.Thread(target=self._ejecutar, name="escritor-api", daemon=True)
+
+        @event.listens_for(sesiones, "after_flush")
+        def _registrar_flush(db: Session, _contexto) -> None:
+            tablas = db.info.setdefault(_TABLAS_TOCADAS, set())
+            for objeto in (*db.new, *db.dirty, *db.deleted):
+                tablas.add(objeto.__table__.name)
+
+        @event.listens_for(sesiones, "do_orm_execute")
+        def _registrar_sentencia(estado) -> None:
+            # INSERT/UPDATE/DELETE de Core, por ejemplo al agregar a un catálogo.
+            if estado.is_insert or estado.is_update or estado.is_delete:
+                tablas = estado.session.info.setdefault(_TABLAS_TOCADAS, set())
+                tablas.add(estado.statement.table.name)
+
+    def iniciar(self) -> None:
+        self._hilo.start()
+
+    def cerrar(self) -> None:
+        self._cola.put(None)
+        self._hilo.join()
+
+    def enviar(self, funcion: Callable[[Session], Any]) -> Future:
+        """Encola funcion(db); el futuro devuelve su resultado serializado."""
+
+        futuro = Future()
+        self._cola.put((funcion, futuro))
+        return futuro
+
+    def _ejecutar(self) -> None:
+        while (tarea := self._cola.get()) is not None:
+            funcion, futuro = tarea
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                with self._sesiones() as db:
+                    resultado = funcion(db)
+                    db.flush()  # ids asignados antes de serializar
+                    cuerpo = serializar(resultado) if resultado is not None else b""
+                    db.commit()
+                    self._generaciones.incrementar(db.info.pop(_TABLAS_TOCADAS, ()))
+            except BaseException as error:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(cuerpo)
+
+
+# ---------------------------------------------------------
+# RUTAS
+# ---------------------------------------------------------
+class Ruta(NamedTuple):
+    metodo: str
+    patron: re.Pattern
+    funcion: Callable[[Session, dict, dict], Any]
+    tablas: tuple[str, ...]  # de las que depende una lectura (ETag)
+
+
+def _ruta(metodo: str, plantilla: str, funcion, *tablas: str) -> Ruta:
+    patron = re.sub(r"\{(\w+)\}", r"(?P<\1>\\d+)", plantilla)
+    return Ruta(metodo, re.compile(f"^{patron}$"), funcion, tablas)
+
+
+def _obtener(obtener, excepcion: type[DomainError], descripcion: str):
+    """Envuelve obtener_x_por_id para que lance la excepción de dominio si no existe."""
+
+    def obtener_o_fallar(db: Session, entidad_id: int):
+        entidad = obtener(db, entidad_id)
+        if entidad is None:
+            raise excepcion(f"No existe {descripcion} activo con ID {entidad_id}")
+        return entidad
+    return obtener_o_fallar
+
+
+_dueno = _obtener(obtener_dueno_por_id, DuenoNoEncontrado, "un dueño")
+_paciente = _obtener(obtener_paciente_por_id, PacienteNoEncontrado, "un paciente")
+_veterinario = _obtener(obtener_veterinario_por_id, VeterinarioNoEncontrado, "un veterinario")
+_consulta = _obtener(obtener_consulta_por_id, ConsultaNoEncontrada, "una consulta")
+_tratamiento = _obtener(obtener_tratamiento_por_id, TratamientoNoEncontrado, "un tratamiento")
+_archivo = _obtener(obtener_archivo_por_id, ArchivoClinicoNoEncontrado, "un archivo clínico")
+_turno = _obtener(obtener_turno_por_id, TurnoNoEncontrado, "un turno")
+
+
+def _actualizar_dueno(db, p, c):
+    dueno = _dueno(db, p["dueno_id"])
+    if "dni" in c:
+        actualizar_dni_dueno(db, dueno, nuevo_dni=c.pop("dni"))
+    return actualizar_dueno(db, dueno, **c)
+
+
+def _actualizar_veterinario(db, p, c):
+    veterinario = _veterinario(db, p["veterinario_id"])
+    if "matricula" in c:
+        actualizar_matricula_veterinario(db, veterinario, nueva_matricula=c.pop("matricula"))
+    return actualizar_veterinario(db, veterinario, **c)
+
+
+def _actualizar_paciente(db, p, c):
+    paciente = _paciente(db, p["paciente_id"])
+    if "dueno_id" in c:
+        cambiar_dueno_paciente(db, paciente, nuevo_dueno_id=c.pop("dueno_id"))
+    return actualizar_paciente(db, paciente, **c)
+
+
+def _listar_pacientes(db, p, c):
+    if "especie" in p:
+        return listar_pacientes_por_especie(db, p["especie"])
+    return listar_pacientes(db)
+
+
+def _timeline(db, p, c):
+    antes_de = None
+    if "antes_fecha" in p:
+        antes_de = EventoTimeline(p["antes_fecha"], p["antes_tipo"], int(p["antes_id"]), 0, "")
+    return timeline_paciente(db, p["paciente_id"], antes_de, int(p.get("limit", 50)))
+
+
+RUTAS = [
+    # Dueños
+    _ruta("GET", "/duenos", lambda db, p, c: listar_duenos_opciones(db), "duenos"),
+    _ruta("GET", "/duenos/{dueno_id}", lambda db, p, c: _dueno(db, p["dueno_id"]), "duenos"),
+    _ruta(
+        "GET", "/duenos/{dueno_id}/pacientes",
+        lambda db, p, c: listar_pacientes_por_dueno_opciones(db, p["dueno_id"]), "pacientes"
+    ),
+    _ruta("POST", "/duenos", lambda db, p, c: crear_dueno(db, **c)),
+    _ruta("PATCH", "/duenos/{dueno_id}", _actualizar_dueno),
+    _ruta("DELETE", "/duenos/{dueno_id}", lambda db, p, c: desactivar_dueno(db, _dueno(db, p["dueno_id"]))),
+
+    # Veterinarios y turnos
+    _ruta("GET", "/veterinarios", lambda db, p, c: listar_veterinarios_opciones(db), "veterinarios"),
+    _ruta(
+        "GET", "/veterinarios/{veterinario_id}",
+        lambda db, p, c: _veterinario(db, p["veterinario_id"]), "veterinarios"
+    ),
+    _ruta(
+        "GET", "/veterinarios/{veterinario_id}/turnos",
+        lambda db, p, c: listar_turnos_por_veterinario(
+            db, p["veterinario_id"], desde=p["desde"], hasta=p["hasta"]
+        ),
+        "turnos"
+    ),
+    _ruta("POST", "/veterinarios", lambda db, p, c: crear_veterinario(db, **c)),
+    _ruta("PATCH", "/veterinarios/{veterinario_id}", _actualizar_veterinario),
+    _ruta(
+        "DELETE", "/veterinarios/{veterinario_id}",
+        lambda db, p, c: desactivar_veterinario(db, _veterinario(db, p["veterinario_id"]))
+    ),
+    _ruta("GET", "/turnos/{turno_id}", lambda db, p, c: _turno(db, p["turno_id"]), "turnos"),
+    _ruta("POST", "/turnos", lambda db, p, c: crear_turno(db, **c)),
+    _ruta(
+        "PATCH", "/turnos/{turno_id}",
+        lambda db, p, c: reprogramar_turno(db, _turno(db, p["turno_id"]), **c)
+    ),
+    _ruta("DELETE", "/turnos/{turno_id}", lambda db, p, c: desactivar_turno(db, _turno(db, p["turno_id"]))),
+
+    # Pacientes
+    _ruta("GET", "/pacientes", _listar_pacientes, "pacientes"),
+    _ruta("GET", "/pacientes/{paciente_id}", lambda db, p, c: _paciente(db, p["paciente_id"]), "pacientes"),
+    _ruta(
+        "GET", "/pacientes/{paciente_id}/consultas",
+        lambda db, p, c: listar_consultas_por_paciente(db, p["paciente_id"]), "consultas"
+    ),
+    _ruta(
+        "GET", "/pacientes/{paciente_id}/timeline", _timeline,
+        "consultas", "tratamientos", "archivos_clinicos"
+    ),
+    _ruta("GET", "/especies", lambda db, p, c: listar_especies(db), "pacientes", "especies"),
+    _ruta("POST", "/pacientes", lambda db, p, c: crear_paciente(db, **c)),
+    _ruta("PATCH", "/pacientes/{paciente_id}", _actualizar_paciente),
+    _ruta(
+        "DELETE", "/pacientes/{paciente_id}",
+        lambda db, p, c: desactivar_paciente(db, _paciente(db, p["paciente_id"]))
+    ),
+
+    # Consultas
+    _ruta("GET", "/consultas/{consulta_id}", lambda db, p, c: _consulta(db, p["consulta_id"]), "consultas"),
+    _ruta(
+        "GET", "/consultas/{consulta_id}/tratamientos",
+        lambda db, p, c: listar_tratamientos_por_consulta(db, p["consulta_id"]), "tratamientos"
+    ),
+    _ruta(
+        "GET", "/consultas/{consulta_id}/archivos",
+        lambda db, p, c: listar_archivos_por_consulta(db, p["consulta_id"]), "archivos_clinicos"
+    ),
+    _ruta("POST", "/consultas", lambda db, p, c: crear_consulta_validada(db, **c)),
+    _ruta(
+        "PATCH", "/consultas/{consulta_id}",
+        lambda db, p, c: actualizar_consulta(db, _consulta(db, p["consulta_id"]), **c)
+    ),
+    _ruta(
+        "DELETE", "/consultas/{consulta_id}",
+        lambda db, p, c: desactivar_consulta(db, _consulta(db, p["consulta_id"]))
+    ),
+
+    # Tratamientos y dosis
+    _ruta(
+        "GET", "/tratamientos/{tratamiento_id}",
+        lambda db, p, c: _tratamiento(db, p["tratamiento_id"]), "tratamientos"
+    ),
+    _ruta("POST", "/tratamientos", lambda db, p, c: crear_tratamiento_validado(db, **c)),
+    _ruta(
+        "PATCH", "/tratamientos/{tratamiento_id}",
+        lambda db, p, c: actualizar_tratamiento(db, _tratamiento(db, p["tratamiento_id"]), **c)
+    ),
+    _ruta(
+        "DELETE", "/tratamientos/{tratamiento_id}",
+        lambda db, p, c: desactivar_tratamiento(db, _tratamiento(db, p["tratamiento_id"]))
+    ),
+    _ruta(
+        "GET", "/dosis",
+        lambda db, p, c: dosis_pendientes(db, p["desde"], p["hasta"]),
+        "dosis_programadas", "tratamientos"
+    ),
+
+    # Archivos clínicos (el contenido se sirve aparte, por rangos)
+    _ruta("GET", "/archivos/{archivo_id}", lambda db, p, c: _archivo(db, p["archivo_id"]), "archivos_clinicos"),
+    _ruta("POST", "/archivos", lambda db, p, c: crear_archivo_clinico_validado(db, **c)),
+    _ruta(
+        "DELETE", "/archivos/{archivo_id}",
+        lambda db, p, c: desactivar_archivo_clinico(db, _archivo(db, p["archivo_id"]))
+    ),
+
+    # Sincronización: /version antes de la carga completa, después
+    # /cambios/<tabla>?version=N (ver database/versiones.py)
+    _ruta(
+        "GET", "/version",
+        lambda db, p, c: version_actual(db), *(m.__tablename__ for m in VERSIONADOS)
+    ),
+    *(
+        _ruta(
+            "GET", f"/cambios/{modelo.__tablename__}",
+            lambda db, p, c, modelo=modelo: cambios_desde(
+                db, modelo, int(p.get("version", 0)), limite=int(p.get("limite", LIMITE))
+            ),
+            modelo.__tablename__
+        )
+        for modelo in VERSIONADOS
+    ),
+]
+
+_CONTENIDO_ARCHIVO = re.compile(r"^/archivos/(?P<archivo_id>\d+)/contenido$")
+
+
+def _convertir(datos: dict) -> dict:
+    for campo, convertir in _FECHAS.items():
+        if isinstance(datos.get(campo), str):
+            datos[campo] = convertir(datos[campo])
+    return datos
+
+
+# ---------------------------------------------------------
+# SERVICIO
+# ---------------------------------------------------------
+class Servicio:
+    """Aplicación ASGI. `ruta_db` es el archivo SQLite que pasa a administrar."""
+
+    def __init__(
+        self,
+        ruta_db: str = DB_NAME,
+        *,
+        lectores: int = LECTORES,
+        cache_bytes: int = MAXIMO_BYTES,
+        auditoria: bool | None = None
+    ):
+        self.generaciones = Generaciones()
+        # Solo lo llenan las lecturas, que ven filas confirmadas (ver api/serializacion.py).
+        self.cache = CacheSerializacion(cache_bytes)
+
+        # Una conexión escribe; la de desborde solo la usa TextoComprimido
+        # para releer diccionarios de compresión entrenados con el servicio andando.
+        self.engine_escritura = create_engine(
+            f"sqlite:///{ruta_db}", pool_size=1, max_overflow=1, future=True
+        )
+        activar_claves_foraneas(self.engine_escritura)
+        activar_compresion(self.engine_escritura)
+
+        self.engine_lectura = create_engine(
+            f"sqlite:///{ruta_db}", pool_size=lectores, max_overflow=1, future=True
+        )
+        activar_claves_foraneas(self.engine_lectura)
+        activar_compresion(self.engine_lectura)
+
+        @event.listens_for(self.engine_lectura, "connect")
+        def _solo_lectura(conexion_dbapi, _registro):
+            conexion_dbapi.execute("PRAGMA query_only = ON")
+
+        sesiones_escritura = sessionmaker(
+            bind=self.engine_escritura, autoflush=False, expire_on_commit=False
+        )
+        if auditoria is None:
+            auditoria = not auditoria_desactivada()
+        # La auditoría escribe con su propio engine: no compite con el
+        # escritor ni con TextoComprimido por las dos conexiones de escritura.
+        self.engine_auditoria = None
+        self.auditoria = None
+        if auditoria:
+            self.engine_auditoria = create_engine(
+                f"sqlite:///{ruta_db}", pool_size=1, max_overflow=0, future=True
+            )
+            activar_claves_foraneas(self.engine_auditoria)
+            self.auditoria = activar_auditoria(sesiones_escritura, self.engine_auditoria)
+        # Índice de turnos para la búsqueda de huecos (las altas validan contra la base).
+        indice_turnos.vincular(sesiones_escritura)
+        self.escritor = Escritor(sesiones_escritura, self.generaciones)
+        self._sesiones_lectura = sessionmaker(bind=self.engine_lectura, autoflush=False)
+        self._lectores = ThreadPoolExecutor(lectores, thread_name_prefix="lector-api")
+        self._iniciado = False
+        self._lock = threading.Lock()
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._iniciado:
+                return
+            with self.engine_escritura.connect() as conexion:
+                conexion.exec_driver_sql("PRAGMA journal_mode = WAL")
+            recargar_diccionarios(self.engine_escritura)
+            recargar_diccionarios(self.engine_lectura)
+            with self._sesiones_lectura() as db:
+                indice_turnos.reconstruir(db)
+            self.escritor.iniciar()
+            self._iniciado = True
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if not self._iniciado:
+                return
+            self.escritor.cerrar()
+            self._lectores.shutdown()
+            if self.auditoria is not None:
+                self.auditoria.detener()
+                self.engine_auditoria.dispose()
+            self.engine_escritura.dispose()
+            self.engine_lectura.dispose()
+            self._iniciado = False
+
+    # -- ASGI -------------------------------------------------
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        cuerpo = b""
+        while True:
+            mensaje = await receive()
+            cuerpo += mensaje.get("body", b"")
+            if not mensaje.get("more_body"):
+                break
+
+        encabezados = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        try:
+            self.iniciar()
+            respuesta = await self._atender(
+                scope["method"], scope["path"], scope.get("query_string", b"").decode(),
+                encabezados, cuerpo
+            )
+        except ErrorHTTP as error:
+            respuesta = self._error(error.estado, str(error))
+        except DomainError as error:
+            respuesta = self._error(_ESTADOS.get(type(error), 409), str(error))
+        except IntegrityError as error:
+            respuesta = self._error(409, str(error.orig))
+        except (TypeError, ValueError, KeyError) as error:
+            respuesta = self._error(400, f"Solicitud inválida: {error}")
+        except Exception:
+            # Sin esto el servidor cortaría la conexión sin responder.
+            logger.exception("Error atendiendo %s %s", scope["method"], scope["path"])
+            respuesta = self._error(500, "Error interno del servicio")
+
+        await self._enviar(send, respuesta)
+
+    async def _ciclo_de_vida(self, receive, send) -> None:
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                await asyncio.to_thread(self.iniciar)
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                await asyncio.to_thread(self.cerrar)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    def _error(estado: int, mensaje: str) -> Respuesta:
+        return Respuesta(estado, serializar({"error": mensaje}), ((b"content-type", b"application/json"),))
+
+    @staticmethod
+    async def _enviar(send, respuesta: Respuesta) -> None:
+        encabezados = list(respuesta.encabezados)
+        if isinstance(respuesta.cuerpo, bytes):
+            encabezados.append((b"content-length", str(len(respuesta.cuerpo)).encode()))
+        await send({"type": "http.response.start", "status": respuesta.estado, "headers": encabezados})
+
+        if isinstance(respuesta.cuerpo, bytes):
+            await send({"type": "http.response.body", "body": respuesta.cuerpo})
+            return
+        for bloque in respuesta.cuerpo:
+            await send({"type": "http.response.body", "body": bytes(bloque), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    # -- Solicitudes ------------------------------------------
+
+    async def _atender(
+        self,
+        metodo: str,
+        ruta: str,
+        query: str,
+        encabezados: dict[str, str],
+        cuerpo: bytes
+    ) -> Respuesta:
+        parametros = _convertir(dict(parse_qsl(query)))
+
+        if metodo == "GET" and (coincidencia := _CONTENIDO_ARCHIVO.match(ruta)):
+            return await self._contenido(int(coincidencia["archivo_id"]), encabezados.get("range"))
+
+        existe = False
+        for candidata in RUTAS:
+            coincidencia = candidata.patron.match(ruta)
+            if coincidencia is None:
+                continue
+            existe = True
+            if candidata.metodo == metodo:
+                parametros.update({k: int(v) for k, v in coincidencia.groupdict().items()})
+                break
+        else:
+            if existe:
+                raise ErrorHTTP(405, f"{ruta} no admite {metodo}")
+            raise ErrorHTTP(404, f"No existe la ruta {ruta}")
+
+        loop = asyncio.get_running_loop()
+        if metodo == "GET":
+            # La generación se toma antes de leer: si una escritura entra
+            # en el medio, el ETag queda viejo y el cliente relee; nunca al revés.
+            etag = self.generaciones.etag(candidata.tablas)
+            cabecera_etag = ((b"etag", etag.encode()),)
+            if _coincide(encabezados.get("if-none-match"), etag):
+                return Respuesta(304, b"", cabecera_etag)
+            datos = await loop.run_in_executor(
+                self._lectores, self._leer, candidata.funcion, parametros
+            )
+            return Respuesta(200, datos, ((b"content-type", b"application/json"), *cabecera_etag))
+
+        datos = json.loads(cuerpo) if cuerpo else {}
+        if not isinstance(datos, dict):
+            raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON")
+        datos = _convertir(datos)
+        resultado = await asyncio.wrap_future(
+            self.escritor.enviar(lambda db: candidata.funcion(db, parametros, datos))
+        )
+        if not resultado:
+            return Respuesta(204)
+        estado = 201 if metodo == "POST" else 200
+        return Respuesta(estado, resultado, ((b"content-type", b"application/json"),))
+
+    def _leer(self, funcion, parametros: dict) -> bytes:
+        with self._sesiones_lectura() as db:
+            return serializar(funcion(db, parametros, {}), self.cache)
+
+    async def _contenido(self, archivo_id: int, rango: str | None) -> Respuesta:
+        """Contenido de un archivo clínico, completo o por rango (Range: bytes=...)."""
+
+        def abrir():
+            with self._sesiones_lectura() as db:
+                return abrir_archivo(db, archivo_id)
+
+        archivo = await asyncio.get_running_loop().run_in_executor(self._lectores, abrir)
+        encabezados = [(b"accept-ranges", b"bytes"), (b"content-type", b"application/octet-stream")]
+        estado = 200
+        inicio, fin = 0, archivo.tamano
+        if rango:
+            try:
+                inicio, fin = parsear_rango(rango, archivo.tamano)
+            except ValueError:
+                return Respuesta(416, b"", ((b"content-range", f"bytes */{archivo.tamano}".encode()),))
+            estado = 206
+            encabezados.append((b"content-range", f"bytes {inicio}-{fin - 1}/{archivo.tamano}".encode()))
+        encabezados.append((b"content-length", str(fin - inicio).encode()))
+        return Respuesta(estado, archivo.bloques(inicio, fin), tuple(encabezados))
+
+
+app = Servicio(os.environ.get("VETE_DB", DB_NAME))
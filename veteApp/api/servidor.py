@@ -0,0 +1,138 @@
+# api/servidor.py
+#
+# Servidor HTTP/1.1 mínimo (solo biblioteca estándar) para correr
+# api.servicio sin instalar un servidor ASGI. Atiende conexiones
+# persistentes (keep-alive) y cuerpos con Content-Length; pensado para
+# la red local de la clínica, no para exponerse a internet.
+#
+# Uso (desde veteApp/):
+#     python -m api.servidor [--host 127.0.0.1] [--puerto 8750] [--db vete.db] [--lectores 4]
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from http import HTTPStatus
+from urllib.parse import unquote
+
+MAXIMO_ENCABEZADOS = 64 * 1024
+MAXIMO_CUERPO = 16 * 1024 * 1024
+
+
+async def _atender_conexion(app, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+    cliente = escritor.get_extra_info("peername")
+    servidor = escritor.get_extra_info("sockname")
+    try:
+        while True:
+            try:
+                cabecera = await lector.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+
+            linea, *lineas = cabecera.decode("latin-1").split("\r\n")
+            metodo, objetivo, version = linea.split(" ", 2)
+            encabezados = []
+            for linea in lineas:
+                if linea:
+                    nombre, _, valor = linea.partition(":")
+                    encabezados.append((nombre.strip().lower().encode("latin-1"), valor.strip().encode("latin-1")))
+            valores = dict(encabezados)
+
+            largo = int(valores.get(b"content-length", b"0"))
+            if largo > MAXIMO_CUERPO:
+                escritor.write(b"HTTP/1.1 413 Payload Too Large\r\ncontent-length: 0\r\nconnection: close\r\n\r\n")
+                await escritor.drain()
+                return
+            cuerpo = await lector.readexactly(largo) if largo else b""
+
+            ruta, _, consulta = objetivo.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version.removeprefix("HTTP/"),
+                "method": metodo,
+                "scheme": "http",
+                "path": unquote(ruta),
+                "raw_path": ruta.encode("latin-1"),
+                "query_string": consulta.encode("latin-1"),
+                "headers": encabezados,
+                "client": cliente,
+                "server": servidor,
+            }
+            mantener = version == "HTTP/1.1" and valores.get(b"connection", b"").lower() != b"close"
+
+            entregado = False
+
+            async def receive():
+                nonlocal entregado
+                if not entregado:
+                    entregado = True
+                    return {"type": "http.request", "body": cuerpo, "more_body": False}
+                return {"type": "http.disconnect"}
+
+            async def send(mensaje):
+                if mensaje["type"] == "http.response.start":
+                    estado = mensaje["status"]
+                    partes = [f"HTTP/1.1 {estado} {HTTPStatus(estado).phrase}\r\n".encode()]
+                    for nombre, valor in mensaje.get("headers", ()):
+                        partes.append(nombre + b": " + valor + b"\r\n")
+                    if not mantener:
+                        partes.append(b"connection: close\r\n")
+                    partes.append(b"\r\n")
+                    escritor.write(b"".join(partes))
+                elif mensaje["type"] == "http.response.body":
+                    escritor.write(mensaje.get("body", b""))
+                    await escritor.drain()
+
+            await app(scope, receive, send)
+            if not mantener:
+                return
+    finally:
+        escritor.close()
+
+
+async def servir(
+    app,
+    host: str,
+    puerto: int,
+    *,
+    al_escuchar: Callable[[int], None] | None = None
+) -> None:
+    """
+    Atiende hasta que se cancela la tarea. `al_escuchar` recibe el puerto
+    real apenas el socket está abierto (útil con puerto 0).
+    """
+
+    servidor = await asyncio.start_server(
+        lambda lector, escritor: _atender_conexion(app, lector, escritor),
+        host, puerto, limit=MAXIMO_ENCABEZADOS
+    )
+    if al_escuchar is not None:
+        al_escuchar(servidor.sockets[0].getsockname()[1])
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main() -> None:
+    from api.servicio import Servicio
+    from database.init_db import DB_NAME
+
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de veteApp.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8750)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--lectores", type=int, default=4)
+    args = parser.parse_args()
+
+    servicio = Servicio(args.db, lectores=args.lectores)
+    servicio.iniciar()
+    print(f"Sirviendo {args.db} en http://{args.host}:{args.puerto}")
+    try:
+        asyncio.run(servir(servicio, args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_agenda.py
+#
+# Turnos con un año de agenda para 30 veterinarios: reconstrucción del
+# índice en memoria, crear_turno (que valida la superposición contra la
+# base) a principio y a fin de año, y búsqueda de los próximos huecos
+# libres.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_agenda
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from database.agenda import DURACION_TURNO, JORNADA, IndiceTurnos
+from database.crud.turno import crear_turno
+from database.models import Base, Dueno, Especie, Paciente, Turno, Veterinario
+from exceptions.domain import TurnoSuperpuesto
+
+VETERINARIOS = 30
+DIAS = 365
+OCUPACION = 0.8  # fracción de la jornada reservada
+CONSULTAS = 2_000  # altas medidas en cada extremo del año
+
+
+def _poblar(Session, inicio_anio: datetime) -> int:
+    random.seed(0)
+    turnos_por_dia = int(
+        (datetime.combine(inicio_anio.date(), JORNADA[1])
+         - datetime.combine(inicio_anio.date(), JORNADA[0])) / DURACION_TURNO
+    )
+    filas = []
+    for veterinario_id in range(1, VETERINARIOS + 1):
+        for dia in range(DIAS):
+            apertura = datetime.combine(
+                (inicio_anio + timedelta(days=dia)).date(), JORNADA[0]
+            )
+            for n in range(turnos_por_dia):
+                if random.random() < OCUPACION:
+                    inicio = apertura + n * DURACION_TURNO
+                    filas.append({
+                        "veterinario_id": veterinario_id,
+                        "paciente_id": 1,
+                        "inicio": inicio,
+                        "fin": inicio + DURACION_TURNO,
+                        "activo": True,
+                    })
+
+    with Session() as db:
+        db.add(Dueno(dni="1", nombre="Dueño"))
+        db.add(Especie(id=1, nombre="Canino", clave="canino"))
+        db.add_all(Veterinario(nombre=f"Vet {i}") for i in range(VETERINARIOS))
+        db.flush()
+        db.add(Paciente(nombre="Paciente", especie_id=1, dueno_id=1))
+        db.flush()
+        db.execute(insert(Turno), filas)
+        db.commit()
+    return len(filas)
+
+
+def main() -> None:
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    inicio_anio = datetime(2025, 1, 1)
+    total = _poblar(Session, inicio_anio)
+    indice = IndiceTurnos()
+
+    with Session() as db:
+        t0 = time.perf_counter()
+        indice.reconstruir(db)
+        reconstruccion = time.perf_counter() - t0
+
+    def _crear_turno(dias: range) -> tuple[float, int]:
+        """Tiempo medio de crear_turno (sin confirmar) y cuántos chocaron."""
+
+        random.seed(1)
+        ocupados = 0
+        t0 = time.perf_counter()
+        for _ in range(CONSULTAS):
+            inicio = datetime.combine(
+                (inicio_anio + timedelta(days=random.choice(dias))).date(), JORNADA[0]
+            ) + timedelta(minutes=random.randrange(0, 9 * 60, 5))
+            with Session() as db:
+                try:
+                    crear_turno(
+                        db, veterinario_id=random.randint(1, VETERINARIOS),
+                        paciente_id=1, inicio=inicio
+                    )
+                    db.flush()
+                except TurnoSuperpuesto:
+                    ocupados += 1
+                db.rollback()
+        return (time.perf_counter() - t0) / CONSULTAS, ocupados
+
+    enero, ocupados_enero = _crear_turno(range(0, 14))
+    diciembre, ocupados_diciembre = _crear_turno(range(DIAS - 14, DIAS))
+
+    semana = datetime(2025, 6, 2, 8, 0)
+    t0 = time.perf_counter()
+    huecos = indice.proximos_libres(
+        semana,
+        semana + timedelta(days=7),
+        veterinario_ids=range(1, VETERINARIOS + 1),
+        cantidad=10
+    )
+    proximos = time.perf_counter() - t0
+
+    print(f"turnos cargados:          {total}")
+    print(f"reconstrucción:           {reconstruccion * 1000:.1f} ms")
+    print(f"crear_turno enero:        {enero * 1e6:.0f} µs ({ocupados_enero} superpuestos)")
+    print(f"crear_turno diciembre:    {diciembre * 1e6:.0f} µs ({ocupados_diciembre} superpuestos)")
+    print(f"10 huecos libres semana:  {proximos * 1000:.2f} ms")
+    for hueco in huecos[:3]:
+        print(f"  vet {hueco.veterinario_id}: {hueco.inicio:%a %d/%m %H:%M}")
+
+
+if __name__ == "__main__":
+    main()
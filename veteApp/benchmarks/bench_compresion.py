@@ -0,0 +1,117 @@
+# benchmarks/bench_compresion.py
+#
+# Tamaño de los textos clínicos y costo de lectura/escritura con
+# TextoComprimido: texto plano contra zstd sin diccionario y con un
+# diccionario entrenado sobre la misma base.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_compresion [consultas]
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from database.compresion import entrenar_diccionario, estadisticas_compresion, recomprimir
+from database.models import Base, Consulta, Dueno, Especie, Paciente, Veterinario
+from database.tipos import activar_compresion, recargar_diccionarios
+
+FRASES = (
+    "Paciente presenta vómitos y diarrea desde hace {n} horas",
+    "Se indica dieta blanda y control en {n} días",
+    "Otitis externa bilateral con secreción ceruminosa",
+    "Dermatitis alérgica por pulgas, prurito intenso en zona lumbar",
+    "Auscultación cardíaca y pulmonar normal, mucosas rosadas, TLLC menor a 2 segundos",
+    "Temperatura rectal {n}.{n} °C, hidratación adecuada",
+    "Se aplica vacuna séxtuple, próxima dosis en {n} semanas",
+    "Propietario refiere decaimiento e hiporexia de {n} días de evolución",
+    "Radiografía de tórax sin hallazgos significativos",
+    "Se solicita hemograma completo y perfil bioquímico",
+)
+
+
+def _texto(azar: random.Random) -> str:
+    frases = azar.sample(FRASES, azar.randint(2, 5))
+    return ". ".join(f.format(n=azar.randint(1, 9)) for f in frases) + "."
+
+
+def _medir(Session, cantidad: int, semilla: int) -> tuple[float, float]:
+    """Segundos para insertar `cantidad` consultas y para leerlas todas."""
+
+    azar = random.Random(semilla)
+    with Session() as db:
+        inicio = time.perf_counter()
+        for _ in range(cantidad):
+            db.add(Consulta(
+                motivo="Control", paciente_id=1, veterinario_id=1,
+                diagnostico=_texto(azar), observaciones=_texto(azar)
+            ))
+        db.commit()
+        escritura = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        db.execute(select(Consulta.diagnostico, Consulta.observaciones)).all()
+        lectura = time.perf_counter() - inicio
+    return escritura, lectura
+
+
+def _bytes(Session) -> int:
+    with Session() as db:
+        return sum(bytes_ for _, _, _, bytes_ in estadisticas_compresion(db))
+
+
+def main(cantidad: int = 20_000) -> None:
+    resultados = []
+    for modo in ("plano", "zstd", "zstd + diccionario"):
+        ruta = tempfile.mktemp(prefix="bench_compresion_", suffix=".db")
+        try:
+            engine = create_engine(f"sqlite:///{ruta}", future=True)
+            Base.metadata.create_all(engine)
+            Session = sessionmaker(bind=engine, autoflush=False)
+            with Session() as db:
+                db.add_all([
+                    Dueno(id=1, dni="1", nombre="Dueño"),
+                    Especie(id=1, nombre="Canino", clave="canino"),
+                    Veterinario(id=1, nombre="Vet"),
+                    Paciente(id=1, nombre="Paciente", especie_id=1, dueno_id=1),
+                ])
+                db.commit()
+
+            if modo != "plano":
+                activar_compresion(engine)
+            if modo == "zstd + diccionario":
+                # Entrenado con una base previa, como en producción.
+                _medir(Session, min(cantidad, 5_000), semilla=1)
+                with Session() as db:
+                    entrenar_diccionario(db)
+                    db.commit()
+                recargar_diccionarios(engine)
+                with Session() as db:
+                    recomprimir(db, pausa=0)
+                base = _bytes(Session)
+            else:
+                base = 0
+
+            escritura, lectura = _medir(Session, cantidad, semilla=2)
+            resultados.append((modo, _bytes(Session) - base, escritura, lectura))
+            engine.dispose()
+        finally:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    plano = resultados[0][1]
+    print(f"{cantidad} consultas (diagnóstico + observaciones)")
+    print(f"{'modo':<20}{'bytes':>12}{'reducción':>11}{'escritura s':>13}{'lectura s':>11}")
+    for modo, bytes_, escritura, lectura in resultados:
+        print(
+            f"{modo:<20}{bytes_:>12}{1 - bytes_ / plano:>10.0%}"
+            f"{escritura:>13.2f}{lectura:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
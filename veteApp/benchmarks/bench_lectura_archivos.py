@@ -0,0 +1,108 @@
+# benchmarks/bench_lectura_archivos.py
+#
+# Tiempo hasta el primer byte y memoria residente al leer archivos
+# clínicos de distintos tamaños: lectura completa (como el visor
+# actual) contra abrir_archivo() por rangos. Los dos caminos leen todos
+# los bytes (CRC32 del archivo) y se verifica que den lo mismo.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_lectura_archivos [MB máximo]
+
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.lectura_archivos import abrir_archivo, cache_mapeos
+from database.models import ArchivoClinico, Base, Consulta, Dueno, Especie, Paciente, Veterinario
+
+
+def _rss_mb() -> float:
+    """Memoria residente actual (Linux) o pico (otros sistemas)."""
+
+    try:
+        with open("/proc/self/statm") as estado:
+            return int(estado.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except FileNotFoundError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def main(maximo_mb: int = 512) -> None:
+    carpeta = Path(tempfile.mkdtemp(prefix="bench_archivos_"))
+    try:
+        engine = create_engine("sqlite://", future=True)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        db = Session()
+        db.add_all([
+            Dueno(id=1, dni="1", nombre="Dueño"),
+            Especie(id=1, nombre="Canino", clave="canino"),
+            Veterinario(id=1, nombre="Vet"),
+            Paciente(id=1, nombre="Paciente", especie_id=1, dueno_id=1),
+            Consulta(id=1, motivo="Control", paciente_id=1, veterinario_id=1),
+        ])
+
+        tamanos = [mb for mb in (8, 64, 256, 1024) if mb <= maximo_mb]
+        for i, mb in enumerate(tamanos, start=1):
+            ruta = carpeta / f"estudio_{mb}.bin"
+            with open(ruta, "wb") as archivo:
+                bloque = os.urandom(2**20)
+                for _ in range(mb):
+                    archivo.write(bloque)
+            db.add(ArchivoClinico(
+                id=i, nombre_original=ruta.name, ruta_archivo=str(ruta),
+                tipo="ecografia", consulta_id=1
+            ))
+        db.commit()
+
+        print(
+            f"{'MB':>6}{'completo ms':>13}{'1er byte ms':>13}{'recorrido ms':>14}"
+            f"{'RSS completo':>14}{'RSS recorrido':>15}"
+        )
+        for i, mb in enumerate(tamanos, start=1):
+            ruta = Path(db.get(ArchivoClinico, i).ruta_archivo)
+
+            base = _rss_mb()
+            inicio = time.perf_counter()
+            datos = ruta.read_bytes()
+            crc_completo = zlib.crc32(datos)
+            completo = time.perf_counter() - inicio
+            rss_completo = _rss_mb() - base
+            del datos
+
+            cache_mapeos.vaciar()
+            base = _rss_mb()
+            inicio = time.perf_counter()
+            archivo = abrir_archivo(db, i)
+            bytes(archivo.leer(0, 64 * 1024))
+            primer_byte = time.perf_counter() - inicio
+
+            # Pico de memoria durante el recorrido, no solo al final.
+            inicio = time.perf_counter()
+            crc, pico = 0, 0.0
+            for bloque in archivo.bloques():
+                crc = zlib.crc32(bloque, crc)
+                pico = max(pico, _rss_mb() - base)
+            recorrido = time.perf_counter() - inicio
+            if crc != crc_completo:
+                raise AssertionError(f"CRC distinto al recorrer {ruta.name}")
+
+            print(
+                f"{mb:>6}{completo * 1000:>13.1f}{primer_byte * 1000:>13.2f}{recorrido * 1000:>14.1f}"
+                f"{rss_completo:>11.0f} MB{pico:>12.0f} MB"
+            )
+        db.close()
+    finally:
+        cache_mapeos.vaciar()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 512)
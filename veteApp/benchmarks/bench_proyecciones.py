@@ -0,0 +1,94 @@
+# benchmarks/bench_proyecciones.py
+#
+# Compara memoria y tiempo de los listados con entidades completas
+# contra las variantes de proyección (named tuples).
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_proyecciones [filas]
+
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, Dueno, Especie, Paciente, Veterinario
+from database.crud.dueno import listar_duenos, listar_duenos_opciones
+from database.crud.paciente import (
+    listar_pacientes_por_dueno,
+    listar_pacientes_por_dueno_opciones
+)
+from database.crud.veterinario import (
+    listar_veterinarios,
+    listar_veterinarios_opciones
+)
+
+
+def _poblar(Session, filas: int) -> int:
+    """Carga `filas` veterinarios, dueños y pacientes (todos de un dueño)."""
+
+    with Session() as db:
+        db.add_all(
+            Veterinario(nombre=f"Veterinario {i}", matricula=f"MP-{i}")
+            for i in range(filas)
+        )
+        db.add(Especie(id=1, nombre="Canino", clave="canino"))
+        db.add_all(
+            Dueno(dni=str(20_000_000 + i), nombre=f"Dueño {i}")
+            for i in range(filas)
+        )
+        db.flush()
+        dueno_id = db.query(Dueno.id).order_by(Dueno.id).first()[0]
+        db.add_all(
+            Paciente(nombre=f"Paciente {i}", especie_id=1, dueno_id=dueno_id)
+            for i in range(filas)
+        )
+        db.commit()
+        return dueno_id
+
+
+def _medir(Session, funcion, *args) -> tuple[float, int]:
+    """Devuelve (segundos, bytes pico) de una llamada en una sesión nueva."""
+
+    with Session() as db:
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = funcion(db, *args)
+        duracion = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert resultado
+    return duracion, pico
+
+
+def main(filas: int = 10_000) -> None:
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    dueno_id = _poblar(Session, filas)
+
+    casos = [
+        ("veterinarios", listar_veterinarios, listar_veterinarios_opciones, ()),
+        ("dueños", listar_duenos, listar_duenos_opciones, ()),
+        (
+            "pacientes por dueño",
+            listar_pacientes_por_dueno,
+            listar_pacientes_por_dueno_opciones,
+            (dueno_id,)
+        ),
+    ]
+
+    print(f"{filas} filas por tabla\n")
+    print(f"{'listado':<22}{'variante':<12}{'ms':>10}{'MiB pico':>12}")
+    for nombre, entidades, proyeccion, args in casos:
+        for variante, funcion in (("entidades", entidades), ("proyección", proyeccion)):
+            segundos, pico = _medir(Session, funcion, *args)
+            print(
+                f"{nombre:<22}{variante:<12}"
+                f"{segundos * 1000:>10.1f}{pico / 2**20:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,131 @@
+# benchmarks/bench_replicacion.py
+#
+# Costo de la replicación continua sobre la escritura de la primaria y
+# retraso de la réplica. Escribe consultas con y sin el replicador
+# corriendo (en otro proceso, como `python -m database.replicacion
+# replicar`), restaura la última posición y verifica que coincida.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_replicacion [transacciones]
+
+import json
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.crud.consulta import crear_consulta
+from database.models import Base, Dueno, Especie, Paciente, Veterinario
+from database.replicacion import _CABECERA_WAL, _leer_cabecera, _leer_frames, restaurar
+
+INTERVALO = 0.1  # segundos entre lecturas del WAL del replicador
+
+
+def _escribir(Session, transacciones: int) -> list[float]:
+    latencias = []
+    for i in range(transacciones):
+        inicio = time.perf_counter()
+        with Session() as db:
+            crear_consulta(
+                db,
+                paciente_id=1,
+                veterinario_id=1,
+                motivo=f"Control {i}",
+                diagnostico="Sin hallazgos relevantes. " * 20
+            )
+            db.commit()
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def _esperar_al_dia(wal: Path, respaldo: Path, timeout: float = 60) -> float:
+    """
+    Con los escritores detenidos, espera a que la posición guardada por el
+    replicador llegue al último commit del WAL. Devuelve los segundos que
+    tardó en ponerse al día.
+    """
+
+    inicio = time.perf_counter()
+    with open(wal, "rb") as archivo:
+        cabecera = _leer_cabecera(archivo)
+        _, fin, _ = _leer_frames(
+            archivo, cabecera, _CABECERA_WAL, cabecera.checksum, wal.stat().st_size
+        )
+    while time.perf_counter() - inicio < timeout:
+        try:
+            posicion = json.loads((sorted(respaldo.glob("*/posicion.json"))[-1]).read_text())
+        except (IndexError, json.JSONDecodeError):
+            posicion = None
+        if posicion and tuple(posicion["sal"]) == cabecera.sal and posicion["offset"] == fin:
+            break
+        time.sleep(INTERVALO / 2)
+    return time.perf_counter() - inicio
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def main(transacciones: int = 2000) -> None:
+    carpeta = Path(tempfile.mkdtemp(prefix="bench_replicacion_"))
+    primaria = carpeta / "vete.db"
+    try:
+        engine = create_engine(f"sqlite:///{primaria}", future=True)
+        with engine.begin() as conexion:
+            conexion.exec_driver_sql("PRAGMA journal_mode = WAL")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            db.add(Dueno(id=1, dni="1", nombre="Dueño"))
+            db.add(Especie(id=1, nombre="Canino", clave="canino"))
+            db.add(Veterinario(id=1, nombre="Vet"))
+            db.add(Paciente(id=1, nombre="Paciente", especie_id=1, dueno_id=1))
+            db.commit()
+
+        sin = _escribir(Session, transacciones)
+
+        replicador = subprocess.Popen(
+            [sys.executable, "-u", "-m", "database.replicacion", "replicar",
+             "--primaria", str(primaria), "--destino", str(carpeta / "respaldo"),
+             "--intervalo", str(INTERVALO)],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        replicador.stdout.readline()  # "Replicando ...": ya tomó la copia base
+        con = _escribir(Session, transacciones)
+        al_dia = _esperar_al_dia(Path(f"{primaria}-wal"), carpeta / "respaldo")
+        replicador.send_signal(signal.SIGINT)
+        metricas = replicador.communicate(timeout=30)[0].strip()
+
+        for nombre, latencias in (("sin replicación", sin), ("con replicación", con)):
+            print(
+                f"{nombre:<18}p50 {_percentil(latencias, 0.5) * 1000:6.2f} ms   "
+                f"p99 {_percentil(latencias, 0.99) * 1000:6.2f} ms"
+            )
+        segmentos = list((carpeta / "respaldo").glob("*/segmentos/*.seg"))
+        print(
+            f"réplica: {len(segmentos)} segmentos, "
+            f"{sum(s.stat().st_size for s in segmentos) / 1e6:.1f} MB, {metricas}"
+        )
+        print(f"al día {al_dia * 1000:.0f} ms después de la última escritura")
+
+        restaurada = restaurar(carpeta / "respaldo", carpeta / "restaurada.db")
+        consulta = "SELECT count(*), max(id) FROM consultas"
+        with sqlite3.connect(primaria) as a, sqlite3.connect(restaurada) as b:
+            original, copia = a.execute(consulta).fetchone(), b.execute(consulta).fetchone()
+        print(f"restauración: {'OK' if original == copia else 'DIFERENTE'} ({copia[0]} consultas)")
+        engine.dispose()
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
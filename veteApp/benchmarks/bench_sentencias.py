@@ -0,0 +1,73 @@
+# benchmarks/bench_sentencias.py
+#
+# Costo por llamada de una búsqueda por ID: consulta legacy armada en
+# cada llamada (db.query().filter()) contra la sentencia select()
+# pre-armada que usa database/crud, y tasa de aciertos del caché.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_sentencias [llamadas]
+
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.crud.paciente import obtener_paciente_por_id
+from database.metricas import observar_cache
+from database.models import Base, Dueno, Especie, Paciente
+
+FILAS = 1000
+
+
+def _legacy(db, paciente_id: int) -> Paciente | None:
+    """Forma anterior de obtener_paciente_por_id."""
+
+    return (
+        db.query(Paciente)
+        .filter(
+            Paciente.id == paciente_id,
+            Paciente.activo.is_(True)
+        )
+        .one_or_none()
+    )
+
+
+def _medir(Session, funcion, llamadas: int) -> float:
+    with Session() as db:
+        funcion(db, 1)  # calentar el caché
+        inicio = time.perf_counter()
+        for i in range(llamadas):
+            funcion(db, i % FILAS + 1)
+            db.expunge_all()
+        return (time.perf_counter() - inicio) / llamadas
+
+
+def main(llamadas: int = 20_000) -> None:
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        db.add(Dueno(dni="1", nombre="Dueño"))
+        db.add(Especie(id=1, nombre="Canino", clave="canino"))
+        db.flush()
+        db.add_all(
+            Paciente(nombre=f"Paciente {i}", especie_id=1, dueno_id=1)
+            for i in range(FILAS)
+        )
+        db.commit()
+
+    estadisticas = observar_cache(engine)
+
+    for nombre, funcion in (("legacy db.query", _legacy), ("select pre-armado", obtener_paciente_por_id)):
+        estadisticas.reiniciar()
+        por_llamada = _medir(Session, funcion, llamadas)
+        print(
+            f"{nombre:<20}{por_llamada * 1e6:>8.1f} µs/llamada   "
+            f"caché: {estadisticas.tasa_aciertos:.1%} aciertos"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,104 @@
+# benchmarks/bench_serializacion.py
+#
+# Costo de armar el JSON del historial de un paciente: sin caché, con el
+# caché de filas codificadas (api/serializacion.py) y después de que
+# cambió el 1% de las consultas. Compara también releer todo contra
+# pedir solo lo cambiado desde la última versión (database/versiones.py).
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.bench_serializacion [consultas]
+
+import sys
+import time
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from api.serializacion import CacheSerializacion, serializar
+from database.crud.consulta import listar_consultas_por_paciente
+from database.models import Base, Consulta, Dueno, Especie, Paciente, Veterinario
+from database.versiones import cambios_desde, version_actual
+
+REPETICIONES = 5
+
+DIAGNOSTICO = (
+    "Paciente alerta, mucosas rosadas, TLLC < 2 s. Se palpa leve dolor abdominal "
+    "craneal sin masas. Se indica ayuno de 12 h, dieta blanda y control en 72 h."
+)
+
+
+def _poblar(Session, consultas: int) -> None:
+    with Session() as db:
+        db.add(Especie(id=1, nombre="Canino", clave="canino"))
+        db.add(Veterinario(id=1, nombre="Vet"))
+        db.add(Dueno(id=1, dni="30000000", nombre="Dueño"))
+        db.add(Paciente(id=1, nombre="Paciente", especie_id=1, dueno_id=1))
+        db.add_all(
+            Consulta(
+                paciente_id=1, veterinario_id=1, motivo=f"Control {i}",
+                diagnostico=DIAGNOSTICO, observaciones=f"Peso {20 + i % 7} kg"
+            )
+            for i in range(consultas)
+        )
+        db.commit()
+
+
+def _medir(Session, funcion) -> float:
+    """Mejor tiempo de REPETICIONES llamadas, cada una en una sesión nueva."""
+
+    mejor = float("inf")
+    for _ in range(REPETICIONES):
+        with Session() as db:
+            inicio = time.perf_counter()
+            funcion(db)
+            mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main(consultas: int = 5_000) -> None:
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    _poblar(Session, consultas)
+    cache = CacheSerializacion()
+
+    def historial(db, con_cache=None):
+        return serializar(listar_consultas_por_paciente(db, 1), con_cache)
+
+    lectura = _medir(Session, lambda db: listar_consultas_por_paciente(db, 1))
+    sin_cache = _medir(Session, historial)
+    with Session() as db:
+        marca = version_actual(db)
+        inicio = time.perf_counter()
+        historial(db, cache)
+        fria = time.perf_counter() - inicio
+    caliente = _medir(Session, lambda db: historial(db, cache))
+
+    cambiadas = max(1, consultas // 100)
+    with Session() as db:
+        db.execute(
+            update(Consulta).where(Consulta.id % 100 == 0).values(observaciones="Revisado")
+        )
+        db.commit()
+    aciertos = cache.aciertos
+    with Session() as db:
+        inicio = time.perf_counter()
+        historial(db, cache)
+        tras_cambios = time.perf_counter() - inicio
+    recodificadas = consultas - (cache.aciertos - aciertos)
+
+    solo_cambios = _medir(Session, lambda db: serializar(cambios_desde(db, Consulta, marca), cache))
+
+    print(f"{consultas} consultas, caché {len(cache)} filas / {cache.bytes / 2**20:.1f} MiB\n")
+    print(f"{'historial completo':<38}{'ms':>8}")
+    print(f"{'  solo lectura, sin JSON':<38}{lectura * 1000:>8.1f}")
+    print(f"{'  sin caché':<38}{sin_cache * 1000:>8.1f}")
+    print(f"{'  caché frío':<38}{fria * 1000:>8.1f}")
+    print(f"{'  caché caliente':<38}{caliente * 1000:>8.1f}")
+    print(f"{f'  tras cambiar {cambiadas} ({recodificadas} recodificadas)':<38}"
+          f"{tras_cambios * 1000:>8.1f}")
+    print(f"{'solo cambios desde la marca':<38}{solo_cambios * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
@@ -0,0 +1,162 @@
+# benchmarks/carga_api.py
+#
+# Prueba de carga local del servicio HTTP (api/servicio.py) sobre un
+# archivo SQLite temporal: varios clientes concurrentes con conexiones
+# persistentes mezclan lecturas condicionales (If-None-Match) con altas
+# de consultas. Informa pedidos por segundo, latencias y qué fracción de
+# las lecturas se resolvió con 304.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.carga_api [clientes] [segundos]
+#     python -m benchmarks.carga_api 16 10 --sin-etag
+
+import asyncio
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.servicio import Servicio
+from api.servidor import servir
+from database.models import Base, Dueno, Especie, Paciente, Veterinario
+
+DUENOS = 500
+PACIENTES_POR_DUENO = 2
+PROPORCION_ESCRITURAS = 0.1
+
+
+def _poblar(ruta: str) -> None:
+    engine = create_engine(f"sqlite:///{ruta}", future=True)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Especie(id=1, nombre="Canino", clave="canino"))
+        db.add(Veterinario(id=1, nombre="Vet"))
+        for i in range(1, DUENOS + 1):
+            db.add(Dueno(id=i, dni=str(30_000_000 + i), nombre=f"Dueño {i}"))
+            for j in range(PACIENTES_POR_DUENO):
+                db.add(Paciente(nombre=f"Paciente {i}-{j}", especie_id=1, dueno_id=i))
+        db.commit()
+    engine.dispose()
+
+
+def _arrancar(servicio: Servicio) -> tuple[int, asyncio.AbstractEventLoop, asyncio.Task]:
+    """Levanta el servidor en un hilo propio; devuelve el puerto, su loop y su tarea."""
+
+    loop = asyncio.new_event_loop()
+    listo = threading.Event()
+    puerto = []
+
+    def al_escuchar(numero: int) -> None:
+        puerto.append(numero)
+        listo.set()
+
+    tarea = loop.create_task(servir(servicio, "127.0.0.1", 0, al_escuchar=al_escuchar))
+
+    def correr():
+        try:
+            loop.run_until_complete(tarea)
+        except asyncio.CancelledError:
+            pass
+
+    threading.Thread(target=correr, daemon=True).start()
+    listo.wait()
+    return puerto[0], loop, tarea
+
+
+def _cliente(puerto: int, hasta: float, con_etag: bool, semilla: int, resultados: dict) -> None:
+    azar = random.Random(semilla)
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+    etags: dict[str, str] = {}
+    tiempos = defaultdict(list)
+    no_modificados = 0
+
+    while time.perf_counter() < hasta:
+        if azar.random() < PROPORCION_ESCRITURAS:
+            tipo = "POST /consultas"
+            cuerpo = json.dumps({
+                "paciente_id": azar.randint(1, DUENOS * PACIENTES_POR_DUENO),
+                "veterinario_id": 1,
+                "motivo": "Control",
+            })
+            inicio = time.perf_counter()
+            conexion.request("POST", "/consultas", cuerpo, {"content-type": "application/json"})
+        else:
+            if azar.random() < 0.7:
+                tipo, ruta = "GET /pacientes/{id}", f"/pacientes/{azar.randint(1, 50)}"
+            else:
+                tipo, ruta = "GET /duenos/{id}/pacientes", f"/duenos/{azar.randint(1, 25)}/pacientes"
+            encabezados = {"if-none-match": etags[ruta]} if con_etag and ruta in etags else {}
+            inicio = time.perf_counter()
+            conexion.request("GET", ruta, headers=encabezados)
+
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        tiempos[tipo].append(time.perf_counter() - inicio)
+        if respuesta.status == 304:
+            no_modificados += 1
+        elif respuesta.status == 200 and tipo.startswith("GET"):
+            etags[ruta] = respuesta.getheader("etag")
+        elif respuesta.status >= 400:
+            raise RuntimeError(f"{tipo}: {respuesta.status}")
+
+    conexion.close()
+    with resultados["lock"]:
+        for tipo, lista in tiempos.items():
+            resultados["tiempos"][tipo].extend(lista)
+        resultados["304"] += no_modificados
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def main(clientes: int = 8, segundos: float = 5.0, con_etag: bool = True) -> None:
+    ruta = tempfile.mktemp(prefix="carga_api_", suffix=".db")
+    _poblar(ruta)
+    servicio = Servicio(ruta)
+    servicio.iniciar()
+    puerto, loop, tarea = _arrancar(servicio)
+
+    resultados = {"lock": threading.Lock(), "tiempos": defaultdict(list), "304": 0}
+    hasta = time.perf_counter() + segundos
+    hilos = [
+        threading.Thread(target=_cliente, args=(puerto, hasta, con_etag, i, resultados))
+        for i in range(clientes)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    loop.call_soon_threadsafe(tarea.cancel)
+    servicio.cerrar()
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+
+    total = sum(len(t) for t in resultados["tiempos"].values())
+    lecturas = sum(len(t) for tipo, t in resultados["tiempos"].items() if tipo.startswith("GET"))
+    print(f"{clientes} clientes, {segundos:.0f} s, ETag {'sí' if con_etag else 'no'}: "
+          f"{total / segundos:.0f} pedidos/s, {resultados['304'] / max(lecturas, 1):.0%} de lecturas con 304")
+    print(f"{'pedido':<28}{'cantidad':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for tipo, tiempos in sorted(resultados["tiempos"].items()):
+        print(f"{tipo:<28}{len(tiempos):>10}"
+              f"{_percentil(tiempos, 0.5) * 1000:>9.2f}{_percentil(tiempos, 0.99) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(
+        int(argumentos[0]) if argumentos else 8,
+        float(argumentos[1]) if len(argumentos) > 1 else 5.0,
+        con_etag="--sin-etag" not in sys.argv
+    )
@@ -0,0 +1,298 @@
+# benchmarks/prueba_carga.py
+#
+# Prueba de carga: simula recepcionistas y veterinarios trabajando en
+# simultáneo, usando las funciones de database/crud con un engine y una
+# sesión configurados como SessionLocal. Por defecto trabaja sobre un
+# archivo temporal que se borra al terminar; --db apunta a otra base (que
+# se conserva), nunca se escribe en vete.db salvo que se lo pida.
+#
+# Uso (desde veteApp/):
+#     python -m benchmarks.prueba_carga --procesos 2 --hilos 4 --duracion 30
+#     python -m benchmarks.prueba_carga --db /tmp/carga.db
+#
+# Reporta throughput, latencia p50/p99 por operación, tiempo de espera
+# del lock de escritura y cantidad de errores.
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database.init_db import crear_engine, inicializar_base
+from database.models import Paciente, Veterinario
+from database.crud.consulta import crear_consulta, listar_consultas_por_paciente
+from database.crud.dueno import crear_dueno, listar_duenos_opciones
+from database.crud.paciente import crear_paciente, obtener_paciente_por_id
+from database.crud.timeline import timeline_paciente
+from database.crud.tratamiento import crear_tratamiento
+from database.crud.veterinario import crear_veterinario, listar_veterinarios_opciones
+
+VETERINARIOS = 10
+
+# Operación -> (peso en la mezcla, escribe)
+MEZCLA = {
+    "alta_dueno_paciente": (0.15, True),
+    "abrir_ficha": (0.45, False),
+    "registrar_consulta": (0.25, True),
+    "listar": (0.15, False),
+}
+
+# Engine y fábrica de sesiones de la base de prueba (ver _abrir).
+_engine = None
+_Sesion = None
+
+
+def _abrir(ruta: str) -> None:
+    """Configura el engine y la fábrica de sesiones como en database/init_db."""
+
+    global _engine, _Sesion
+    _engine = crear_engine(ruta, echo=False)
+    _Sesion = sessionmaker(bind=_engine, autoflush=False, autocommit=False)
+
+
+def _iniciar_proceso(ruta: str) -> None:
+    """
+    Inicializador de cada proceso del pool. Con fork el hijo hereda las
+    conexiones ya abiertas del padre: se descartan sin cerrarlas (son del
+    padre) y el hijo abre las suyas. Con spawn no hay nada heredado.
+    """
+
+    if _engine is None:
+        _abrir(ruta)
+    else:
+        _engine.dispose(close=False)
+
+
+# ---------------------------------------------------------
+# OPERACIONES
+# ---------------------------------------------------------
+def _alta_dueno_paciente(db, rnd: random.Random, ids: dict) -> None:
+    dueno = crear_dueno(
+        db,
+        dni=f"{rnd.randrange(10**9):09d}",
+        nombre=f"Dueño {rnd.randrange(10**6)}",
+        telefono=f"11{rnd.randrange(10**8):08d}"
+    )
+    db.flush()
+    crear_paciente(
+        db,
+        nombre=f"Paciente {rnd.randrange(10**6)}",
+        especie=rnd.choice(["Canino", "Felino"]),
+        dueno_id=dueno.id
+    )
+
+
+def _abrir_ficha(db, rnd: random.Random, ids: dict) -> None:
+    paciente = obtener_paciente_por_id(db, rnd.randint(1, ids["paciente"]))
+    if paciente is not None:
+        listar_consultas_por_paciente(db, paciente.id)
+        timeline_paciente(db, paciente.id)
+
+
+def _registrar_consulta(db, rnd: random.Random, ids: dict) -> None:
+    consulta = crear_consulta(
+        db,
+        paciente_id=rnd.randint(1, ids["paciente"]),
+        veterinario_id=rnd.randint(1, ids["veterinario"]),
+        motivo="Control",
+        diagnostico="Sin hallazgos relevantes"
+    )
+    db.flush()
+    crear_tratamiento(
+        db,
+        nombre="Amoxicilina",
+        dosis="250 mg",
+        frecuencia="cada 12 hs",
+        duracion="7 días",
+        fecha_inicio=date.today(),
+        consulta_id=consulta.id
+    )
+
+
+def _listar(db, rnd: random.Random, ids: dict) -> None:
+    listar_veterinarios_opciones(db)
+    listar_duenos_opciones(db)
+
+
+_OPERACIONES = {
+    "alta_dueno_paciente": _alta_dueno_paciente,
+    "abrir_ficha": _abrir_ficha,
+    "registrar_consulta": _registrar_consulta,
+    "listar": _listar,
+}
+
+
+# ---------------------------------------------------------
+# TRABAJADORES
+# ---------------------------------------------------------
+def _max_ids() -> dict:
+    with _Sesion() as db:
+        return {
+            "paciente": db.scalar(select(func.max(Paciente.id))) or 1,
+            "veterinario": db.scalar(select(func.max(Veterinario.id))) or 1,
+        }
+
+
+def _hilo(semilla: int, fin: float, resultados: dict, lock: threading.Lock) -> None:
+    rnd = random.Random(semilla)
+    nombres = list(MEZCLA)
+    pesos = [MEZCLA[n][0] for n in nombres]
+    ids = _max_ids()
+
+    latencias = defaultdict(list)
+    esperas = []
+    errores = defaultdict(int)
+
+    while time.perf_counter() < fin:
+        nombre = rnd.choices(nombres, pesos)[0]
+        escribe = MEZCLA[nombre][1]
+        inicio = time.perf_counter()
+        db = _Sesion()
+        try:
+            if escribe:
+                # Tomar el lock de escritura al principio para medir la espera.
+                t0 = time.perf_counter()
+                db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                esperas.append(time.perf_counter() - t0)
+            _OPERACIONES[nombre](db, rnd, ids)
+            if escribe:
+                db.commit()
+            latencias[nombre].append(time.perf_counter() - inicio)
+        except OperationalError as error:
+            db.rollback()
+            clave = "lock" if "locked" in str(error) else "operational"
+            errores[f"{nombre}:{clave}"] += 1
+        except Exception as error:
+            db.rollback()
+            errores[f"{nombre}:{type(error).__name__}"] += 1
+        finally:
+            db.close()
+
+        if nombre == "alta_dueno_paciente" and rnd.random() < 0.1:
+            ids = _max_ids()
+
+    with lock:
+        for nombre, valores in latencias.items():
+            resultados["latencias"][nombre].extend(valores)
+        resultados["esperas"].extend(esperas)
+        for clave, cantidad in errores.items():
+            resultados["errores"][clave] += cantidad
+
+
+def _proceso(args: tuple[int, int, float]) -> dict:
+    indice, hilos, duracion = args
+    resultados = {
+        "latencias": defaultdict(list),
+        "esperas": [],
+        "errores": defaultdict(int),
+    }
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+    trabajadores = [
+        threading.Thread(target=_hilo, args=(indice * 1000 + i, fin, resultados, lock))
+        for i in range(hilos)
+    ]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return {
+        "latencias": dict(resultados["latencias"]),
+        "esperas": resultados["esperas"],
+        "errores": dict(resultados["errores"]),
+    }
+
+
+# ---------------------------------------------------------
+# PREPARACIÓN Y REPORTE
+# ---------------------------------------------------------
+def _preparar() -> None:
+    inicializar_base(_engine)
+    with _Sesion() as db:
+        if db.scalar(select(func.count()).select_from(Veterinario)) < VETERINARIOS:
+            for i in range(VETERINARIOS):
+                crear_veterinario(db, nombre=f"Vet {i}", matricula=f"CARGA-{time.time_ns()}-{i}")
+        db.commit()
+        if db.scalar(select(func.count()).select_from(Paciente)) == 0:
+            rnd = random.Random(0)
+            _alta_dueno_paciente(db, rnd, {})
+            db.commit()
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga sobre una base SQLite.")
+    parser.add_argument("--db", help="archivo SQLite (por defecto uno temporal que se borra)")
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--hilos", type=int, default=4, help="hilos por proceso")
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos")
+    args = parser.parse_args()
+
+    ruta = args.db or tempfile.mktemp(prefix="prueba_carga_", suffix=".db")
+    _abrir(ruta)
+    _preparar()
+
+    tareas = [(i, args.hilos, args.duracion) for i in range(args.procesos)]
+    if args.procesos == 1:
+        parciales = [_proceso(tareas[0])]
+    else:
+        with multiprocessing.Pool(args.procesos, _iniciar_proceso, (ruta,)) as pool:
+            parciales = pool.map(_proceso, tareas)
+
+    _engine.dispose()
+    if args.db is None:
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+
+    latencias = defaultdict(list)
+    esperas = []
+    errores = defaultdict(int)
+    for parcial in parciales:
+        for nombre, valores in parcial["latencias"].items():
+            latencias[nombre].extend(valores)
+        esperas.extend(parcial["esperas"])
+        for clave, cantidad in parcial["errores"].items():
+            errores[clave] += cantidad
+
+    total = sum(len(v) for v in latencias.values())
+    concurrencia = args.procesos * args.hilos
+    print(f"concurrencia: {concurrencia} ({args.procesos} procesos x {args.hilos} hilos)")
+    print(f"throughput:   {total / args.duracion:.1f} ops/s ({total} ops)\n")
+
+    print(f"{'operación':<22}{'ops':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre in MEZCLA:
+        valores = latencias.get(nombre, [])
+        print(
+            f"{nombre:<22}{len(valores):>8}"
+            f"{_percentil(valores, 0.50) * 1000:>10.2f}"
+            f"{_percentil(valores, 0.99) * 1000:>10.2f}"
+        )
+
+    print(
+        f"\nespera de lock: total {sum(esperas):.2f} s, "
+        f"p50 {_percentil(esperas, 0.50) * 1000:.2f} ms, "
+        f"p99 {_percentil(esperas, 0.99) * 1000:.2f} ms"
+    )
+    print(f"errores: {sum(errores.values())}")
+    for clave, cantidad in sorted(errores.items()):
+        print(f"  {clave}: {cantidad}")
+
+
+if __name__ == "__main__":
+    main()
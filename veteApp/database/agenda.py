@@ -0,0 +1,254 @@
+# database/agenda.py
+#
+# Índice en memoria de los turnos de cada veterinario.
+#
+# Se reconstruye desde la base al iniciar y se mantiene sincronizado
+# con las transacciones confirmadas:
+#
+#     from database.agenda import indice_turnos
+#     indice_turnos.vincular(SessionLocal)
+#     with SessionLocal() as db:
+#         indice_turnos.reconstruir(db)
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.models import Turno
+
+DURACION_TURNO = timedelta(minutes=20)
+JORNADA = (time(9, 0), time(18, 0))
+
+_CLAVE_PENDIENTES = "turnos_pendientes"
+
+
+class HuecoLibre(NamedTuple):
+    inicio: datetime
+    fin: datetime
+    veterinario_id: int
+
+
+# ---------------------------------------------------------
+# AGENDA DE UN VETERINARIO
+# ---------------------------------------------------------
+class AgendaVeterinario:
+    """
+    Turnos de un veterinario como intervalos [inicio, fin) sin
+    superposición, ordenados por inicio. Como no se superponen, los
+    fines quedan ordenados igual que los inicios y cualquier consulta
+    se resuelve con búsqueda binaria.
+    """
+
+    def __init__(self):
+        self._inicios: list[datetime] = []
+        self._fines: list[datetime] = []
+        self._ids: list[int] = []
+        self._por_id: dict[int, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def superposicion(self, inicio: datetime, fin: datetime, *, excluir: int | None = None) -> int | None:
+        """Devuelve el ID de un turno que se superpone con [inicio, fin) o None."""
+
+        i = bisect_left(self._inicios, fin) - 1
+        while i >= 0 and self._fines[i] > inicio:
+            if self._ids[i] != excluir:
+                return self._ids[i]
+            i -= 1
+        return None
+
+    def agregar(self, turno_id: int, inicio: datetime, fin: datetime) -> None:
+        i = bisect_right(self._inicios, inicio)
+        self._inicios.insert(i, inicio)
+        self._fines.insert(i, fin)
+        self._ids.insert(i, turno_id)
+        self._por_id[turno_id] = inicio
+
+    def quitar(self, turno_id: int) -> None:
+        inicio = self._por_id.pop(turno_id, None)
+        if inicio is None:
+            return
+        i = bisect_left(self._inicios, inicio)
+        while self._ids[i] != turno_id:
+            i += 1
+        del self._inicios[i], self._fines[i], self._ids[i]
+
+    def huecos(
+        self,
+        desde: datetime,
+        hasta: datetime,
+        *,
+        duracion: timedelta,
+        jornada: tuple[time, time]
+    ) -> Iterator[datetime]:
+        """
+        Genera los inicios libres de `duracion`, alineados a múltiplos de
+        `duracion` desde el comienzo de la jornada, entre desde y hasta.
+        """
+
+        dia = desde.date()
+        while dia <= hasta.date():
+            apertura = datetime.combine(dia, jornada[0])
+            cierre = min(datetime.combine(dia, jornada[1]), hasta)
+            t = max(apertura, desde)
+
+            while t + duracion <= cierre:
+                # Alinear a la grilla de la jornada.
+                desfase = (t - apertura) % duracion
+                if desfase:
+                    t += duracion - desfase
+                    continue
+
+                i = bisect_left(self._inicios, t + duracion) - 1
+                if i >= 0 and self._fines[i] > t:
+                    t = self._fines[i]
+                    continue
+
+                yield t
+                t += duracion
+
+            dia += timedelta(days=1)
+
+
+# ---------------------------------------------------------
+# ÍNDICE DE TODOS LOS VETERINARIOS
+# ---------------------------------------------------------
+class IndiceTurnos:
+    """Agendas en memoria de todos los veterinarios, seguras entre hilos."""
+
+    def __init__(self):
+        self._agendas: dict[int, AgendaVeterinario] = {}
+        self._veterinario_de: dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.reconstruido = False
+
+    def reconstruir(self, db: Session) -> int:
+        """Carga todos los turnos activos desde la base. Devuelve la cantidad."""
+
+        agendas: dict[int, AgendaVeterinario] = {}
+        veterinario_de: dict[int, int] = {}
+        filas = db.execute(
+            select(Turno.id, Turno.veterinario_id, Turno.inicio, Turno.fin)
+            .where(Turno.activo.is_(True))
+            .order_by(Turno.veterinario_id, Turno.inicio)
+        )
+        total = 0
+        for turno_id, veterinario_id, inicio, fin in filas:
+            agenda = agendas.setdefault(veterinario_id, AgendaVeterinario())
+            agenda._inicios.append(inicio)
+            agenda._fines.append(fin)
+            agenda._ids.append(turno_id)
+            agenda._por_id[turno_id] = inicio
+            veterinario_de[turno_id] = veterinario_id
+            total += 1
+
+        with self._lock:
+            self._agendas = agendas
+            self._veterinario_de = veterinario_de
+            self.reconstruido = True
+        return total
+
+    def superposicion(
+        self,
+        veterinario_id: int,
+        inicio: datetime,
+        fin: datetime,
+        *,
+        excluir: int | None = None
+    ) -> int | None:
+        """
+        Devuelve el ID de un turno del veterinario superpuesto o None.
+        Lanza RuntimeError si el índice nunca se cargó: vacío no es libre.
+        """
+
+        with self._lock:
+            if not self.reconstruido:
+                raise RuntimeError("El índice de turnos no se reconstruyó desde la base")
+            agenda = self._agendas.get(veterinario_id)
+            if agenda is None:
+                return None
+            return agenda.superposicion(inicio, fin, excluir=excluir)
+
+    def proximos_libres(
+        self,
+        desde: datetime,
+        hasta: datetime,
+        *,
+        veterinario_ids: Iterable[int],
+        cantidad: int = 10,
+        duracion: timedelta = DURACION_TURNO,
+        jornada: tuple[time, time] = JORNADA
+    ) -> list[HuecoLibre]:
+        """
+        Devuelve los próximos `cantidad` huecos libres de `duracion` entre
+        los veterinarios dados, ordenados por hora de inicio.
+        """
+
+        def _huecos(veterinario_id: int) -> Iterator[HuecoLibre]:
+            agenda = self._agendas.get(veterinario_id, AgendaVeterinario())
+            for inicio in agenda.huecos(desde, hasta, duracion=duracion, jornada=jornada):
+                yield HuecoLibre(inicio, inicio + duracion, veterinario_id)
+
+        with self._lock:
+            generadores = [_huecos(veterinario_id) for veterinario_id in veterinario_ids]
+            resultado = []
+            for hueco in heapq.merge(*generadores):
+                resultado.append(hueco)
+                if len(resultado) >= cantidad:
+                    break
+            return resultado
+
+    def _aplicar(self, cambios: list[tuple[int, int, datetime, datetime, bool]]) -> None:
+        with self._lock:
+            for turno_id, veterinario_id, inicio, fin, activo in cambios:
+                anterior = self._veterinario_de.pop(turno_id, None)
+                if anterior is not None:
+                    self._agendas[anterior].quitar(turno_id)
+                if activo:
+                    self._agendas.setdefault(veterinario_id, AgendaVeterinario()).agregar(
+                        turno_id, inicio, fin
+                    )
+                    self._veterinario_de[turno_id] = veterinario_id
+
+    # -----------------------------------------------------
+    # SINCRONIZACIÓN CON LA SESIÓN
+    # -----------------------------------------------------
+    def vincular(self, session_factory: sessionmaker) -> None:
+        """
+        Actualiza el índice con los turnos creados, modificados o borrados
+        en las sesiones de `session_factory`, al confirmar la transacción.
+        """
+
+        def _capturar(session: Session, flush_context) -> None:
+            pendientes = session.info.setdefault(_CLAVE_PENDIENTES, [])
+            for objeto in (*session.new, *session.dirty, *session.deleted):
+                if isinstance(objeto, Turno):
+                    pendientes.append((
+                        objeto.id,
+                        objeto.veterinario_id,
+                        objeto.inicio,
+                        objeto.fin,
+                        objeto.activo and objeto not in session.deleted
+                    ))
+
+        def _al_confirmar(session: Session) -> None:
+            pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+            if pendientes:
+                self._aplicar(pendientes)
+
+        def _al_deshacer(session: Session) -> None:
+            session.info.pop(_CLAVE_PENDIENTES, None)
+
+        event.listen(session_factory, "after_flush", _capturar)
+        event.listen(session_factory, "after_commit", _al_confirmar)
+        event.listen(session_factory, "after_rollback", _al_deshacer)
+
+
+indice_turnos = IndiceTurnos()
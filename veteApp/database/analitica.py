@@ -0,0 +1,243 @@
+# database/analitica.py
+#
+# Métricas de la clínica calculadas en forma vectorizada con pandas.
+#
+# Las columnas se leen en bloque con SELECTs de Core (sin entidades) y
+# por lotes, así la memoria queda acotada al tamaño del lote más los
+# acumuladores. Las fechas se leen como texto y se convierten una vez
+# por columna de cada lote, no fila por fila.
+#
+# Requiere numpy y pandas.
+
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+
+from database.catalogos import nombre_de
+from database.models import Consulta, Especie, Medicamento, Paciente, Tratamiento, Veterinario
+
+LOTE = 200_000
+
+_FORMATO_FECHA = "%Y-%m-%d"
+_FORMATO_FECHA_HORA = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _texto(columna):
+    """Etiqueta la columna como texto crudo; se convierte después por columna."""
+    return type_coerce(columna, String).label(columna.key)
+
+
+def _leer_por_lotes(db: Session, consulta, lote: int) -> Iterator[pd.DataFrame]:
+    """
+    Ejecuta la consulta directamente sobre el cursor del driver y devuelve
+    DataFrames de a `lote` filas, evitando armar un Row por fila.
+    """
+
+    conexion = db.connection()
+    compilado = consulta.compile(dialect=conexion.dialect)
+    parametros = [compilado.params[nombre] for nombre in compilado.positiontup or ()]
+
+    cursor = conexion.connection.cursor()
+    try:
+        cursor.execute(str(compilado), parametros)
+        columnas = [descripcion[0] for descripcion in cursor.description]
+        while filas := cursor.fetchmany(lote):
+            yield pd.DataFrame.from_records(filas, columns=columnas)
+    finally:
+        cursor.close()
+
+
+# ---------------------------------------------------------
+# DURACIÓN PROMEDIO DE TRATAMIENTO POR MEDICAMENTO
+# ---------------------------------------------------------
+def duracion_promedio_por_farmaco(
+    db: Session,
+    *,
+    lote: int = LOTE
+) -> pd.DataFrame:
+    """
+    Días promedio entre fecha_inicio y fecha_fin de los tratamientos
+    finalizados, por nombre de medicamento.
+    Columnas: tratamientos, dias_promedio (índice: nombre).
+    """
+
+    consulta = (
+        select(
+            Tratamiento.medicamento_id,
+            _texto(Tratamiento.fecha_inicio),
+            _texto(Tratamiento.fecha_fin)
+        )
+        .where(
+            Tratamiento.activo.is_(True),
+            Tratamiento.fecha_fin.is_not(None)
+        )
+    )
+
+    sumas = []
+    for df in _leer_por_lotes(db, consulta, lote):
+        inicio = pd.to_datetime(df["fecha_inicio"], format=_FORMATO_FECHA)
+        fin = pd.to_datetime(df["fecha_fin"], format=_FORMATO_FECHA)
+        df["dias"] = (fin - inicio).dt.days
+        sumas.append(df.groupby("medicamento_id")["dias"].agg(["sum", "count"]))
+
+    if not sumas:
+        return pd.DataFrame(columns=["tratamientos", "dias_promedio"])
+
+    # Se agrupa por id y los nombres se ponen al final, desde el catálogo.
+    total = pd.concat(sumas).groupby(level=0).sum()
+    total.index = pd.Index(
+        [nombre_de(db, Medicamento, i) for i in total.index], name="nombre"
+    )
+    return pd.DataFrame({
+        "tratamientos": total["count"],
+        "dias_promedio": total["sum"] / total["count"],
+    }).sort_values("tratamientos", ascending=False)
+
+
+# ---------------------------------------------------------
+# INTERVALO ENTRE VISITAS POR PACIENTE
+# ---------------------------------------------------------
+def intervalos_entre_visitas(
+    db: Session,
+    *,
+    lote: int = LOTE
+) -> pd.DataFrame:
+    """
+    Estadísticas de días entre consultas consecutivas de cada paciente.
+    Recorre las consultas ordenadas por (paciente_id, fecha) usando el
+    índice ix_consultas_paciente_fecha.
+    Columnas: visitas, intervalo_medio, intervalo_min, intervalo_max
+    (índice: paciente_id).
+    """
+
+    consulta = (
+        select(Consulta.paciente_id, _texto(Consulta.fecha))
+        .where(Consulta.activo.is_(True))
+        .order_by(Consulta.paciente_id, Consulta.fecha)
+    )
+
+    parciales = []
+    anterior = None  # última fila del lote anterior (paciente_id, fecha)
+    for df in _leer_por_lotes(db, consulta, lote):
+        pacientes = df["paciente_id"].to_numpy()
+        fechas = pd.to_datetime(df["fecha"], format=_FORMATO_FECHA_HORA).to_numpy()
+
+        if anterior is not None:
+            pacientes = np.concatenate(([anterior[0]], pacientes))
+            fechas = np.concatenate(([anterior[1]], fechas))
+            visitas = pd.Series(1, index=pacientes[1:])
+        else:
+            visitas = pd.Series(1, index=pacientes)
+
+        mismo = pacientes[1:] == pacientes[:-1]
+        dias = (fechas[1:] - fechas[:-1]) / np.timedelta64(1, "D")
+        intervalos = pd.DataFrame({
+            "paciente_id": pacientes[1:][mismo],
+            "dias": dias[mismo],
+        })
+
+        parcial = intervalos.groupby("paciente_id")["dias"].agg(["sum", "count", "min", "max"])
+        parcial = parcial.join(visitas.groupby(level=0).sum().rename("visitas"), how="outer")
+        parciales.append(parcial)
+        anterior = (pacientes[-1], fechas[-1])
+
+    if not parciales:
+        return pd.DataFrame(columns=["visitas", "intervalo_medio", "intervalo_min", "intervalo_max"])
+
+    total = pd.concat(parciales).groupby(level=0).agg(
+        {"sum": "sum", "count": "sum", "min": "min", "max": "max", "visitas": "sum"}
+    )
+    resultado = pd.DataFrame({
+        "visitas": total["visitas"].astype(int),
+        "intervalo_medio": total["sum"] / total["count"].replace(0, np.nan),
+        "intervalo_min": total["min"],
+        "intervalo_max": total["max"],
+    })
+    resultado.index.name = "paciente_id"
+    return resultado
+
+
+# ---------------------------------------------------------
+# TENDENCIA ESTACIONAL POR ESPECIE
+# ---------------------------------------------------------
+def tendencia_estacional_especies(
+    db: Session,
+    *,
+    lote: int = LOTE
+) -> pd.DataFrame:
+    """
+    Cantidad de consultas por mes del año (filas 1-12) y especie (columnas).
+    """
+
+    consulta = (
+        select(Paciente.especie_id, _texto(Consulta.fecha))
+        .join(Paciente, Paciente.id == Consulta.paciente_id)
+        .where(Consulta.activo.is_(True))
+    )
+
+    total = None
+    for df in _leer_por_lotes(db, consulta, lote):
+        # El mes sale directo del texto "AAAA-MM-...", sin parsear la fecha entera.
+        df["mes"] = df["fecha"].str.slice(5, 7).astype(int)
+        conteo = df.groupby(["mes", "especie_id"]).size()
+        total = conteo if total is None else total.add(conteo, fill_value=0)
+
+    if total is None:
+        return pd.DataFrame(index=pd.RangeIndex(1, 13, name="mes"))
+
+    tabla = total.unstack("especie_id", fill_value=0)
+    tabla.columns = pd.Index(
+        [nombre_de(db, Especie, i) for i in tabla.columns], name="especie"
+    )
+    return (
+        tabla
+        .reindex(range(1, 13), fill_value=0)
+        .astype(int)
+        .rename_axis(index="mes")
+    )
+
+
+# ---------------------------------------------------------
+# DISTRIBUCIÓN DE CARGA POR VETERINARIO
+# ---------------------------------------------------------
+def carga_por_veterinario(
+    db: Session,
+    *,
+    lote: int = LOTE
+) -> pd.DataFrame:
+    """
+    Consultas por veterinario y su distribución diaria.
+    Columnas: nombre, consultas, porcentaje, dias_activos,
+    promedio_diario, p90_diario (índice: veterinario_id).
+    """
+
+    consulta = (
+        select(Consulta.veterinario_id, _texto(Consulta.fecha))
+        .where(Consulta.activo.is_(True))
+    )
+
+    por_dia = None
+    for df in _leer_por_lotes(db, consulta, lote):
+        df["dia"] = df["fecha"].str.slice(0, 10)
+        conteo = df.groupby(["veterinario_id", "dia"]).size()
+        por_dia = conteo if por_dia is None else por_dia.add(conteo, fill_value=0)
+
+    columnas = ["nombre", "consultas", "porcentaje", "dias_activos", "promedio_diario", "p90_diario"]
+    if por_dia is None:
+        return pd.DataFrame(columns=columnas)
+
+    agrupado = por_dia.groupby(level="veterinario_id")
+    resultado = pd.DataFrame({
+        "consultas": agrupado.sum().astype(int),
+        "dias_activos": agrupado.size(),
+        "promedio_diario": agrupado.mean(),
+        "p90_diario": agrupado.quantile(0.9),
+    })
+    resultado["porcentaje"] = resultado["consultas"] / resultado["consultas"].sum() * 100
+
+    nombres = dict(db.execute(select(Veterinario.id, Veterinario.nombre)).all())
+    resultado["nombre"] = resultado.index.map(nombres)
+    return resultado[columnas].sort_values("consultas", ascending=False)
@@ -0,0 +1,345 @@
+# database/auditoria.py
+#
+# Auditoría de cambios en registros clínicos.
+#
+# Los cambios se capturan antes de cada flush (valor anterior y nuevo de cada
+# columna modificada), se confirman junto con la transacción y los
+# inserta un hilo en segundo plano por lotes, para no sumar latencia a
+# las escrituras de la aplicación.
+#
+# Un lote que no se puede insertar se reintenta con espera creciente; si
+# sigue fallando se agrega a un archivo de pendientes (JSON por línea,
+# junto a la base) que el escritor vuelve a insertar al arrancar. La
+# cola es limitada: si se llena, quien confirma espera hasta `espera`
+# segundos y lo que no entra va directo al archivo.
+#
+# init_db.py la activa sobre SessionLocal y api/servicio.py sobre sus
+# sesiones de escritura, salvo que VETE_SIN_AUDITORIA=1. Para otras
+# sesiones:
+#     from database.auditoria import activar_auditoria
+#     activar_auditoria(SessionLocal, engine)
+#
+#     db = SessionLocal()
+#     db.info["usuario"] = "dra.gomez"   # quién hace los cambios
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.models import Base, RegistroAuditoria
+
+logger = logging.getLogger(__name__)
+
+LOTE = 200
+INTERVALO = 0.5  # segundos máximos que un cambio espera en la cola
+MAXIMO_COLA = 10_000
+ESPERA_COLA_LLENA = 2.0
+REINTENTOS = 4
+ESPERA_REINTENTO = 0.2  # se duplica en cada reintento
+
+# Columnas derivadas que no aportan al historial.
+CAMPOS_EXCLUIDOS = {
+    "dni_normalizado",
+    "telefono_normalizado",
+    "email_normalizado",
+    "nombre_fonetico",
+    "version",
+}
+
+VARIABLE_ENTORNO = "VETE_SIN_AUDITORIA"
+
+_CLAVE_PENDIENTES = "auditoria_pendiente"
+_TABLAS_EXCLUIDAS = {RegistroAuditoria.__tablename__}
+
+
+def _como_texto(valor) -> str | None:
+    if valor is None:
+        return None
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+# ---------------------------------------------------------
+# ESCRITOR EN SEGUNDO PLANO
+# ---------------------------------------------------------
+class EscritorAuditoria:
+    """
+    Hilo que inserta los registros de auditoría en lotes usando
+    su propia conexión, fuera de la transacción de la aplicación.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        lote: int = LOTE,
+        intervalo: float = INTERVALO,
+        maximo_cola: int = MAXIMO_COLA,
+        espera: float = ESPERA_COLA_LLENA,
+        reintentos: int = REINTENTOS,
+        pendientes: str | Path | None = None
+    ):
+        self.engine = engine
+        self.lote = lote
+        self.intervalo = intervalo
+        self.espera = espera
+        self.reintentos = reintentos
+        self.pendientes = Path(pendientes) if pendientes else _archivo_pendientes(engine)
+        self._lock_pendientes = threading.Lock()
+        self._cola: queue.Queue = queue.Queue(maxsize=maximo_cola)
+        self._fin = object()
+        self._hilo = threading.Thread(
+            target=self._ejecutar,
+            name="escritor-auditoria",
+            daemon=True
+        )
+        self._hilo.start()
+
+    def encolar(self, registros: list[dict]) -> None:
+        for i, registro in enumerate(registros):
+            try:
+                self._cola.put(registro, timeout=self.espera)
+            except queue.Full:
+                logger.warning("Cola de auditoría llena, %d registros van a pendientes", len(registros) - i)
+                self._guardar_pendientes(registros[i:])
+                return
+
+    def detener(self, timeout: float | None = 10) -> None:
+        """Escribe lo pendiente y termina el hilo."""
+
+        if self._hilo.is_alive():
+            self._cola.put(self._fin)
+            self._hilo.join(timeout)
+
+    def _ejecutar(self) -> None:
+        self._reprocesar_pendientes()
+        terminar = False
+        while not terminar:
+            try:
+                primero = self._cola.get(timeout=self.intervalo)
+            except queue.Empty:
+                continue
+
+            lote = []
+            siguiente = primero
+            while True:
+                if siguiente is self._fin:
+                    terminar = True
+                    break
+                lote.append(siguiente)
+                if len(lote) >= self.lote:
+                    break
+                try:
+                    siguiente = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+
+            if lote:
+                self._escribir(lote)
+
+    def _escribir(self, lote: list[dict]) -> bool:
+        """Inserta el lote reintentando; si no puede, lo guarda en pendientes."""
+
+        for intento in range(self.reintentos + 1):
+            try:
+                with self.engine.begin() as conexion:
+                    conexion.execute(insert(RegistroAuditoria), lote)
+                return True
+            except Exception:
+                if intento == self.reintentos:
+                    logger.exception("No se pudieron escribir %d registros de auditoría", len(lote))
+                else:
+                    time.sleep(ESPERA_REINTENTO * 2 ** intento)
+        self._guardar_pendientes(lote)
+        return False
+
+    # -----------------------------------------------------
+    # Archivo de pendientes
+    # -----------------------------------------------------
+    def _guardar_pendientes(self, registros: list[dict]) -> None:
+        if self.pendientes is None:
+            logger.error("Sin archivo de pendientes: se pierden %d registros de auditoría", len(registros))
+            return
+        lineas = "".join(
+            json.dumps({**r, "fecha": r["fecha"].isoformat()}, ensure_ascii=False) + "\n"
+            for r in registros
+        )
+        with self._lock_pendientes, open(self.pendientes, "a", encoding="utf-8") as archivo:
+            archivo.write(lineas)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+    def _reprocesar_pendientes(self) -> None:
+        """
+        Inserta lo que quedó en el archivo de pendientes. El archivo se
+        renombra antes de leerlo, así lo que falle ahora se guarda en uno
+        nuevo; si el proceso muere a mitad, el renombrado se retoma en el
+        próximo arranque (puede repetir registros, no perderlos).
+        """
+
+        if self.pendientes is None:
+            return
+        en_proceso = self.pendientes.with_name(self.pendientes.name + ".reproceso")
+        if not en_proceso.exists():
+            with self._lock_pendientes:
+                if not self.pendientes.exists():
+                    return
+                self.pendientes.replace(en_proceso)
+
+        with open(en_proceso, encoding="utf-8") as archivo:
+            registros = [json.loads(linea) for linea in archivo if linea.strip()]
+        for registro in registros:
+            registro["fecha"] = datetime.fromisoformat(registro["fecha"])
+        for i in range(0, len(registros), self.lote):
+            self._escribir(registros[i:i + self.lote])
+        en_proceso.unlink()
+        logger.info("Reinsertados %d registros de auditoría pendientes", len(registros))
+
+
+def _archivo_pendientes(engine: Engine) -> Path | None:
+    """`<base>.auditoria-pendiente.jsonl` junto a la base SQLite; None en memoria."""
+
+    base = engine.url.database
+    if not base or base == ":memory:" or base.startswith("file:"):
+        return None
+    return Path(base).with_name(Path(base).name + ".auditoria-pendiente.jsonl")
+
+
+# ---------------------------------------------------------
+# CAPTURA DE CAMBIOS EN LA SESIÓN
+# ---------------------------------------------------------
+def _capturar_cambios(session: Session, flush_context, instances) -> None:
+    """
+    Guarda en session.info los cambios de columnas de los objetos
+    modificados. Si el valor anterior no estaba cargado (objeto expirado)
+    se lee con una sola consulta por tabla.
+    """
+
+    ahora = datetime.utcnow()
+    usuario = session.info.get("usuario")
+    cambios = []
+    faltantes: dict = {}
+
+    for objeto in session.dirty:
+        estado = inspect(objeto)
+        mapper = estado.mapper
+        tabla = mapper.local_table
+        if tabla.name in _TABLAS_EXCLUIDAS or estado.identity is None:
+            continue
+
+        for atributo in mapper.column_attrs:
+            if atributo.key in CAMPOS_EXCLUIDOS:
+                continue
+            historia = estado.attrs[atributo.key].history
+            if not historia.added:
+                continue
+
+            registro_id = estado.identity[0]
+            if historia.deleted:
+                anterior = historia.deleted[0]
+            elif historia.unchanged:
+                continue
+            else:
+                anterior = None
+                faltantes.setdefault(tabla, {}).setdefault(registro_id, set()).add(atributo.key)
+
+            cambios.append((tabla, registro_id, atributo.key, anterior, historia.added[0]))
+
+    anteriores = {}
+    for tabla, registros in faltantes.items():
+        campos = sorted(set().union(*registros.values()))
+        filas = session.connection().execute(
+            select(tabla.c.id, *(tabla.c[campo] for campo in campos))
+            .where(tabla.c.id.in_(list(registros)))
+        )
+        for fila in filas:
+            for campo in campos:
+                anteriores[(tabla, fila.id, campo)] = fila._mapping[campo]
+
+    pendientes = session.info.setdefault(_CLAVE_PENDIENTES, [])
+    for tabla, registro_id, campo, anterior, nuevo in cambios:
+        anterior = anteriores.get((tabla, registro_id, campo), anterior)
+        if anterior == nuevo:
+            continue
+        pendientes.append({
+            "tabla": tabla.name,
+            "registro_id": registro_id,
+            "campo": campo,
+            "valor_anterior": _como_texto(anterior),
+            "valor_nuevo": _como_texto(nuevo),
+            "usuario": usuario,
+            "fecha": ahora,
+        })
+
+
+def activar_auditoria(
+    session_factory: sessionmaker,
+    engine: Engine,
+    **opciones
+) -> EscritorAuditoria:
+    """
+    Registra la captura de cambios en las sesiones creadas por
+    `session_factory` y arranca el escritor en segundo plano.
+    Solo se auditan los cambios de transacciones confirmadas.
+    """
+
+    escritor = EscritorAuditoria(engine, **opciones)
+
+    def _al_confirmar(session: Session) -> None:
+        pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+        if pendientes:
+            escritor.encolar(pendientes)
+
+    def _al_deshacer(session: Session) -> None:
+        session.info.pop(_CLAVE_PENDIENTES, None)
+
+    event.listen(session_factory, "before_flush", _capturar_cambios)
+    event.listen(session_factory, "after_commit", _al_confirmar)
+    event.listen(session_factory, "after_rollback", _al_deshacer)
+
+    atexit.register(escritor.detener)
+    return escritor
+
+
+def auditoria_desactivada() -> bool:
+    """True si VETE_SIN_AUDITORIA pide no auditar (tests, cargas masivas)."""
+    return os.environ.get(VARIABLE_ENTORNO, "").lower() in ("1", "true", "si", "sí")
+
+
+# ---------------------------------------------------------
+# CONSULTA DEL HISTORIAL
+# ---------------------------------------------------------
+def historial_entidad(
+    db: Session,
+    modelo: type[Base] | str,
+    registro_id: int,
+    *,
+    campo: str | None = None
+) -> list[RegistroAuditoria]:
+    """
+    Devuelve el historial de cambios de un registro (opcionalmente de un
+    solo campo), del más antiguo al más reciente.
+    """
+
+    tabla = modelo if isinstance(modelo, str) else modelo.__tablename__
+    consulta = select(RegistroAuditoria).where(
+        RegistroAuditoria.tabla == tabla,
+        RegistroAuditoria.registro_id == registro_id
+    )
+    if campo is not None:
+        consulta = consulta.where(RegistroAuditoria.campo == campo)
+
+    return list(
+        db.scalars(consulta.order_by(RegistroAuditoria.fecha, RegistroAuditoria.id))
+    )
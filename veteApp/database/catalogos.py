@@ -0,0 +1,176 @@
+# database/catalogos.py
+#
+# Resolución texto <-> id de los catálogos (especies, razas y
+# medicamentos), con un caché compartido por todo el proceso:
+#
+#     especie_id = id_de(db, Especie, "perro ")   # id de "Canino"
+#     nombre_de(db, Especie, especie_id)          # "Canino"
+#
+# - Los textos se comparan por su clave normalizada
+#   (normalizacion.clave_catalogo), así "Canino", "canino " y "Perro"
+#   son la misma especie.
+# - Un valor nuevo se agrega al catálogo dentro de la transacción de la
+#   sesión, con INSERT ... ON CONFLICT DO NOTHING: dos procesos que lo
+#   agregan a la vez terminan con el mismo id.
+# - Lo que agrega una sesión pasa al caché del proceso recién cuando la
+#   sesión confirma, y se descarta si revierte: el caché nunca tiene ids
+#   que no estén en la base.
+# - Las filas de los catálogos no se borran ni cambian de clave, así que
+#   lo cacheado no vence.
+# - El caché es por engine: cada sucursal (ver sucursales.py) tiene sus
+#   propios ids.
+
+import weakref
+
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from database.models import Especie, Medicamento, Raza
+from database.normalizacion import SINONIMOS_ESPECIE, clave_catalogo, nombre_catalogo
+
+_SINONIMOS = {Especie: SINONIMOS_ESPECIE}
+
+_PENDIENTES = "catalogos_pendientes"  # clave en Session.info
+
+
+# ---------------------------------------------------------
+# CACHÉ DEL PROCESO
+# ---------------------------------------------------------
+class _Cache:
+    """Mapeos confirmados clave -> id e id -> nombre de una base."""
+
+    def __init__(self):
+        self.ids: dict[tuple[type, str], int] = {}
+        self.nombres: dict[tuple[type, int], str] = {}
+
+    def guardar(self, modelo: type, clave: str, catalogo_id: int, nombre: str) -> None:
+        self.nombres[(modelo, catalogo_id)] = nombre
+        self.ids[(modelo, clave)] = catalogo_id
+
+
+_caches: "weakref.WeakKeyDictionary[Engine, _Cache]" = weakref.WeakKeyDictionary()
+
+
+def _cache(db: Session) -> _Cache:
+    engine = db.get_bind().engine
+    cache = _caches.get(engine)
+    if cache is None:
+        cache = _caches.setdefault(engine, _Cache())
+    return cache
+
+
+def vaciar_cache() -> None:
+    """Olvida todo lo cacheado (por ejemplo, después de restaurar una base)."""
+
+    _caches.clear()
+
+
+@event.listens_for(Session, "after_commit")
+def _promover_pendientes(db: Session) -> None:
+    pendientes = db.info.pop(_PENDIENTES, None)
+    if pendientes:
+        for (modelo, clave), (cache, catalogo_id, nombre) in pendientes.items():
+            cache.guardar(modelo, clave, catalogo_id, nombre)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(db: Session) -> None:
+    db.info.pop(_PENDIENTES, None)
+
+
+# ---------------------------------------------------------
+# RESOLUCIÓN
+# ---------------------------------------------------------
+_POR_CLAVE = {
+    modelo: select(modelo.id, modelo.nombre).where(modelo.clave == bindparam("clave"))
+    for modelo in (Especie, Raza, Medicamento)
+}
+
+_TODOS = {
+    modelo: select(modelo.id, modelo.nombre, modelo.clave)
+    for modelo in (Especie, Raza, Medicamento)
+}
+
+
+def id_de(
+    db: Session,
+    modelo: type,
+    texto: str | None,
+    *,
+    crear: bool = True,
+    por_defecto: str | None = None
+) -> int | None:
+    """
+    Id del valor del catálogo que corresponde a `texto`; lo agrega si no
+    existe y `crear` es True. Los textos vacíos usan `por_defecto`, o
+    devuelven None si no se indica. También devuelve None si no existe y
+    `crear` es False. Con el caché caliente no consulta la base.
+    """
+
+    sinonimos = _SINONIMOS.get(modelo)
+    clave = clave_catalogo(texto, sinonimos)
+    if clave is None and por_defecto is not None:
+        texto = por_defecto
+        clave = clave_catalogo(texto, sinonimos)
+    if clave is None:
+        return None
+
+    cache = _cache(db)
+    catalogo_id = cache.ids.get((modelo, clave))
+    if catalogo_id is not None:
+        return catalogo_id
+
+    pendientes = db.info.get(_PENDIENTES, {})
+    if (modelo, clave) in pendientes:
+        return pendientes[(modelo, clave)][1]
+
+    fila = db.execute(_POR_CLAVE[modelo], {"clave": clave}).one_or_none()
+    if fila is not None:
+        cache.guardar(modelo, clave, fila.id, fila.nombre)
+        return fila.id
+    if not crear:
+        return None
+
+    db.execute(
+        insert(modelo)
+        .values(nombre=nombre_catalogo(texto, sinonimos), clave=clave)
+        .on_conflict_do_nothing(index_elements=["clave"])
+    )
+    fila = db.execute(_POR_CLAVE[modelo], {"clave": clave}).one()
+    db.info.setdefault(_PENDIENTES, {})[(modelo, clave)] = (cache, fila.id, fila.nombre)
+    return fila.id
+
+
+def nombre_de(db: Session | None, modelo: type, catalogo_id: int) -> str:
+    """
+    Nombre del valor del catálogo con ese id. Ante un id desconocido
+    carga el catálogo completo (son tablas chicas). Sin sesión (objeto
+    desasociado) lanza LookupError: los ids son de cada base y no se
+    sabe de cuál es.
+    """
+
+    if db is None:
+        raise LookupError(
+            f"{modelo.__tablename__} {catalogo_id}: el objeto no tiene sesión"
+        )
+
+    cache = _cache(db)
+    nombre = cache.nombres.get((modelo, catalogo_id))
+    if nombre is not None:
+        return nombre
+
+    pendientes = db.info.get(_PENDIENTES, {})
+    for (modelo_pendiente, _), (_, pendiente_id, nombre) in pendientes.items():
+        if modelo_pendiente is modelo and pendiente_id == catalogo_id:
+            return nombre
+
+    for fila in db.execute(_TODOS[modelo]):
+        if (modelo, fila.clave) not in pendientes:
+            cache.guardar(modelo, fila.clave, fila.id, fila.nombre)
+
+    nombre = cache.nombres.get((modelo, catalogo_id))
+    if nombre is None:
+        raise LookupError(f"No existe {modelo.__tablename__} con id {catalogo_id}")
+    return nombre
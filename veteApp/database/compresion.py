@@ -0,0 +1,215 @@
+# database/compresion.py
+#
+# Diccionarios de compresión de los textos clínicos (TextoComprimido,
+# ver database/tipos.py): entrenamiento sobre los textos de la base,
+# recompresión por lotes de las filas existentes y estadísticas.
+#
+# Uso (desde veteApp/):
+#     python -m database.compresion entrenar [--muestras 20000]
+#     python -m database.compresion recomprimir [--lote 500]
+#     python -m database.compresion estadisticas
+
+import argparse
+import time
+
+from sqlalchemy import Table, bindparam, cast, func, select, type_coerce, update
+from sqlalchemy.orm import Session
+from sqlalchemy.types import LargeBinary, NullType
+
+from database.models import Consulta, DiccionarioCompresion, Tratamiento
+from database.tipos import (
+    MINIMO_COMPRIMIR,
+    descomprimir_valor,
+    recargar_diccionarios,
+    version_actual,
+    version_de,
+    zstandard
+)
+
+# Columnas comprimidas: tabla -> columnas.
+COLUMNAS = {
+    Consulta.__table__: ("diagnostico", "observaciones"),
+    Tratamiento.__table__: ("observaciones",),
+}
+
+TAMANO_DICCIONARIO = 112 * 1024  # bytes; el tamaño recomendado por zstd
+MUESTRAS = 20_000
+LOTE = 500
+PAUSA_ENTRE_LOTES = 0.05
+
+
+def _requerir_zstandard() -> None:
+    if zstandard is None:
+        raise RuntimeError("La compresión de textos requiere el paquete `zstandard`.")
+
+
+# ---------------------------------------------------------
+# ENTRENAMIENTO
+# ---------------------------------------------------------
+def entrenar_diccionario(
+    db: Session,
+    *,
+    tamano: int = TAMANO_DICCIONARIO,
+    muestras: int = MUESTRAS
+) -> DiccionarioCompresion:
+    """
+    Entrena un diccionario nuevo con una muestra de los textos clínicos
+    y lo agrega como la versión más reciente. Después del commit hay
+    que llamar a recargar_diccionarios(engine) para que se use al escribir.
+    """
+
+    _requerir_zstandard()
+
+    por_columna = max(1, muestras // sum(len(c) for c in COLUMNAS.values()))
+    textos = []
+    for tabla, columnas in COLUMNAS.items():
+        for nombre in columnas:
+            columna = tabla.c[nombre]
+            textos.extend(
+                db.scalars(
+                    select(columna)
+                    .where(columna.is_not(None))
+                    .order_by(func.random())
+                    .limit(por_columna)
+                )
+            )
+
+    datos = zstandard.train_dictionary(tamano, [t.encode() for t in textos if t])
+    diccionario = DiccionarioCompresion(datos=datos.as_bytes(), muestras=len(textos))
+    db.add(diccionario)
+    db.flush()
+    return diccionario
+
+
+# ---------------------------------------------------------
+# RECOMPRESIÓN
+# ---------------------------------------------------------
+def _crudo(columna):
+    """La columna sin pasar por TextoComprimido: str o bytes tal como están."""
+    return type_coerce(columna, NullType()).label(columna.key)
+
+
+def _recomprimir_tabla(
+    db: Session,
+    tabla: Table,
+    columnas: tuple[str, ...],
+    actual: int,
+    *,
+    lote: int,
+    pausa: float
+) -> int:
+    dialecto = db.get_bind().dialect
+    sentencia = (
+        update(tabla)
+        .where(tabla.c.id == bindparam("_id"))
+        .values({nombre: bindparam(f"_{nombre}", type_=tabla.c[nombre].type) for nombre in columnas})
+    )
+
+    reescritas = 0
+    ultimo_id = 0
+    while True:
+        filas = db.execute(
+            select(tabla.c.id, *(_crudo(tabla.c[nombre]) for nombre in columnas))
+            .where(tabla.c.id > ultimo_id)
+            .order_by(tabla.c.id)
+            .limit(lote)
+        ).all()
+        if not filas:
+            return reescritas
+
+        cambios = []
+        for fila in filas:
+            valores = fila[1:]
+            # Reescribir si hay texto plano o algo comprimido con otra versión.
+            if any(
+                (isinstance(v, str) and len(v.encode()) >= MINIMO_COMPRIMIR) or (isinstance(v, bytes) and version_de(v) != actual)
+                for v in valores
+            ):
+                cambio = {"_id": fila.id}
+                for nombre, valor in zip(columnas, valores):
+                    cambio[f"_{nombre}"] = descomprimir_valor(valor, dialecto)
+                cambios.append(cambio)
+
+        if cambios:
+            db.execute(sentencia, cambios)
+        db.commit()
+        reescritas += len(cambios)
+        ultimo_id = filas[-1].id
+        time.sleep(pausa)
+
+
+def recomprimir(
+    db: Session,
+    *,
+    lote: int = LOTE,
+    pausa: float = PAUSA_ENTRE_LOTES
+) -> dict[str, int]:
+    """
+    Reescribe con el diccionario actual las filas guardadas como texto
+    plano o con un diccionario anterior, en lotes confirmados.
+    Se puede interrumpir y volver a correr: lo ya reescrito se saltea.
+    Devuelve filas reescritas por tabla.
+    """
+
+    _requerir_zstandard()
+    actual = version_actual(db.get_bind())
+    if actual is None:
+        raise RuntimeError("La compresión no está activada para esta base (activar_compresion).")
+
+    return {
+        tabla.name: _recomprimir_tabla(db, tabla, columnas, actual, lote=lote, pausa=pausa)
+        for tabla, columnas in COLUMNAS.items()
+    }
+
+
+# ---------------------------------------------------------
+# ESTADÍSTICAS
+# ---------------------------------------------------------
+def estadisticas_compresion(db: Session) -> list[tuple[str, int, int, int]]:
+    """(tabla.columna, filas con texto, filas comprimidas, bytes guardados) por columna."""
+
+    resultado = []
+    for tabla, columnas in COLUMNAS.items():
+        for nombre in columnas:
+            crudo = tabla.c[nombre]
+            filas, comprimidas, bytes_ = db.execute(
+                select(
+                    func.count(crudo),
+                    func.count().filter(func.typeof(crudo) == "blob"),
+                    func.coalesce(func.sum(func.length(cast(crudo, LargeBinary))), 0)
+                )
+            ).one()
+            resultado.append((f"{tabla.name}.{nombre}", filas, comprimidas, bytes_))
+    return resultado
+
+
+def main() -> None:
+    from database.init_db import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Compresión de textos clínicos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    entrenar = sub.add_parser("entrenar", help="entrenar un diccionario nuevo")
+    entrenar.add_argument("--muestras", type=int, default=MUESTRAS)
+    recompresion = sub.add_parser("recomprimir", help="reescribir filas con el diccionario actual")
+    recompresion.add_argument("--lote", type=int, default=LOTE)
+    sub.add_parser("estadisticas", help="tamaño guardado por columna")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.comando == "entrenar":
+            diccionario = entrenar_diccionario(db, muestras=args.muestras)
+            db.commit()
+            recargar_diccionarios(engine)
+            print(f"Diccionario versión {diccionario.id}: {len(diccionario.datos)} bytes, "
+                  f"{diccionario.muestras} muestras.")
+        elif args.comando == "recomprimir":
+            for tabla, filas in recomprimir(db, lote=args.lote).items():
+                print(f"{tabla:<16}{filas:>10} filas reescritas")
+        else:
+            print(f"{'columna':<28}{'filas':>10}{'comprimidas':>13}{'bytes':>14}")
+            for columna, filas, comprimidas, bytes_ in estadisticas_compresion(db):
+                print(f"{columna:<28}{filas:>10}{comprimidas:>13}{bytes_:>14}")
+
+
+if __name__ == "__main__":
+    main()
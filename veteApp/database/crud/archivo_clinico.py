@@ -1,5 +1,8 @@
 # database/crud/archivo_clinico.py
 
+from datetime import datetime
+
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from database.models import ArchivoClinico
 
@@ -34,6 +37,15 @@ def crear_archivo_clinico(
 # ---------------------------------------------------------
 # OBTENER ARCHIVO POR ID
 # ---------------------------------------------------------
+_ARCHIVO_POR_ID = (
+    select(ArchivoClinico)
+    .where(
+        ArchivoClinico.id == bindparam("archivo_id"),
+        ArchivoClinico.activo.is_(True)
+    )
+)
+
+
 def obtener_archivo_por_id(
     db: Session,
     archivo_id: int
@@ -42,19 +54,22 @@ def obtener_archivo_por_id(
     Devuelve un archivo clínico activo por ID o None si no existe.
     """
 
-    return (
-        db.query(ArchivoClinico)
-        .filter(
-            ArchivoClinico.id == archivo_id,
-            ArchivoClinico.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_ARCHIVO_POR_ID, {"archivo_id": archivo_id}).one_or_none()
 
 
 # ---------------------------------------------------------
 # LISTAR ARCHIVOS DE UNA CONSULTA
 # ---------------------------------------------------------
+_ARCHIVOS_POR_CONSULTA = (
+    select(ArchivoClinico)
+    .where(
+        ArchivoClinico.consulta_id == bindparam("consulta_id"),
+        ArchivoClinico.activo.is_(True)
+    )
+    .order_by(ArchivoClinico.fecha_subida)
+)
+
+
 def listar_archivos_por_consulta(
     db: Session,
     consulta_id: int
@@ -63,15 +78,7 @@ def listar_archivos_por_consulta(
     Devuelve todos los archivos activos de una consulta.
     """
 
-    return (
-        db.query(ArchivoClinico)
-        .filter(
-            ArchivoClinico.consulta_id == consulta_id,
-            ArchivoClinico.activo.is_(True)
-        )
-        .order_by(ArchivoClinico.fecha_subida)
-        .all()
-    )
+    return db.scalars(_ARCHIVOS_POR_CONSULTA, {"consulta_id": consulta_id}).all()
 
 
 # ---------------------------------------------------------
@@ -86,3 +93,4 @@ def desactivar_archivo_clinico(
     """
 
     archivo.activo = False
+    archivo.fecha_baja = datetime.utcnow()
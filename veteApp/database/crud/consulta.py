@@ -1,5 +1,8 @@
 # database/crud/consulta.py
 
+from datetime import datetime
+
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from database.models import Consulta
 
@@ -36,6 +39,15 @@ def crear_consulta(
 # ---------------------------------------------------------
 # OBTENER CONSULTA POR ID
 # ---------------------------------------------------------
+_CONSULTA_POR_ID = (
+    select(Consulta)
+    .where(
+        Consulta.id == bindparam("consulta_id"),
+        Consulta.activo.is_(True)
+    )
+)
+
+
 def obtener_consulta_por_id(
     db: Session,
     consulta_id: int
@@ -44,19 +56,22 @@ def obtener_consulta_por_id(
     Devuelve una consulta activa por ID o None si no existe.
     """
 
-    return (
-        db.query(Consulta)
-        .filter(
-            Consulta.id == consulta_id,
-            Consulta.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_CONSULTA_POR_ID, {"consulta_id": consulta_id}).one_or_none()
 
 
 # ---------------------------------------------------------
 # LISTAR CONSULTAS DE UN PACIENTE
 # ---------------------------------------------------------
+_CONSULTAS_POR_PACIENTE = (
+    select(Consulta)
+    .where(
+        Consulta.paciente_id == bindparam("paciente_id"),
+        Consulta.activo.is_(True)
+    )
+    .order_by(Consulta.fecha)
+)
+
+
 def listar_consultas_por_paciente(
     db: Session,
     paciente_id: int
@@ -66,15 +81,7 @@ def listar_consultas_por_paciente(
     ordenadas por fecha.
     """
 
-    return (
-        db.query(Consulta)
-        .filter(
-            Consulta.paciente_id == paciente_id,
-            Consulta.activo.is_(True)
-        )
-        .order_by(Consulta.fecha)
-        .all()
-    )
+    return db.scalars(_CONSULTAS_POR_PACIENTE, {"paciente_id": paciente_id}).all()
 
 
 # ---------------------------------------------------------
@@ -114,3 +121,4 @@ def desactivar_consulta(
     """
 
     consulta.activo = False
+    consulta.fecha_baja = datetime.utcnow()
@@ -0,0 +1,217 @@
+# database/crud/dosis.py
+
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from database.models import Consulta, DosisProgramada, Tratamiento
+from database.posologia import parsear_duracion, parsear_frecuencia
+
+# Hora de la primera dosis del día de inicio del tratamiento.
+HORA_PRIMERA_DOSIS = time(8, 0)
+
+# Los tratamientos sin fin se materializan solo hasta este horizonte;
+# extender_dosis los completa periódicamente.
+HORIZONTE_DOSIS = timedelta(days=14)
+
+
+class DosisPendiente(NamedTuple):
+    fecha_hora: datetime
+    tratamiento_id: int
+    nombre: str
+    dosis: str
+    paciente_id: int
+
+
+# ---------------------------------------------------------
+# CÁLCULO DEL CRONOGRAMA
+# ---------------------------------------------------------
+def _fin_tratamiento(tratamiento: Tratamiento) -> datetime | None:
+    """Último instante del tratamiento según fecha_fin y duracion_dias."""
+
+    limites = []
+    if tratamiento.fecha_fin is not None:
+        limites.append(datetime.combine(tratamiento.fecha_fin + timedelta(days=1), time.min))
+    if tratamiento.duracion_dias:
+        inicio = datetime.combine(tratamiento.fecha_inicio or date.today(), HORA_PRIMERA_DOSIS)
+        limites.append(inicio + timedelta(days=tratamiento.duracion_dias))
+    return min(limites) if limites else None
+
+
+def _cronograma(
+    tratamiento: Tratamiento,
+    *,
+    desde: datetime,
+    hasta: datetime
+) -> list[datetime]:
+    """Horarios de dosis del tratamiento en [desde, hasta)."""
+
+    if not tratamiento.intervalo_horas:
+        return []
+
+    intervalo = timedelta(hours=tratamiento.intervalo_horas)
+    primera = datetime.combine(tratamiento.fecha_inicio or date.today(), HORA_PRIMERA_DOSIS)
+    fin = _fin_tratamiento(tratamiento)
+    if fin is not None:
+        hasta = min(hasta, fin)
+
+    if desde > primera:
+        saltos = -((primera - desde) // intervalo)  # redondeo hacia arriba
+        t = primera + saltos * intervalo
+    else:
+        t = primera
+
+    horarios = []
+    while t < hasta:
+        horarios.append(t)
+        t += intervalo
+    return horarios
+
+
+def interpretar_posologia(tratamiento: Tratamiento) -> None:
+    """Actualiza intervalo_horas y duracion_dias a partir del texto libre."""
+
+    tratamiento.intervalo_horas = parsear_frecuencia(tratamiento.frecuencia)
+    tratamiento.duracion_dias = parsear_duracion(tratamiento.duracion)
+
+
+# ---------------------------------------------------------
+# PROGRAMAR DOSIS
+# ---------------------------------------------------------
+def programar_dosis(
+    db: Session,
+    tratamiento: Tratamiento,
+    *,
+    ahora: datetime | None = None
+) -> None:
+    """
+    Reemplaza las dosis futuras del tratamiento por las que surgen de su
+    cronograma actual, hasta el fin del tratamiento o el horizonte.
+    """
+
+    ahora = ahora or datetime.now()
+    horarios = _cronograma(tratamiento, desde=ahora, hasta=ahora + HORIZONTE_DOSIS)
+
+    if tratamiento.id is None:
+        # Tratamiento nuevo: todavía no tiene filas en la base.
+        tratamiento.dosis_programadas = [
+            DosisProgramada(fecha_hora=horario) for horario in horarios
+        ]
+        return
+
+    recortar_dosis(db, tratamiento, desde=ahora)
+    db.add_all(
+        DosisProgramada(tratamiento_id=tratamiento.id, fecha_hora=horario)
+        for horario in horarios
+    )
+
+
+def recortar_dosis(
+    db: Session,
+    tratamiento: Tratamiento,
+    *,
+    desde: datetime
+) -> None:
+    """Borra las dosis programadas del tratamiento a partir de `desde`."""
+
+    if tratamiento.id is None:
+        tratamiento.dosis_programadas = [
+            dosis for dosis in tratamiento.dosis_programadas if dosis.fecha_hora < desde
+        ]
+        return
+
+    # "fetch" saca de la sesión las dosis borradas: SQLite reusa sus ids
+    # y las nuevas chocarían en el identity map. La colección del
+    # tratamiento se vuelve a leer la próxima vez que se use.
+    db.execute(
+        delete(DosisProgramada)
+        .where(
+            DosisProgramada.tratamiento_id == tratamiento.id,
+            DosisProgramada.fecha_hora >= desde
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+    db.expire(tratamiento, ["dosis_programadas"])
+
+
+# ---------------------------------------------------------
+# EXTENDER DOSIS DE TRATAMIENTOS SIN FIN
+# ---------------------------------------------------------
+def extender_dosis(
+    db: Session,
+    *,
+    ahora: datetime | None = None
+) -> int:
+    """
+    Completa las dosis de los tratamientos activos hasta ahora + horizonte.
+    Pensado para ejecutarse periódicamente (por ejemplo, una vez por día).
+    Devuelve la cantidad de dosis agregadas.
+    """
+
+    ahora = ahora or datetime.now()
+    hasta = ahora + HORIZONTE_DOSIS
+
+    ultima = (
+        select(
+            DosisProgramada.tratamiento_id,
+            func.max(DosisProgramada.fecha_hora).label("ultima")
+        )
+        .group_by(DosisProgramada.tratamiento_id)
+        .subquery()
+    )
+    filas = db.execute(
+        select(Tratamiento, ultima.c.ultima)
+        .outerjoin(ultima, ultima.c.tratamiento_id == Tratamiento.id)
+        .where(
+            Tratamiento.activo.is_(True),
+            Tratamiento.intervalo_horas.is_not(None)
+        )
+    )
+
+    agregadas = 0
+    for tratamiento, ultima_dosis in filas:
+        desde = ahora if ultima_dosis is None else max(
+            ahora, ultima_dosis + timedelta(seconds=1)
+        )
+        horarios = _cronograma(tratamiento, desde=desde, hasta=hasta)
+        db.add_all(
+            DosisProgramada(tratamiento_id=tratamiento.id, fecha_hora=horario)
+            for horario in horarios
+        )
+        agregadas += len(horarios)
+    return agregadas
+
+
+# ---------------------------------------------------------
+# DOSIS PENDIENTES EN UN RANGO
+# ---------------------------------------------------------
+def dosis_pendientes(
+    db: Session,
+    desde: datetime,
+    hasta: datetime
+) -> list[DosisPendiente]:
+    """
+    Devuelve las dosis programadas entre desde y hasta, ordenadas por
+    horario. Es un rango sobre el índice de dosis_programadas.fecha_hora.
+    """
+
+    filas = db.execute(
+        select(
+            DosisProgramada.fecha_hora,
+            Tratamiento.id,
+            Tratamiento.nombre,
+            Tratamiento.dosis,
+            Consulta.paciente_id
+        )
+        .join(Tratamiento, Tratamiento.id == DosisProgramada.tratamiento_id)
+        .join(Consulta, Consulta.id == Tratamiento.consulta_id)
+        .where(
+            DosisProgramada.fecha_hora >= desde,
+            DosisProgramada.fecha_hora < hasta,
+            Tratamiento.activo.is_(True)
+        )
+        .order_by(DosisProgramada.fecha_hora, Tratamiento.id)
+    )
+    return [DosisPendiente._make(fila) for fila in filas]
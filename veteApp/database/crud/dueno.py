@@ -1,7 +1,28 @@
 # database/crud/dueno.py
 
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, or_, select
 from sqlalchemy.orm import Session
 from database.models import Dueno
+from database.duplicados import (
+    UMBRAL_DUPLICADO,
+    ClavesDueno,
+    calcular_claves,
+    puntaje_similitud
+)
+from exceptions.domain import DuenoDuplicado
+
+
+class DuenoOpcion(NamedTuple):
+    """
+    Fila liviana (id, dni, nombre) para selectores y listados.
+    """
+
+    id: int
+    dni: str
+    nombre: str
 
 
 # ---------------------------------------------------------
@@ -13,12 +34,29 @@ def crear_dueno(
     nombre: str,
     telefono: str | None = None,
     email: str | None = None,
-    direccion: str | None = None
+    direccion: str | None = None,
+    *,
+    verificar_duplicados: bool = False
 ) -> Dueno:
     """
     Crea un nuevo dueño.
+    Con verificar_duplicados=True lanza DuenoDuplicado si ya existe
+    un dueño activo que probablemente sea la misma persona.
     """
 
+    if verificar_duplicados:
+        similares = buscar_duenos_similares(
+            db,
+            dni=dni,
+            nombre=nombre,
+            telefono=telefono,
+            email=email
+        )
+        if similares:
+            raise DuenoDuplicado(
+                f"Posible duplicado de dueño(s) {[d.id for d in similares]}"
+            )
+
     dueno = Dueno(
         dni=dni,
         nombre=nombre,
@@ -27,14 +65,85 @@ def crear_dueno(
         direccion=direccion,
         activo=True
     )
+    _actualizar_claves(dueno)
 
     db.add(dueno)
     return dueno
 
 
+# ---------------------------------------------------------
+# CLAVES NORMALIZADAS
+# ---------------------------------------------------------
+def _actualizar_claves(dueno: Dueno) -> None:
+    """Recalcula las claves normalizadas a partir de los datos del dueño."""
+
+    claves = calcular_claves(dueno.dni, dueno.nombre, dueno.telefono, dueno.email)
+    dueno.dni_normalizado = claves.dni
+    dueno.telefono_normalizado = claves.telefono
+    dueno.email_normalizado = claves.email
+    dueno.nombre_fonetico = claves.nombre
+
+
+# ---------------------------------------------------------
+# BUSCAR POSIBLES DUPLICADOS
+# ---------------------------------------------------------
+def buscar_duenos_similares(
+    db: Session,
+    *,
+    dni: str,
+    nombre: str,
+    telefono: str | None = None,
+    email: str | None = None,
+    umbral: float = UMBRAL_DUPLICADO
+) -> list[Dueno]:
+    """
+    Devuelve los dueños activos que probablemente sean la misma persona.
+    Busca por DNI, teléfono o email normalizados (columnas indexadas)
+    y filtra los candidatos por puntaje de similitud.
+    """
+
+    claves = calcular_claves(dni, nombre, telefono, email)
+
+    condiciones = []
+    if claves.dni:
+        condiciones.append(Dueno.dni_normalizado == claves.dni)
+    if claves.telefono:
+        condiciones.append(Dueno.telefono_normalizado == claves.telefono)
+    if claves.email:
+        condiciones.append(Dueno.email_normalizado == claves.email)
+    if not condiciones:
+        return []
+
+    candidatos = db.scalars(
+        select(Dueno).where(or_(*condiciones), Dueno.activo.is_(True))
+    )
+    return [
+        candidato
+        for candidato in candidatos
+        if puntaje_similitud(
+            claves,
+            ClavesDueno(
+                candidato.dni_normalizado,
+                candidato.telefono_normalizado,
+                candidato.email_normalizado,
+                candidato.nombre_fonetico
+            )
+        ) >= umbral
+    ]
+
+
 # ---------------------------------------------------------
 # OBTENER DUEÑO POR ID
 # ---------------------------------------------------------
+_DUENO_POR_ID = (
+    select(Dueno)
+    .where(
+        Dueno.id == bindparam("dueno_id"),
+        Dueno.activo.is_(True)
+    )
+)
+
+
 def obtener_dueno_por_id(
     db: Session,
     dueno_id: int
@@ -43,19 +152,21 @@ def obtener_dueno_por_id(
     Devuelve un dueño por ID o None si no existe.
     """
 
-    return (
-        db.query(Dueno)
-        .filter(
-            Dueno.id == dueno_id,
-            Dueno.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_DUENO_POR_ID, {"dueno_id": dueno_id}).one_or_none()
 
 
 # ---------------------------------------------------------
 # OBTENER DUEÑO POR DNI
 # ---------------------------------------------------------
+_DUENO_POR_DNI = (
+    select(Dueno)
+    .where(
+        Dueno.dni == bindparam("dni"),
+        Dueno.activo.is_(True)
+    )
+)
+
+
 def obtener_dueno_por_dni(
     db: Session,
     dni: str
@@ -64,19 +175,19 @@ def obtener_dueno_por_dni(
     Devuelve un dueño activo por DNI o None si no existe.
     """
 
-    return (
-        db.query(Dueno)
-        .filter(
-            Dueno.dni == dni,
-            Dueno.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_DUENO_POR_DNI, {"dni": dni}).one_or_none()
 
 
 # ---------------------------------------------------------
 # LISTAR DUEÑOS ACTIVOS
 # ---------------------------------------------------------
+_DUENOS = (
+    select(Dueno)
+    .where(Dueno.activo.is_(True))
+    .order_by(Dueno.nombre)
+)
+
+
 def listar_duenos(
     db: Session
 ) -> list[Dueno]: # -> list[Dueno] indica el tipo de retorno esperado (Type Hint)
@@ -84,12 +195,29 @@ def listar_duenos(
     Devuelve todos los dueños activos ordenados por nombre.
     """
 
-    return (
-        db.query(Dueno)
-        .filter(Dueno.activo.is_(True))
-        .order_by(Dueno.nombre)
-        .all()
-    )
+    return db.scalars(_DUENOS).all()
+
+
+# ---------------------------------------------------------
+# LISTAR DUEÑOS ACTIVOS (PROYECCIÓN)
+# ---------------------------------------------------------
+_DUENOS_OPCIONES = (
+    select(Dueno.id, Dueno.dni, Dueno.nombre)
+    .where(Dueno.activo.is_(True))
+    .order_by(Dueno.nombre)
+)
+
+
+def listar_duenos_opciones(
+    db: Session
+) -> list[DuenoOpcion]:
+    """
+    Devuelve (id, dni, nombre) de los dueños activos ordenados por nombre.
+    No carga entidades ni pasa por el identity map.
+    """
+
+    filas = db.execute(_DUENOS_OPCIONES)
+    return [DuenoOpcion._make(fila) for fila in filas]
 
 
 # ---------------------------------------------------------
@@ -119,6 +247,7 @@ def actualizar_dueno(
     if direccion is not None:
         dueno.direccion = direccion
 
+    _actualizar_claves(dueno)
     return dueno
 
 
@@ -138,6 +267,7 @@ def actualizar_dni_dueno(
     """
 
     dueno.dni = nuevo_dni
+    _actualizar_claves(dueno)
     return dueno
 
 # ---------------------------------------------------------
@@ -152,3 +282,4 @@ def desactivar_dueno(
     """
 
     dueno.activo = False
+    dueno.fecha_baja = datetime.utcnow()
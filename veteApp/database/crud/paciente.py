@@ -1,7 +1,23 @@
 # database/crud/paciente.py
 
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
-from database.models import Paciente
+from database.catalogos import id_de
+from database.models import Especie, Paciente, Raza
+from database.normalizacion import SIN_ESPECIFICAR
+
+
+class PacienteOpcion(NamedTuple):
+    """
+    Fila liviana (id, nombre, especie) para selectores y listados.
+    """
+
+    id: int
+    nombre: str
+    especie: str
 
 # -> dato
 # indica el tipo de retorno esperado (Type Hint)
@@ -21,12 +37,14 @@ def crear_paciente(
 ) -> Paciente:
     """
     Crea una nueva mascota (paciente).
+    Especie y raza se resuelven contra sus catálogos (ver database/catalogos.py);
+    una especie vacía queda como "Sin especificar".
     """
 
     paciente = Paciente(
         nombre=nombre,
-        especie=especie,
-        raza=raza,
+        especie_id=id_de(db, Especie, especie, por_defecto=SIN_ESPECIFICAR),
+        raza_id=id_de(db, Raza, raza),
         sexo=sexo,
         fecha_nacimiento=fecha_nacimiento,
         dueno_id=dueno_id,
@@ -40,6 +58,15 @@ def crear_paciente(
 # ---------------------------------------------------------
 # OBTENER PACIENTE POR ID
 # ---------------------------------------------------------
+_PACIENTE_POR_ID = (
+    select(Paciente)
+    .where(
+        Paciente.id == bindparam("paciente_id"),
+        Paciente.activo.is_(True)
+    )
+)
+
+
 def obtener_paciente_por_id(
     db: Session,
     paciente_id: int
@@ -48,19 +75,19 @@ def obtener_paciente_por_id(
     Devuelve un paciente activo por ID o None si no existe.
     """
 
-    return (
-        db.query(Paciente)
-        .filter(
-            Paciente.id == paciente_id,
-            Paciente.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_PACIENTE_POR_ID, {"paciente_id": paciente_id}).one_or_none()
 
 
 # ---------------------------------------------------------
 # LISTAR PACIENTES ACTIVOS
 # ---------------------------------------------------------
+_PACIENTES = (
+    select(Paciente)
+    .where(Paciente.activo.is_(True))
+    .order_by(Paciente.nombre)
+)
+
+
 def listar_pacientes(
     db: Session
 ) -> list[Paciente]:
@@ -68,17 +95,22 @@ def listar_pacientes(
     Devuelve todos los pacientes activos ordenados por nombre.
     """
 
-    return (
-        db.query(Paciente)
-        .filter(Paciente.activo.is_(True))
-        .order_by(Paciente.nombre)
-        .all()
-    )
+    return db.scalars(_PACIENTES).all()
 
 
 # ---------------------------------------------------------
 # LISTAR PACIENTES POR DUEÑO
 # ---------------------------------------------------------
+_PACIENTES_POR_DUENO = (
+    select(Paciente)
+    .where(
+        Paciente.dueno_id == bindparam("dueno_id"),
+        Paciente.activo.is_(True)
+    )
+    .order_by(Paciente.nombre)
+)
+
+
 def listar_pacientes_por_dueno(
     db: Session,
     dueno_id: int
@@ -87,15 +119,89 @@ def listar_pacientes_por_dueno(
     Devuelve todos los pacientes activos de un dueño.
     """
 
-    return (
-        db.query(Paciente)
-        .filter(
-            Paciente.dueno_id == dueno_id,
+    return db.scalars(_PACIENTES_POR_DUENO, {"dueno_id": dueno_id}).all()
+
+
+# ---------------------------------------------------------
+# LISTAR PACIENTES POR DUEÑO (PROYECCIÓN)
+# ---------------------------------------------------------
+_PACIENTES_POR_DUENO_OPCIONES = (
+    select(Paciente.id, Paciente.nombre, Paciente.especie)
+    .where(
+        Paciente.dueno_id == bindparam("dueno_id"),
+        Paciente.activo.is_(True)
+    )
+    .order_by(Paciente.nombre)
+)
+
+
+def listar_pacientes_por_dueno_opciones(
+    db: Session,
+    dueno_id: int
+) -> list[PacienteOpcion]:
+    """
+    Devuelve (id, nombre, especie) de los pacientes activos de un dueño.
+    No carga entidades ni pasa por el identity map.
+    """
+
+    filas = db.execute(_PACIENTES_POR_DUENO_OPCIONES, {"dueno_id": dueno_id})
+    return [PacienteOpcion._make(fila) for fila in filas]
+
+
+# ---------------------------------------------------------
+# LISTAR PACIENTES POR ESPECIE
+# ---------------------------------------------------------
+_PACIENTES_POR_ESPECIE = (
+    select(Paciente)
+    .where(
+        Paciente.especie_id == bindparam("especie_id"),
+        Paciente.activo.is_(True)
+    )
+    .order_by(Paciente.nombre)
+)
+
+
+def listar_pacientes_por_especie(
+    db: Session,
+    especie: str
+) -> list[Paciente]:
+    """
+    Devuelve los pacientes activos de una especie ("Perro" y "canino"
+    son la misma). Busca por especie_id, con el índice.
+    """
+
+    especie_id = id_de(db, Especie, especie, crear=False)
+    if especie_id is None:
+        return []
+    return db.scalars(_PACIENTES_POR_ESPECIE, {"especie_id": especie_id}).all()
+
+
+# ---------------------------------------------------------
+# LISTAR ESPECIES REGISTRADAS
+# ---------------------------------------------------------
+_ESPECIES = (
+    select(Especie.nombre)
+    .where(
+        select(Paciente.id)
+        .where(
+            Paciente.especie_id == Especie.id,
             Paciente.activo.is_(True)
         )
-        .order_by(Paciente.nombre)
-        .all()
+        .exists()
     )
+    .order_by(Especie.nombre)
+)
+
+
+def listar_especies(
+    db: Session
+) -> list[str]:
+    """
+    Devuelve las especies distintas de los pacientes activos,
+    ordenadas alfabéticamente.
+    """
+
+    return list(db.scalars(_ESPECIES))
 
 
 # ---------------------------------------------------------
@@ -119,9 +225,9 @@ def actualizar_paciente(
     if nombre is not None:
         paciente.nombre = nombre
     if especie is not None:
-        paciente.especie = especie
+        paciente.especie_id = id_de(db, Especie, especie, por_defecto=SIN_ESPECIFICAR)
     if raza is not None:
-        paciente.raza = raza
+        paciente.raza_id = id_de(db, Raza, raza)
     if sexo is not None:
         paciente.sexo = sexo
     if fecha_nacimiento is not None:
@@ -160,3 +266,4 @@ def desactivar_paciente(
     """
 
     paciente.activo = False
+    paciente.fecha_baja = datetime.utcnow()
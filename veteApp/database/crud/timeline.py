@@ -0,0 +1,179 @@
+# database/crud/timeline.py
+
+from datetime import datetime, time
+from typing import NamedTuple
+
+from sqlalchemy import String, and_, false, literal, or_, select, type_coerce, union_all
+from sqlalchemy.orm import Session
+
+from database.models import ArchivoClinico, Consulta, Tratamiento
+
+# Tipos de evento, en el orden usado para desempatar eventos
+# con la misma fecha.
+EVENTO_CONSULTA = "consulta"
+EVENTO_TRATAMIENTO_INICIO = "tratamiento_inicio"
+EVENTO_TRATAMIENTO_FIN = "tratamiento_fin"
+EVENTO_ARCHIVO = "archivo"
+
+_TIPOS = (
+    EVENTO_CONSULTA,
+    EVENTO_TRATAMIENTO_INICIO,
+    EVENTO_TRATAMIENTO_FIN,
+    EVENTO_ARCHIVO
+)
+
+# Las columnas Date se guardan como "AAAA-MM-DD"; se completan con la
+# hora para que ordenen igual que las DateTime dentro del UNION.
+_MEDIANOCHE = " 00:00:00.000000"
+
+
+class EventoTimeline(NamedTuple):
+    """
+    Evento del historial de un paciente.
+    `id` es el ID de la consulta, tratamiento o archivo según `tipo`.
+    """
+
+    fecha: datetime
+    tipo: str
+    id: int
+    consulta_id: int
+    descripcion: str
+
+
+# ---------------------------------------------------------
+# CONDICIÓN DE PAGINADO (KEYSET)
+# ---------------------------------------------------------
+def _anteriores_al_cursor(columna, es_fecha: bool, orden: int, columna_id, cursor: EventoTimeline):
+    """
+    Filtra las filas de una rama cuya clave (fecha, tipo, id) es menor
+    que la del cursor, usando la columna nativa para aprovechar índices.
+    El `columna <= cursor` redundante deja que SQLite arranque el recorrido
+    del índice en el cursor en lugar de saltear las filas más nuevas.
+    """
+
+    orden_cursor = _TIPOS.index(cursor.tipo)
+
+    if es_fecha:
+        dia = cursor.fecha.date()
+        exacto = cursor.fecha.time() == time.min
+        menor = columna < dia if exacto else columna <= dia
+        igual = columna == dia if exacto else false()
+        tope = columna <= dia
+    else:
+        menor = columna < cursor.fecha
+        igual = columna == cursor.fecha
+        tope = columna <= cursor.fecha
+
+    if orden < orden_cursor:
+        return and_(tope, or_(menor, igual))
+    if orden == orden_cursor:
+        return and_(tope, or_(menor, and_(igual, columna_id < cursor.id)))
+    return menor
+
+
+def _rama(tipo: str, columna, es_fecha: bool, columna_id, consulta_id, descripcion,
+          condiciones: list, antes_de: EventoTimeline | None, limit: int):
+    """Arma el SELECT paginado de un tipo de evento."""
+
+    orden = _TIPOS.index(tipo)
+    fecha = type_coerce(columna, String)
+    if es_fecha:
+        fecha = fecha.concat(_MEDIANOCHE)
+
+    if antes_de is not None:
+        condiciones = [
+            *condiciones,
+            _anteriores_al_cursor(columna, es_fecha, orden, columna_id, antes_de)
+        ]
+
+    return (
+        select(
+            fecha.label("fecha"),
+            literal(orden).label("orden"),
+            columna_id.label("id"),
+            consulta_id.label("consulta_id"),
+            descripcion.label("descripcion")
+        )
+        .where(*condiciones)
+        .order_by(columna.desc(), columna_id.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+
+# ---------------------------------------------------------
+# TIMELINE DE UN PACIENTE
+# ---------------------------------------------------------
+def timeline_paciente(
+    db: Session,
+    paciente_id: int,
+    antes_de: EventoTimeline | None = None,
+    limit: int = 50
+) -> list[EventoTimeline]:
+    """
+    Devuelve el historial unificado de un paciente (consultas, inicio y
+    fin de tratamientos, archivos subidos), del más reciente al más antiguo.
+
+    Para la página siguiente se pasa como `antes_de` el último evento
+    recibido. Cada rama recorre su índice (paciente_id, fecha) desde el
+    cursor y lee como mucho `limit` filas activas; tratamientos y archivos
+    usan la copia del paciente_id de su consulta (ver models).
+    """
+
+    consulta_activa = [
+        Consulta.paciente_id == paciente_id,
+        Consulta.activo.is_(True)
+    ]
+    tratamiento_activo = [
+        Tratamiento.paciente_id == paciente_id,
+        Tratamiento.activo.is_(True),
+        Tratamiento.consulta_id == Consulta.id,
+        Consulta.activo.is_(True)
+    ]
+
+    ramas = [
+        _rama(
+            EVENTO_CONSULTA, Consulta.fecha, False, Consulta.id,
+            Consulta.id, Consulta.motivo,
+            consulta_activa, antes_de, limit
+        ),
+        _rama(
+            EVENTO_TRATAMIENTO_INICIO, Tratamiento.fecha_inicio, True, Tratamiento.id,
+            Tratamiento.consulta_id, Tratamiento.nombre,
+            tratamiento_activo, antes_de, limit
+        ),
+        _rama(
+            EVENTO_TRATAMIENTO_FIN, Tratamiento.fecha_fin, True, Tratamiento.id,
+            Tratamiento.consulta_id, Tratamiento.nombre,
+            [*tratamiento_activo, Tratamiento.fecha_fin.is_not(None)], antes_de, limit
+        ),
+        _rama(
+            EVENTO_ARCHIVO, ArchivoClinico.fecha_subida, False, ArchivoClinico.id,
+            ArchivoClinico.consulta_id, ArchivoClinico.nombre_original,
+            [
+                ArchivoClinico.paciente_id == paciente_id,
+                ArchivoClinico.activo.is_(True),
+                ArchivoClinico.consulta_id == Consulta.id,
+                Consulta.activo.is_(True)
+            ],
+            antes_de, limit
+        ),
+    ]
+
+    eventos = union_all(*(select(rama) for rama in ramas)).subquery()
+    filas = db.execute(
+        select(eventos)
+        .order_by(eventos.c.fecha.desc(), eventos.c.orden.desc(), eventos.c.id.desc())
+        .limit(limit)
+    )
+
+    return [
+        EventoTimeline(
+            fecha=datetime.fromisoformat(fila.fecha),
+            tipo=_TIPOS[fila.orden],
+            id=fila.id,
+            consulta_id=fila.consulta_id,
+            descripcion=fila.descripcion
+        )
+        for fila in filas
+    ]
@@ -1,9 +1,13 @@
 # database/crud/tratamiento.py
 
-from datetime import date
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
-from database.models import Tratamiento
+from database.catalogos import id_de
+from database.models import Medicamento, Tratamiento
+from database.normalizacion import SIN_ESPECIFICAR
+from database.crud.dosis import interpretar_posologia, programar_dosis, recortar_dosis
 
 
 # ---------------------------------------------------------
@@ -22,11 +26,14 @@ def crear_tratamiento(
     consulta_id: int
 ) -> Tratamiento:
     """
-    Crea un nuevo tratamiento.
+    Crea un nuevo tratamiento y programa sus dosis
+    según la frecuencia y duración indicadas.
+    El nombre se resuelve contra el catálogo de medicamentos; vacío
+    queda como "Sin especificar".
     """
 
     tratamiento = Tratamiento(
-        nombre=nombre,
+        medicamento_id=id_de(db, Medicamento, nombre, por_defecto=SIN_ESPECIFICAR),
         dosis=dosis,
         frecuencia=frecuencia,
         duracion=duracion,
@@ -36,6 +43,8 @@ def crear_tratamiento(
         consulta_id=consulta_id,
         activo=True
     )
+    interpretar_posologia(tratamiento)
+    programar_dosis(db, tratamiento)
 
     db.add(tratamiento)
     return tratamiento
@@ -44,6 +53,15 @@ def crear_tratamiento(
 # ---------------------------------------------------------
 # OBTENER TRATAMIENTO POR ID
 # ---------------------------------------------------------
+_TRATAMIENTO_POR_ID = (
+    select(Tratamiento)
+    .where(
+        Tratamiento.id == bindparam("tratamiento_id"),
+        Tratamiento.activo.is_(True)
+    )
+)
+
+
 def obtener_tratamiento_por_id(
     db: Session,
     tratamiento_id: int
@@ -52,19 +70,22 @@ def obtener_tratamiento_por_id(
     Devuelve un tratamiento activo por ID o None si no existe.
     """
 
-    return (
-        db.query(Tratamiento)
-        .filter(
-            Tratamiento.id == tratamiento_id,
-            Tratamiento.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_TRATAMIENTO_POR_ID, {"tratamiento_id": tratamiento_id}).one_or_none()
 
 
 # ---------------------------------------------------------
 # LISTAR TRATAMIENTOS POR CONSULTA
 # ---------------------------------------------------------
+_TRATAMIENTOS_POR_CONSULTA = (
+    select(Tratamiento)
+    .where(
+        Tratamiento.consulta_id == bindparam("consulta_id"),
+        Tratamiento.activo.is_(True)
+    )
+    .order_by(Tratamiento.fecha_inicio)
+)
+
+
 def listar_tratamientos_por_consulta(
     db: Session,
     consulta_id: int
@@ -73,20 +94,19 @@ def listar_tratamientos_por_consulta(
     Devuelve todos los tratamientos activos de una consulta.
     """
 
-    return (
-        db.query(Tratamiento)
-        .filter(
-            Tratamiento.consulta_id == consulta_id,
-            Tratamiento.activo.is_(True)
-        )
-        .order_by(Tratamiento.fecha_inicio)
-        .all()
-    )
+    return db.scalars(_TRATAMIENTOS_POR_CONSULTA, {"consulta_id": consulta_id}).all()
 
 
 # ---------------------------------------------------------
 # LISTAR TRATAMIENTOS ACTIVOS
 # ---------------------------------------------------------
+_TRATAMIENTOS_ACTIVOS = (
+    select(Tratamiento)
+    .where(Tratamiento.activo.is_(True))
+    .order_by(Tratamiento.fecha_inicio)
+)
+
+
 def listar_tratamientos_activos(
     db: Session
 ) -> list[Tratamiento]:
@@ -94,12 +114,7 @@ def listar_tratamientos_activos(
     Devuelve todos los tratamientos activos.
     """
 
-    return (
-        db.query(Tratamiento)
-        .filter(Tratamiento.activo.is_(True))
-        .order_by(Tratamiento.fecha_inicio)
-        .all()
-    )
+    return db.scalars(_TRATAMIENTOS_ACTIVOS).all()
 
 
 # ---------------------------------------------------------
@@ -120,10 +135,11 @@ def actualizar_tratamiento(
     """
     Actualiza los datos de un tratamiento existente.
     Recibe la entidad ya cargada.
+    Si cambia el cronograma, reprograma las dosis futuras.
     """
 
     if nombre is not None:
-        tratamiento.nombre = nombre
+        tratamiento.medicamento_id = id_de(db, Medicamento, nombre, por_defecto=SIN_ESPECIFICAR)
     if dosis is not None:
         tratamiento.dosis = dosis
     if frecuencia is not None:
@@ -137,6 +153,13 @@ def actualizar_tratamiento(
     if fecha_fin is not None:
         tratamiento.fecha_fin = fecha_fin
 
+    if any(
+        valor is not None
+        for valor in (frecuencia, duracion, fecha_inicio, fecha_fin)
+    ):
+        interpretar_posologia(tratamiento)
+        programar_dosis(db, tratamiento)
+
     return tratamiento
 
 
@@ -150,10 +173,16 @@ def finalizar_tratamiento(
     fecha_fin: date
 ) -> Tratamiento:
     """
-    Marca un tratamiento como finalizado estableciendo fecha_fin.
+    Marca un tratamiento como finalizado estableciendo fecha_fin
+    y descarta las dosis programadas posteriores.
     """
 
     tratamiento.fecha_fin = fecha_fin
+    recortar_dosis(
+        db,
+        tratamiento,
+        desde=datetime.combine(fecha_fin + timedelta(days=1), time.min)
+    )
     return tratamiento
 
 
@@ -165,7 +194,10 @@ def desactivar_tratamiento(
     tratamiento: Tratamiento
 ) -> None:
     """
-    Marca un tratamiento como inactivo (soft delete).
+    Marca un tratamiento como inactivo (soft delete)
+    y descarta sus dosis futuras.
     """
 
     tratamiento.activo = False
+    tratamiento.fecha_baja = datetime.utcnow()
+    recortar_dosis(db, tratamiento, desde=datetime.now())
@@ -0,0 +1,204 @@
+# database/crud/turno.py
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from database.agenda import DURACION_TURNO
+from database.models import Turno
+from exceptions.domain import TurnoSuperpuesto
+
+
+# ---------------------------------------------------------
+# VERIFICAR SUPERPOSICIÓN
+# ---------------------------------------------------------
+# Los turnos activos de un veterinario no se superponen (esta función lo
+# garantiza), así que sus fines quedan en el mismo orden que sus inicios:
+# el único candidato es el último que empieza antes de `fin`. Una sola
+# búsqueda en ix_turnos_veterinario_inicio, sin importar la historia.
+_ANTERIOR = (
+    select(Turno.id, Turno.fin)
+    .where(
+        Turno.veterinario_id == bindparam("veterinario_id"),
+        Turno.inicio < bindparam("fin"),
+        Turno.activo.is_(True),
+        Turno.id != bindparam("excluir")
+    )
+    .order_by(Turno.inicio.desc())
+    .limit(1)
+)
+
+
+def _tomar_lock_escritura(db: Session) -> None:
+    """
+    Envía lo pendiente de la sesión y, si la transacción todavía no
+    escribió nada, la abre con BEGIN IMMEDIATE: desde acá hasta el
+    commit ninguna otra conexión puede agregar turnos.
+    """
+
+    db.flush()
+    conexion = db.connection()
+    if not conexion.connection.dbapi_connection.in_transaction:
+        conexion.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _verificar_disponible(
+    db: Session,
+    *,
+    veterinario_id: int,
+    inicio: datetime,
+    fin: datetime,
+    excluir: int | None = None
+) -> None:
+    """
+    Lanza TurnoSuperpuesto si el veterinario ya tiene un turno en ese
+    horario. Consulta la base con el lock de escritura tomado: ve los
+    turnos de otros procesos y los pendientes de esta sesión. El índice
+    en memoria (database/agenda.py) no interviene; puede estar atrasado.
+    """
+
+    _tomar_lock_escritura(db)
+    anterior = db.execute(_ANTERIOR, {
+        "veterinario_id": veterinario_id,
+        "fin": fin,
+        "excluir": excluir or 0
+    }).one_or_none()
+    if anterior is not None and anterior.fin > inicio:
+        raise TurnoSuperpuesto(
+            f"El veterinario {veterinario_id} ya tiene un turno entre {inicio} y {fin}"
+        )
+
+
+# ---------------------------------------------------------
+# CREAR TURNO
+# ---------------------------------------------------------
+def crear_turno(
+    db: Session,
+    *,
+    veterinario_id: int,
+    paciente_id: int,
+    inicio: datetime,
+    duracion: timedelta = DURACION_TURNO,
+    motivo: str | None = None
+) -> Turno:
+    """
+    Crea un nuevo turno.
+    Lanza TurnoSuperpuesto si el horario del veterinario está ocupado.
+    """
+
+    fin = inicio + duracion
+    _verificar_disponible(
+        db,
+        veterinario_id=veterinario_id,
+        inicio=inicio,
+        fin=fin
+    )
+
+    turno = Turno(
+        veterinario_id=veterinario_id,
+        paciente_id=paciente_id,
+        inicio=inicio,
+        fin=fin,
+        motivo=motivo,
+        activo=True
+    )
+
+    db.add(turno)
+    return turno
+
+
+# ---------------------------------------------------------
+# OBTENER TURNO POR ID
+# ---------------------------------------------------------
+_TURNO_POR_ID = (
+    select(Turno)
+    .where(
+        Turno.id == bindparam("turno_id"),
+        Turno.activo.is_(True)
+    )
+)
+
+
+def obtener_turno_por_id(
+    db: Session,
+    turno_id: int
+) -> Turno | None:
+    """
+    Devuelve un turno activo por ID o None si no existe.
+    """
+
+    return db.scalars(_TURNO_POR_ID, {"turno_id": turno_id}).one_or_none()
+
+
+# ---------------------------------------------------------
+# LISTAR TURNOS DE UN VETERINARIO
+# ---------------------------------------------------------
+def listar_turnos_por_veterinario(
+    db: Session,
+    veterinario_id: int,
+    *,
+    desde: datetime,
+    hasta: datetime
+) -> list[Turno]:
+    """
+    Devuelve los turnos activos de un veterinario que empiezan
+    entre desde y hasta, ordenados por hora.
+    """
+
+    return list(
+        db.scalars(
+            select(Turno)
+            .where(
+                Turno.veterinario_id == veterinario_id,
+                Turno.inicio >= desde,
+                Turno.inicio < hasta,
+                Turno.activo.is_(True)
+            )
+            .order_by(Turno.inicio)
+        )
+    )
+
+
+# ---------------------------------------------------------
+# REPROGRAMAR TURNO
+# ---------------------------------------------------------
+def reprogramar_turno(
+    db: Session,
+    turno: Turno,
+    *,
+    inicio: datetime,
+    duracion: timedelta | None = None
+) -> Turno:
+    """
+    Mueve un turno a otro horario, conservando su duración si no se indica.
+    Lanza TurnoSuperpuesto si el nuevo horario está ocupado.
+    """
+
+    fin = inicio + (duracion or (turno.fin - turno.inicio))
+    _verificar_disponible(
+        db,
+        veterinario_id=turno.veterinario_id,
+        inicio=inicio,
+        fin=fin,
+        excluir=turno.id
+    )
+
+    turno.inicio = inicio
+    turno.fin = fin
+    return turno
+
+
+# ---------------------------------------------------------
+# SOFT DELETE DE TURNO (CANCELAR)
+# ---------------------------------------------------------
+def desactivar_turno(
+    db: Session,
+    turno: Turno
+) -> None:
+    """
+    Cancela un turno (soft delete) y libera el horario.
+    """
+
+    turno.activo = False
+    turno.fecha_baja = datetime.utcnow()
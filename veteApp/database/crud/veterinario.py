@@ -1,9 +1,22 @@
 # database/crud/veterinario.py
 
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from database.models import Veterinario
 
 
+class VeterinarioOpcion(NamedTuple):
+    """
+    Fila liviana (id, nombre) para selectores y listados.
+    """
+
+    id: int
+    nombre: str
+
+
 # ---------------------------------------------------------
 # CREAR VETERINARIO
 # ---------------------------------------------------------
@@ -31,6 +44,15 @@ def crear_veterinario(
 # ---------------------------------------------------------
 # OBTENER VETERINARIO POR ID
 # ---------------------------------------------------------
+_VETERINARIO_POR_ID = (
+    select(Veterinario)
+    .where(
+        Veterinario.id == bindparam("veterinario_id"),
+        Veterinario.activo.is_(True)
+    )
+)
+
+
 def obtener_veterinario_por_id(
     db: Session,
     veterinario_id: int
@@ -39,19 +61,21 @@ def obtener_veterinario_por_id(
     Devuelve un veterinario activo por ID o None si no existe.
     """
 
-    return (
-        db.query(Veterinario)
-        .filter(
-            Veterinario.id == veterinario_id,
-            Veterinario.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_VETERINARIO_POR_ID, {"veterinario_id": veterinario_id}).one_or_none()
 
 
 # ---------------------------------------------------------
 # OBTENER VETERINARIO POR MATRÍCULA
 # ---------------------------------------------------------
+_VETERINARIO_POR_MATRICULA = (
+    select(Veterinario)
+    .where(
+        Veterinario.matricula == bindparam("matricula"),
+        Veterinario.activo.is_(True)
+    )
+)
+
+
 def obtener_veterinario_por_matricula(
     db: Session,
     matricula: str
@@ -60,19 +84,19 @@ def obtener_veterinario_por_matricula(
     Devuelve un veterinario activo por matrícula o None si no existe.
     """
 
-    return (
-        db.query(Veterinario)
-        .filter(
-            Veterinario.matricula == matricula,
-            Veterinario.activo.is_(True)
-        )
-        .one_or_none()
-    )
+    return db.scalars(_VETERINARIO_POR_MATRICULA, {"matricula": matricula}).one_or_none()
 
 
 # ---------------------------------------------------------
 # LISTAR VETERINARIOS ACTIVOS
 # ---------------------------------------------------------
+_VETERINARIOS = (
+    select(Veterinario)
+    .where(Veterinario.activo.is_(True))
+    .order_by(Veterinario.nombre)
+)
+
+
 def listar_veterinarios(
     db: Session
 ) -> list[Veterinario]:
@@ -80,12 +104,29 @@ def listar_veterinarios(
     Devuelve todos los veterinarios activos ordenados por nombre.
     """
 
-    return (
-        db.query(Veterinario)
-        .filter(Veterinario.activo.is_(True))
-        .order_by(Veterinario.nombre)
-        .all()
-    )
+    return db.scalars(_VETERINARIOS).all()
+
+
+# ---------------------------------------------------------
+# LISTAR VETERINARIOS ACTIVOS (PROYECCIÓN)
+# ---------------------------------------------------------
+_VETERINARIOS_OPCIONES = (
+    select(Veterinario.id, Veterinario.nombre)
+    .where(Veterinario.activo.is_(True))
+    .order_by(Veterinario.nombre)
+)
+
+
+def listar_veterinarios_opciones(
+    db: Session
+) -> list[VeterinarioOpcion]:
+    """
+    Devuelve (id, nombre) de los veterinarios activos ordenados por nombre.
+    No carga entidades ni pasa por el identity map.
+    """
+
+    filas = db.execute(_VETERINARIOS_OPCIONES)
+    return [VeterinarioOpcion._make(fila) for fila in filas]
 
 
 # ---------------------------------------------------------
@@ -138,3 +179,4 @@ def desactivar_veterinario(
     """
 
     veterinario.activo = False
+    veterinario.fecha_baja = datetime.utcnow()
@@ -0,0 +1,129 @@
+# database/dataloader.py
+#
+# Cargador por request que agrupa búsquedas por ID.
+#
+# En lugar de llamar a obtener_*_por_id dentro de un loop (una consulta
+# por fila), se piden las entidades al cargador de la sesión y se
+# resuelven todas las pendientes del mismo tipo con un único IN:
+#
+#     cargas = cargador(db)
+#     promesas = [cargas.cargar(Veterinario, c.veterinario_id) for c in consultas]
+#     nombres = [p.valor.nombre for p in promesas]   # una sola consulta
+#
+# Igual que obtener_*_por_id, las entidades inactivas se devuelven como None.
+# Lo memorizado se descarta al terminar la transacción (commit, rollback
+# o close): después de confirmar, otra sesión pudo haber cambiado las filas.
+
+import asyncio
+from collections.abc import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from database.models import Base
+
+# Máximo de IDs por consulta IN.
+TAMANO_LOTE = 500
+
+_CLAVE_SESION = "dataloader"
+
+
+class Promesa:
+    """Entidad pedida al cargador; se resuelve al leer `valor` o con await."""
+
+    __slots__ = ("_cargador", "_modelo", "_id")
+
+    def __init__(self, cargador: "CargadorEntidades", modelo: type[Base], entidad_id: int):
+        self._cargador = cargador
+        self._modelo = modelo
+        self._id = entidad_id
+
+    @property
+    def valor(self):
+        return self._cargador._valor(self._modelo, self._id)
+
+    def __await__(self):
+        # Ceder una vuelta al event loop deja que otras corrutinas encolen
+        # sus pedidos antes de resolver el lote.
+        yield from asyncio.sleep(0).__await__()
+        return self.valor
+
+    def __repr__(self):
+        return f"<Promesa({self._modelo.__name__}, id={self._id})>"
+
+
+class CargadorEntidades:
+    """
+    Agrupa y memoriza las búsquedas por ID de una sesión.
+    Se obtiene con cargador(db); vive lo mismo que la transacción.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._pendientes: dict[type[Base], set[int]] = {}
+        self._cache: dict[type[Base], dict[int, Base | None]] = {}
+
+    def cargar(self, modelo: type[Base], entidad_id: int) -> Promesa:
+        """Encola la búsqueda y devuelve una promesa sin consultar la base."""
+
+        if entidad_id not in self._cache.get(modelo, ()):
+            self._pendientes.setdefault(modelo, set()).add(entidad_id)
+        return Promesa(self, modelo, entidad_id)
+
+    def cargar_muchos(self, modelo: type[Base], ids: Iterable[int]) -> list[Promesa]:
+        return [self.cargar(modelo, entidad_id) for entidad_id in ids]
+
+    def obtener(self, modelo: type[Base], entidad_id: int) -> Base | None:
+        """Equivalente a obtener_*_por_id, resolviendo junto con lo pendiente."""
+        return self.cargar(modelo, entidad_id).valor
+
+    async def obtener_async(self, modelo: type[Base], entidad_id: int) -> Base | None:
+        return await self.cargar(modelo, entidad_id)
+
+    def limpiar(self) -> None:
+        """Olvida lo memorizado (por ejemplo, después de modificar entidades)."""
+
+        self._pendientes.clear()
+        self._cache.clear()
+
+    def _valor(self, modelo: type[Base], entidad_id: int) -> Base | None:
+        cache = self._cache.setdefault(modelo, {})
+        if entidad_id not in cache:
+            self._pendientes.setdefault(modelo, set()).add(entidad_id)
+            self._resolver(modelo)
+        return cache[entidad_id]
+
+    def _resolver(self, modelo: type[Base]) -> None:
+        ids = sorted(self._pendientes.pop(modelo, ()))
+        cache = self._cache.setdefault(modelo, {})
+
+        for i in range(0, len(ids), TAMANO_LOTE):
+            lote = ids[i:i + TAMANO_LOTE]
+            encontrados = {
+                entidad.id: entidad
+                for entidad in self.db.scalars(
+                    select(modelo).where(
+                        modelo.id.in_(lote),
+                        modelo.activo.is_(True)
+                    )
+                )
+            }
+            for entidad_id in lote:
+                cache[entidad_id] = encontrados.get(entidad_id)
+
+
+def cargador(db: Session) -> CargadorEntidades:
+    """Devuelve el cargador asociado a la sesión, creándolo si hace falta."""
+
+    existente = db.info.get(_CLAVE_SESION)
+    if existente is None:
+        existente = db.info[_CLAVE_SESION] = CargadorEntidades(db)
+    return existente
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _descartar_al_terminar(session: Session, transaccion) -> None:
+    if transaccion.parent is None:
+        existente = session.info.pop(_CLAVE_SESION, None)
+        if existente is not None:
+            existente.limpiar()
@@ -0,0 +1,215 @@
+# database/duplicados.py
+#
+# Detección de dueños duplicados (por ejemplo, tras unificar sucursales).
+#
+# Uso (desde veteApp/):
+#     python -m database.duplicados [umbral]
+
+import sys
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from typing import NamedTuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from database.models import Dueno
+from database.normalizacion import (
+    clave_fonetica,
+    normalizar_dni,
+    normalizar_email,
+    normalizar_telefono
+)
+
+UMBRAL_DUPLICADO = 0.6
+
+# Bloques más grandes que esto (p. ej. un teléfono de relleno repetido)
+# no aportan información y harían crecer la comparación cuadráticamente.
+TAMANO_MAXIMO_BLOQUE = 50
+
+_PESO_DNI = 0.6
+_PESO_EMAIL = 0.3
+_PESO_TELEFONO = 0.3
+_PESO_NOMBRE = 0.4
+
+# Claves que arman bloques. El nombre solo suma como mucho _PESO_NOMBRE,
+# menos que el umbral: un par que comparte únicamente el nombre nunca
+# llega, así que no vale la pena compararlo.
+_CLAVES_BLOQUEO = ("dni", "telefono", "email")
+
+
+class ClavesDueno(NamedTuple):
+    dni: str | None
+    telefono: str | None
+    email: str | None
+    nombre: str | None
+
+
+class ClusterDuplicados(NamedTuple):
+    """
+    Grupo de dueños que probablemente son la misma persona.
+    `puntaje` es el promedio de los pares que los vinculan.
+    """
+
+    dueno_ids: tuple[int, ...]
+    puntaje: float
+    pares: tuple[tuple[int, int, float], ...]
+
+
+# ---------------------------------------------------------
+# CLAVES Y PUNTAJE
+# ---------------------------------------------------------
+def calcular_claves(
+    dni: str | None,
+    nombre: str | None,
+    telefono: str | None = None,
+    email: str | None = None
+) -> ClavesDueno:
+    """Calcula las claves normalizadas a partir de los datos crudos."""
+
+    return ClavesDueno(
+        dni=normalizar_dni(dni),
+        telefono=normalizar_telefono(telefono),
+        email=normalizar_email(email),
+        nombre=clave_fonetica(nombre)
+    )
+
+
+def puntaje_similitud(a: ClavesDueno, b: ClavesDueno) -> float:
+    """
+    Puntaje entre 0 y 1 de que dos dueños sean la misma persona.
+    Un DNI igual alcanza el umbral por sí solo; teléfono o email
+    iguales necesitan además un nombre parecido.
+    """
+
+    puntaje = 0.0
+    if a.dni and a.dni == b.dni:
+        puntaje += _PESO_DNI
+    if a.email and a.email == b.email:
+        puntaje += _PESO_EMAIL
+    if a.telefono and a.telefono == b.telefono:
+        puntaje += _PESO_TELEFONO
+    if a.nombre and b.nombre:
+        puntaje += _PESO_NOMBRE * SequenceMatcher(None, a.nombre, b.nombre).ratio()
+    return min(puntaje, 1.0)
+
+
+# ---------------------------------------------------------
+# DETECCIÓN DE DUPLICADOS
+# ---------------------------------------------------------
+def detectar_duenos_duplicados(
+    db: Session,
+    *,
+    umbral: float = UMBRAL_DUPLICADO,
+    tamano_maximo_bloque: int = TAMANO_MAXIMO_BLOQUE
+) -> list[ClusterDuplicados]:
+    """
+    Agrupa los dueños activos por DNI, teléfono y email normalizados y
+    compara solo los pares que comparten algún bloque. Los pares que superan el umbral
+    se unen en clusters, ordenados de mayor a menor puntaje.
+    """
+
+    claves: dict[int, ClavesDueno] = {}
+    bloques: dict[tuple[str, str], list[int]] = defaultdict(list)
+
+    filas = db.execute(
+        select(Dueno.id, Dueno.dni, Dueno.nombre, Dueno.telefono, Dueno.email)
+        .where(Dueno.activo.is_(True))
+    )
+    for dueno_id, dni, nombre, telefono, email in filas:
+        clave = calcular_claves(dni, nombre, telefono, email)
+        claves[dueno_id] = clave
+        for campo in _CLAVES_BLOQUEO:
+            valor = getattr(clave, campo)
+            if valor:
+                bloques[(campo, valor)].append(dueno_id)
+
+    candidatos: set[tuple[int, int]] = set()
+    for ids in bloques.values():
+        if 1 < len(ids) <= tamano_maximo_bloque:
+            candidatos.update(combinations(sorted(ids), 2))
+
+    padre: dict[int, int] = {}
+
+    def _raiz(x: int) -> int:
+        while padre.get(x, x) != x:
+            padre[x] = padre.get(padre[x], padre[x])
+            x = padre[x]
+        return x
+
+    pares = []
+    for a, b in candidatos:
+        puntaje = puntaje_similitud(claves[a], claves[b])
+        if puntaje >= umbral:
+            pares.append((a, b, round(puntaje, 3)))
+            padre[_raiz(a)] = _raiz(b)
+
+    grupos: dict[int, list[tuple[int, int, float]]] = defaultdict(list)
+    for par in pares:
+        grupos[_raiz(par[0])].append(par)
+
+    clusters = []
+    for pares_grupo in grupos.values():
+        ids = sorted({i for a, b, _ in pares_grupo for i in (a, b)})
+        puntaje = sum(p for _, _, p in pares_grupo) / len(pares_grupo)
+        clusters.append(
+            ClusterDuplicados(tuple(ids), round(puntaje, 3), tuple(sorted(pares_grupo)))
+        )
+
+    clusters.sort(key=lambda c: (-c.puntaje, c.dueno_ids))
+    return clusters
+
+
+# ---------------------------------------------------------
+# RECALCULAR CLAVES GUARDADAS
+# ---------------------------------------------------------
+def recalcular_claves_duenos(
+    db: Session,
+    *,
+    lote: int = 1000
+) -> int:
+    """
+    Recalcula las claves normalizadas guardadas de todos los dueños,
+    en lotes confirmados. Devuelve la cantidad de filas procesadas.
+    """
+
+    procesadas = 0
+    ultimo_id = 0
+    while True:
+        filas = db.execute(
+            select(Dueno.id, Dueno.dni, Dueno.nombre, Dueno.telefono, Dueno.email)
+            .where(Dueno.id > ultimo_id)
+            .order_by(Dueno.id)
+            .limit(lote)
+        ).all()
+        if not filas:
+            return procesadas
+
+        db.execute(
+            update(Dueno),
+            [
+                {
+                    "id": dueno_id,
+                    "dni_normalizado": clave.dni,
+                    "telefono_normalizado": clave.telefono,
+                    "email_normalizado": clave.email,
+                    "nombre_fonetico": clave.nombre,
+                }
+                for dueno_id, *datos in filas
+                for clave in (calcular_claves(*datos),)
+            ]
+        )
+        db.commit()
+
+        procesadas += len(filas)
+        ultimo_id = filas[-1].id
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal
+
+    umbral = float(sys.argv[1]) if len(sys.argv) > 1 else UMBRAL_DUPLICADO
+    with SessionLocal() as db:
+        for cluster in detectar_duenos_duplicados(db, umbral=umbral):
+            print(f"{cluster.puntaje:.3f}  dueños {', '.join(map(str, cluster.dueno_ids))}")
@@ -1,9 +1,16 @@
 # database/init_db.py
 
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from database.models import Base  # solo Base, limpio
 from database import models       # importa models y registra todas las tablas
+from database.auditoria import activar_auditoria, auditoria_desactivada
+from database.migraciones import Migrador
+from database.modo_estricto import activar_modo_estricto, modo_estricto_pedido
+from database.tipos import activar_compresion
 
 # ---------------------------
 # CONFIGURACIÓN DE LA BASE
@@ -11,12 +18,52 @@ from database import models       # importa models y registra todas las tablas
 
 DB_NAME = "vete.db"
 
-# Engine de SQLite
-engine = create_engine(
-    f"sqlite:///{DB_NAME}",
-    echo=False,           # Cambialo a True si querés ver el SQL en consola
-    future=True
-)
+
+def activar_claves_foraneas(engine: Engine) -> None:
+    """
+    SQLite no valida las claves foráneas salvo que cada conexión lo pida:
+    se activa apenas el pool abre una conexión nueva.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _claves_foraneas(conexion_dbapi, _registro):
+        cursor = conexion_dbapi.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.close()
+
+
+def crear_engine(ruta: str, **opciones) -> Engine:
+    """
+    Engine de SQLite sobre `ruta` configurado como el de la aplicación:
+    claves foráneas y compresión de textos clínicos (ver database/tipos.py).
+    """
+
+    engine = create_engine(f"sqlite:///{ruta}", future=True, **opciones)
+    activar_claves_foraneas(engine)
+    activar_compresion(engine)
+    return engine
+
+
+def inicializar_base(engine: Engine) -> bool:
+    """
+    Deja lista una base: auto_vacuum incremental, tablas del modelo y, si
+    era nueva, todas las migraciones registradas como aplicadas (ya tiene
+    el esquema actual). Devuelve True si la base era nueva.
+    """
+
+    # auto_vacuum solo se puede fijar antes de crear la primera tabla;
+    # en una base existente no tiene efecto (ver database/purga.py).
+    with engine.begin() as conexion:
+        conexion.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+    nueva = not inspect(engine).has_table("duenos")
+    Base.metadata.create_all(bind=engine)
+    if nueva:
+        Migrador(engine).marcar_aplicadas()
+    return nueva
+
+
+# Engine de SQLite (echo=True muestra el SQL en consola)
+engine = crear_engine(DB_NAME, echo=False)
 
 # Sesión
 SessionLocal = sessionmaker(
@@ -25,11 +72,27 @@ SessionLocal = sessionmaker(
     autocommit=False
 )
 
+# Auditoría de cambios (legalmente obligatoria): se apaga con VETE_SIN_AUDITORIA=1.
+escritor_auditoria = None if auditoria_desactivada() else activar_auditoria(SessionLocal, engine)
+
+# Modo estricto (tests y staging): cargas perezosas prohibidas.
+# VETE_MODO_ESTRICTO_PERMITIDAS lista relaciones separadas por coma.
+if modo_estricto_pedido():
+    activar_modo_estricto(
+        SessionLocal,
+        permitidas=filter(None, os.environ.get("VETE_MODO_ESTRICTO_PERMITIDAS", "").split(","))
+    )
+
 # ---------------------------
 # FUNCIÓN PARA CREAR LA BASE
 # ---------------------------
 
 def init_db():
     """Crea todas las tablas definidas en los modelos."""
-    Base.metadata.create_all(bind=engine)
+    # Una base existente se actualiza con `python -m database.migraciones`.
+    if not inicializar_base(engine) and (pendientes := Migrador(engine).pendientes()):
+        print(
+            f"Hay {len(pendientes)} migraciones pendientes: "
+            "ejecutar `python -m database.migraciones`."
+        )
     print("Base de datos inicializada correctamente.")
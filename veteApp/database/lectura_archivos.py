@@ -0,0 +1,219 @@
+# database/lectura_archivos.py
+#
+# Lectura por rangos de los archivos clínicos (radiografías, ecografías)
+# mediante memoria mapeada: el visor pide los bytes que necesita y los
+# recibe como memoryview sobre el mapeo, sin copiarlos ni cargar el
+# archivo entero. Las páginas las trae el sistema operativo a medida que
+# se leen, así que el tiempo hasta el primer byte y la memoria usada no
+# dependen del tamaño del archivo.
+#
+#     archivo = abrir_archivo(db, archivo_id)
+#     cabecera = archivo.leer(0, 4096)
+#     for bloque in archivo.bloques(inicio, fin):
+#         salida.write(bloque)
+#
+# Varios hilos pueden leer el mismo archivo a la vez; los mapeos más
+# usados se conservan en un LRU chico (cache_mapeos).
+
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from database.crud.archivo_clinico import obtener_archivo_por_id
+from exceptions.domain import ArchivoClinicoInexistente, ArchivoClinicoNoEncontrado
+
+BLOQUE = 1024 * 1024   # bytes por bloque al recorrer un rango
+MAPEOS_EN_CACHE = 8
+
+_VACIO = memoryview(b"")
+
+
+# ---------------------------------------------------------
+# CACHÉ DE MAPEOS
+# ---------------------------------------------------------
+class _Mapeo:
+    """Archivo mapeado en memoria (solo lectura)."""
+
+    def __init__(self, ruta: Path):
+        with open(ruta, "rb") as archivo:
+            estado = os.fstat(archivo.fileno())
+            self.firma = (estado.st_size, estado.st_mtime_ns)
+            self.tamano = estado.st_size
+            # mmap no admite archivos vacíos.
+            self.mapa = (
+                mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+                if self.tamano else None
+            )
+        self.vista = memoryview(self.mapa) if self.mapa is not None else _VACIO
+
+
+class CacheMapeos:
+    """
+    LRU de archivos mapeados, por ruta. Un mapeo que sale del caché no se
+    cierra a la fuerza: se libera cuando nadie sigue usando sus memoryview.
+    """
+
+    def __init__(self, maximo: int = MAPEOS_EN_CACHE):
+        self.maximo = maximo
+        self._mapeos: OrderedDict[str, _Mapeo] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, ruta: Path) -> _Mapeo:
+        clave = str(ruta)
+        estado = ruta.stat()
+        firma = (estado.st_size, estado.st_mtime_ns)
+
+        with self._lock:
+            mapeo = self._mapeos.get(clave)
+            if mapeo is not None and mapeo.firma == firma:
+                self._mapeos.move_to_end(clave)
+                return mapeo
+
+        # Se mapea fuera del lock: abrir un archivo grande no frena a los demás.
+        mapeo = _Mapeo(ruta)
+        if self.maximo <= 0:
+            return mapeo
+
+        with self._lock:
+            self._mapeos[clave] = mapeo
+            self._mapeos.move_to_end(clave)
+            while len(self._mapeos) > self.maximo:
+                self._mapeos.popitem(last=False)
+        return mapeo
+
+    def descartar(self, ruta: str | Path) -> None:
+        """Olvida el mapeo de un archivo (por ejemplo, si se reemplazó)."""
+
+        with self._lock:
+            self._mapeos.pop(str(ruta), None)
+
+    def vaciar(self) -> None:
+        with self._lock:
+            self._mapeos.clear()
+
+    def __len__(self):
+        return len(self._mapeos)
+
+
+cache_mapeos = CacheMapeos()
+
+
+# ---------------------------------------------------------
+# ARCHIVO ABIERTO
+# ---------------------------------------------------------
+class ArchivoMapeado:
+    """Acceso por rangos a un archivo clínico activo."""
+
+    def __init__(self, archivo_id: int, nombre: str, tipo: str, mapeo: _Mapeo):
+        self.archivo_id = archivo_id
+        self.nombre = nombre
+        self.tipo = tipo
+        self._mapeo = mapeo
+
+    @property
+    def tamano(self) -> int:
+        return self._mapeo.tamano
+
+    def _limites(self, inicio: int, fin: int | None) -> tuple[int, int]:
+        fin = self.tamano if fin is None else min(fin, self.tamano)
+        if inicio < 0 or inicio > fin:
+            raise ValueError(
+                f"Rango inválido {inicio}-{fin} para un archivo de {self.tamano} bytes"
+            )
+        return inicio, fin
+
+    def leer(self, inicio: int = 0, fin: int | None = None) -> memoryview:
+        """Bytes [inicio, fin) sin copiar; `fin` se recorta al tamaño."""
+
+        inicio, fin = self._limites(inicio, fin)
+        return self._mapeo.vista[inicio:fin]
+
+    def bloques(
+        self,
+        inicio: int = 0,
+        fin: int | None = None,
+        *,
+        tamano_bloque: int = BLOQUE
+    ) -> Iterator[memoryview]:
+        """
+        Recorre [inicio, fin) de a bloques. Las páginas ya entregadas se
+        devuelven al sistema, así la memoria residente no crece con el
+        tamaño del archivo.
+        """
+
+        inicio, fin = self._limites(inicio, fin)
+        mapa = self._mapeo.mapa
+        liberar = mapa is not None and hasattr(mmap, "MADV_DONTNEED")
+
+        posicion = inicio
+        while posicion < fin:
+            hasta = min(posicion + tamano_bloque, fin)
+            yield self._mapeo.vista[posicion:hasta]
+
+            if liberar:
+                # Solo páginas completas ya recorridas; las vuelve a leer
+                # del caché del sistema si otro lector las necesita.
+                desde = posicion - posicion % mmap.PAGESIZE
+                largo = hasta - hasta % mmap.PAGESIZE - desde
+                if largo > 0:
+                    mapa.madvise(mmap.MADV_DONTNEED, desde, largo)
+            posicion = hasta
+
+    def __repr__(self):
+        return f"<ArchivoMapeado(id={self.archivo_id}, nombre='{self.nombre}', tamano={self.tamano})>"
+
+
+def abrir_archivo(
+    db: Session,
+    archivo_id: int,
+    *,
+    cache: CacheMapeos = cache_mapeos
+) -> ArchivoMapeado:
+    """
+    Abre un archivo clínico activo para leerlo por rangos.
+    Lanza ArchivoClinicoNoEncontrado si no existe o está inactivo, y
+    ArchivoClinicoInexistente si el archivo no está en el disco.
+    """
+
+    archivo = obtener_archivo_por_id(db, archivo_id)
+    if archivo is None:
+        raise ArchivoClinicoNoEncontrado(f"No existe un archivo clínico activo con ID {archivo_id}")
+
+    try:
+        mapeo = cache.obtener(Path(archivo.ruta_archivo))
+    except FileNotFoundError:
+        raise ArchivoClinicoInexistente(
+            f"El archivo {archivo.ruta_archivo} (ID {archivo_id}) no existe en el disco"
+        ) from None
+
+    return ArchivoMapeado(archivo.id, archivo.nombre_original, archivo.tipo, mapeo)
+
+
+def parsear_rango(encabezado: str, tamano: int) -> tuple[int, int]:
+    """
+    Interpreta un encabezado HTTP Range de un solo rango ("bytes=0-1023",
+    "bytes=500-", "bytes=-500") y devuelve (inicio, fin) con fin exclusivo.
+    Lanza ValueError si no es satisfacible.
+    """
+
+    unidad, _, rango = encabezado.partition("=")
+    if unidad.strip() != "bytes" or "," in rango:
+        raise ValueError(f"Rango no soportado: {encabezado}")
+
+    desde, _, hasta = rango.strip().partition("-")
+    if not desde:
+        largo = int(hasta)
+        if largo <= 0:
+            raise ValueError(f"Rango no satisfacible: {encabezado}")
+        return max(0, tamano - largo), tamano
+
+    inicio = int(desde)
+    fin = min(int(hasta) + 1, tamano) if hasta else tamano
+    if inicio >= tamano or fin <= inicio:
+        raise ValueError(f"Rango no satisfacible: {encabezado}")
+    return inicio, fin
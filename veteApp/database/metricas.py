@@ -0,0 +1,60 @@
+# database/metricas.py
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CacheStats
+
+
+# ---------------------------------------------------------
+# CACHÉ DE SENTENCIAS COMPILADAS
+# ---------------------------------------------------------
+class EstadisticasCache:
+    """
+    Cuenta cuántas sentencias ejecutadas por un engine reutilizaron
+    su forma compilada del caché de SQLAlchemy.
+    """
+
+    def __init__(self):
+        self.aciertos = 0
+        self.fallos = 0
+        self.sin_cache = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return self.aciertos + self.fallos + self.sin_cache
+
+    @property
+    def tasa_aciertos(self) -> float:
+        """Fracción de ejecuciones que encontraron la sentencia compilada."""
+        return self.aciertos / self.total if self.total else 0.0
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.aciertos = self.fallos = self.sin_cache = 0
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        resultado = getattr(context, "cache_hit", None)
+        with self._lock:
+            if resultado is CacheStats.CACHE_HIT:
+                self.aciertos += 1
+            elif resultado is CacheStats.CACHE_MISS:
+                self.fallos += 1
+            else:
+                self.sin_cache += 1
+
+    def __repr__(self):
+        return (
+            f"<EstadisticasCache(aciertos={self.aciertos}, fallos={self.fallos}, "
+            f"sin_cache={self.sin_cache}, tasa={self.tasa_aciertos:.1%})>"
+        )
+
+
+def observar_cache(engine: Engine) -> EstadisticasCache:
+    """Empieza a contar aciertos y fallos del caché de sentencias del engine."""
+
+    estadisticas = EstadisticasCache()
+    event.listen(engine, "after_cursor_execute", estadisticas._registrar)
+    return estadisticas
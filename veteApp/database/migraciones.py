@@ -0,0 +1,1120 @@
+# database/migraciones.py
+#
+# Migraciones de esquema versionadas. Los rellenos corren con la
+# aplicación en uso; los índices y el final de una reconstrucción de
+# tabla frenan a los escritores mientras duran.
+#
+# - Cada migración tiene una versión y una lista de pasos; las versiones
+#   aplicadas se registran en la tabla schema_migraciones.
+# - Los rellenos (backfills) y las copias de tablas se hacen de a lotes
+#   por id, cada uno en su propia transacción corta. Junto con cada lote
+#   se guarda el punto de control, así una migración interrumpida retoma
+#   desde el último lote confirmado sin rehacer trabajo.
+# - ReconstruirTabla implementa el patrón de reconstrucción de SQLite
+#   (tabla nueva, copia, DROP, RENAME). La copia va por lotes y triggers
+#   reflejan en la tabla nueva los cambios de la aplicación, pero el
+#   reemplazo no es en línea: toma el lock de escritura mientras completa
+#   lo que falta y verifica filas y claves foráneas.
+# - Los pasos son idempotentes: repetir uno ya aplicado no cambia nada.
+# - El dry-run mide cada paso en su propia transacción diferida que se
+#   revierte: no toma el lock de escritura salvo mientras mide un paso.
+#
+# Una base nueva creada por init_db() ya tiene el esquema actual, así
+# que sus migraciones se marcan como aplicadas sin ejecutarse.
+#
+# Uso (desde veteApp/):
+#     python -m database.migraciones             # aplica las pendientes
+#     python -m database.migraciones --dry-run   # lista y estima duración
+#     python -m database.migraciones --estado
+
+import argparse
+import sqlite3
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy.engine import Engine
+
+from database.duplicados import calcular_claves
+from database.models import sql_triggers_paciente, sql_triggers_version
+from database.normalizacion import (
+    SIN_ESPECIFICAR,
+    SINONIMOS_ESPECIE,
+    clave_catalogo,
+    nombre_catalogo
+)
+from database.posologia import parsear_duracion, parsear_frecuencia
+
+LOTE = 2000
+PAUSA_ENTRE_LOTES = 0.05  # segundos, para dejar pasar a la aplicación
+FILAS_MUESTRA = 2000      # filas medidas por paso en el dry-run
+
+TABLA_VERSIONES = "schema_migraciones"
+
+
+@contextmanager
+def _transaccion(con: sqlite3.Connection) -> Iterator[None]:
+    """Transacción explícita; toma el lock de escritura al empezar."""
+
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    con.execute("COMMIT")
+
+
+def _columnas(con: sqlite3.Connection, tabla: str) -> set[str]:
+    return {fila[1] for fila in con.execute(f"PRAGMA table_info({tabla})")}
+
+
+def _existe_tabla(con: sqlite3.Connection, tabla: str) -> bool:
+    return con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+    ).fetchone() is not None
+
+
+def _contar(con: sqlite3.Connection, tabla: str) -> int:
+    if not _existe_tabla(con, tabla):
+        return 0
+    return con.execute(f"SELECT count(*) FROM {tabla}").fetchone()[0]
+
+
+def _ahora() -> str:
+    return datetime.utcnow().isoformat(" ")
+
+
+# ---------------------------------------------------------
+# EJECUCIÓN DE UN PASO
+# ---------------------------------------------------------
+class _Ejecucion:
+    """Estado de la migración en curso que ven los pasos."""
+
+    def __init__(
+        self,
+        con: sqlite3.Connection,
+        version: int,
+        paso: int,
+        punto_control: int | None,
+        *,
+        lote: int,
+        pausa: float,
+        progreso: Callable[[str], None]
+    ):
+        self.con = con
+        self.version = version
+        self.paso = paso
+        self.punto_control = punto_control
+        self.lote = lote
+        self.pausa = pausa
+        self.progreso = progreso
+        self.paso_terminado = False
+
+    def transaccion(self):
+        return _transaccion(self.con)
+
+    def guardar_punto(self, punto: int) -> None:
+        """Registra el avance; llamar dentro de la transacción del lote."""
+
+        self.con.execute(
+            f"UPDATE {TABLA_VERSIONES} SET punto_control = ? WHERE version = ?",
+            (punto, self.version)
+        )
+        self.punto_control = punto
+
+    def terminar_paso(self) -> None:
+        """Marca el paso como hecho; llamar dentro de su última transacción."""
+
+        self.con.execute(
+            f"UPDATE {TABLA_VERSIONES} SET paso = ?, punto_control = NULL WHERE version = ?",
+            (self.paso + 1, self.version)
+        )
+        self.paso_terminado = True
+
+    def por_lotes(self, tabla: str, procesar: Callable[[int, int], None]) -> None:
+        """
+        Llama a procesar(desde, hasta) por rangos de id (desde, hasta] de
+        `lote` filas, cada uno en su transacción, retomando desde el
+        punto de control.
+        """
+
+        desde = self.punto_control or 0
+        total = _contar(self.con, tabla)
+        hechas = self.con.execute(
+            f"SELECT count(*) FROM {tabla} WHERE id <= ?", (desde,)
+        ).fetchone()[0]
+
+        while True:
+            fila = self.con.execute(
+                f"SELECT id FROM {tabla} WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+                (desde, self.lote - 1)
+            ).fetchone()
+            ultimo = fila is None
+            if ultimo:
+                hasta = self.con.execute(
+                    f"SELECT max(id) FROM {tabla} WHERE id > ?", (desde,)
+                ).fetchone()[0]
+                if hasta is None:
+                    return
+            else:
+                hasta = fila[0]
+
+            with self.transaccion():
+                procesar(desde, hasta)
+                self.guardar_punto(hasta)
+
+            hechas += self.lote if not ultimo else total - hechas
+            self.progreso(f"    {tabla}: {min(hechas, total)}/{total} filas")
+            desde = hasta
+            if ultimo:
+                return
+            time.sleep(self.pausa)
+
+
+# ---------------------------------------------------------
+# PASOS
+# ---------------------------------------------------------
+class Paso:
+    """Un paso de una migración. Debe poder repetirse sin efecto."""
+
+    descripcion = ""
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        raise NotImplementedError
+
+    def ensayar(self, con: sqlite3.Connection) -> None:
+        """
+        Aplica el paso en la transacción de estimación de los pasos que
+        le siguen, si es barato (solo esquema), para que puedan medirse.
+        """
+
+    def estimar(self, con: sqlite3.Connection) -> tuple[int, float]:
+        """
+        (filas, segundos) estimados. Se llama en una transacción que
+        después se revierte, con los pasos anteriores ya ensayados.
+        """
+        return 0, 0.0
+
+    def __repr__(self):
+        return f"<{type(self).__name__}: {self.descripcion}>"
+
+
+class AgregarColumna(Paso):
+    """ALTER TABLE ADD COLUMN: solo cambia el esquema, no reescribe filas."""
+
+    def __init__(self, tabla: str, columna: str, tipo: str):
+        self.tabla = tabla
+        self.columna = columna
+        self.tipo = tipo
+        self.descripcion = f"agregar {tabla}.{columna} {tipo}"
+
+    def _ejecutar(self, con: sqlite3.Connection) -> None:
+        if self.columna not in _columnas(con, self.tabla):
+            con.execute(f"ALTER TABLE {self.tabla} ADD COLUMN {self.columna} {self.tipo}")
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        with ejecucion.transaccion():
+            self._ejecutar(ejecucion.con)
+            ejecucion.terminar_paso()
+
+    def ensayar(self, con: sqlite3.Connection) -> None:
+        self._ejecutar(con)
+
+
+class CrearTabla(Paso):
+    def __init__(self, tabla: str, ddl: str):
+        self.tabla = tabla
+        self.ddl = ddl
+        self.descripcion = f"crear tabla {tabla}"
+
+    def _ejecutar(self, con: sqlite3.Connection) -> None:
+        if not _existe_tabla(con, self.tabla):
+            con.execute(self.ddl)
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        with ejecucion.transaccion():
+            self._ejecutar(ejecucion.con)
+            ejecucion.terminar_paso()
+
+    def ensayar(self, con: sqlite3.Connection) -> None:
+        self._ejecutar(con)
+
+
+class EjecutarSentencias(Paso):
+    """Sentencias cortas e idempotentes (triggers, filas fijas) en una transacción."""
+
+    def __init__(self, descripcion: str, sentencias: Sequence[str]):
+        self.sentencias = tuple(sentencias)
+        self.descripcion = descripcion
+
+    def _ejecutar(self, con: sqlite3.Connection) -> None:
+        for sentencia in self.sentencias:
+            con.execute(sentencia)
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        with ejecucion.transaccion():
+            self._ejecutar(ejecucion.con)
+            ejecucion.terminar_paso()
+
+    def ensayar(self, con: sqlite3.Connection) -> None:
+        self._ejecutar(con)
+
+
+class CrearIndice(Paso):
+    """
+    CREATE INDEX. SQLite no puede construir un índice de a partes: la
+    tabla queda bloqueada para escritura mientras se arma.
+    """
+
+    def __init__(self, nombre: str, tabla: str, columnas: Sequence[str], *, unico: bool = False):
+        self.nombre = nombre
+        self.tabla = tabla
+        self.columnas = tuple(columnas)
+        self.unico = unico
+        self.descripcion = f"crear índice {nombre} ({', '.join(self.columnas)})"
+
+    def _ddl(self, nombre: str, tabla: str) -> str:
+        unico = "UNIQUE " if self.unico else ""
+        return (
+            f"CREATE {unico}INDEX IF NOT EXISTS {nombre} "
+            f"ON {tabla} ({', '.join(self.columnas)})"
+        )
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        with ejecucion.transaccion():
+            ejecucion.con.execute(self._ddl(self.nombre, self.tabla))
+            ejecucion.terminar_paso()
+
+    def estimar(self, con: sqlite3.Connection) -> tuple[int, float]:
+        # Se mide armando el índice sobre una muestra en una tabla temporal.
+        filas = _contar(con, self.tabla)
+        if not filas:
+            return 0, 0.0
+        con.execute(
+            f"CREATE TEMP TABLE _muestra_indice AS "
+            f"SELECT {', '.join(self.columnas)} FROM {self.tabla} LIMIT {FILAS_MUESTRA}"
+        )
+        muestra = con.execute("SELECT count(*) FROM _muestra_indice").fetchone()[0]
+        inicio = time.perf_counter()
+        con.execute(self._ddl("_muestra_indice_ix", "_muestra_indice").replace(" UNIQUE", ""))
+        segundos = time.perf_counter() - inicio
+        con.execute("DROP TABLE _muestra_indice")
+        return filas, segundos * filas / muestra
+
+
+class Rellenar(Paso):
+    """
+    Completa columnas fila por fila, de a lotes por id. Con `asignar` el
+    valor se calcula en SQL ("col = expresion"); con `calcular`, en Python:
+    recibe una tupla con `columnas` y devuelve un dict columna -> valor.
+    """
+
+    def __init__(
+        self,
+        tabla: str,
+        *,
+        asignar: str | None = None,
+        columnas: Sequence[str] = (),
+        calcular: Callable[[tuple], dict] | None = None,
+        donde: str | None = None,
+        descripcion: str | None = None
+    ):
+        if (asignar is None) == (calcular is None):
+            raise ValueError("Rellenar necesita `asignar` o `calcular`, no ambos.")
+        self.tabla = tabla
+        self.asignar = asignar
+        self.columnas = tuple(columnas)
+        self.calcular = calcular
+        self.donde = donde
+        self.descripcion = descripcion or f"rellenar {tabla}"
+
+    def _procesar(self, con: sqlite3.Connection, desde: int, hasta: int) -> None:
+        condicion = "id > ? AND id <= ?"
+        if self.donde:
+            condicion += f" AND ({self.donde})"
+
+        if self.asignar is not None:
+            con.execute(f"UPDATE {self.tabla} SET {self.asignar} WHERE {condicion}", (desde, hasta))
+            return
+
+        filas = con.execute(
+            f"SELECT id, {', '.join(self.columnas)} FROM {self.tabla} WHERE {condicion}",
+            (desde, hasta)
+        ).fetchall()
+        cambios = []
+        for fila in filas:
+            valores = self.calcular(fila[1:])
+            valores["_id"] = fila[0]
+            cambios.append(valores)
+        if cambios:
+            asignaciones = ", ".join(f"{c} = :{c}" for c in cambios[0] if c != "_id")
+            con.executemany(f"UPDATE {self.tabla} SET {asignaciones} WHERE id = :_id", cambios)
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        ejecucion.por_lotes(
+            self.tabla,
+            lambda desde, hasta: self._procesar(ejecucion.con, desde, hasta)
+        )
+
+    def estimar(self, con: sqlite3.Connection) -> tuple[int, float]:
+        filas = _contar(con, self.tabla)
+        if not filas:
+            return 0, 0.0
+        hasta = con.execute(
+            f"SELECT max(id) FROM (SELECT id FROM {self.tabla} ORDER BY id LIMIT {FILAS_MUESTRA})"
+        ).fetchone()[0]
+        inicio = time.perf_counter()
+        self._procesar(con, 0, hasta)
+        segundos = time.perf_counter() - inicio
+        return filas, segundos * filas / min(filas, FILAS_MUESTRA)
+
+
+class ReconstruirTabla(Paso):
+    """
+    Cambio de esquema que SQLite no admite con ALTER TABLE (tipo o
+    restricción de una columna, quitar columnas, FKs): patrón de 12 pasos
+    de https://www.sqlite.org/lang_altertable.html.
+
+    La copia va por lotes mientras la aplicación sigue escribiendo
+    (triggers reflejan los cambios en la tabla nueva), pero el reemplazo
+    no es en línea: toma el lock de escritura mientras completa lo que
+    falta, compara la cantidad de filas y revisa las claves foráneas de
+    toda la base. El código que escribe columnas que se quitan tiene que
+    estar actualizado antes de que termine.
+
+    - `crear`: CREATE TABLE de la nueva definición, con {tabla} en lugar
+      del nombre.
+    - `columnas`: columna nueva -> expresión SQL sobre la fila vieja.
+      Debe incluir `id`.
+    - `indices`: CREATE INDEX a recrear, también con {tabla}. El DROP
+      se lleva los triggers de la tabla: los de versión
+      (models.sql_triggers_version) también van acá.
+    - `catalogos`: pasos Catalogar de esta tabla. Se vuelven a correr en
+      cada lote y en el reemplazo, para las filas que el código viejo
+      siguió insertando sin id de catálogo.
+    """
+
+    def __init__(
+        self,
+        tabla: str,
+        *,
+        crear: str,
+        columnas: dict[str, str],
+        indices: Sequence[str] = (),
+        catalogos: Sequence["Catalogar"] = (),
+        descripcion: str | None = None
+    ):
+        if "id" not in columnas:
+            raise ValueError("ReconstruirTabla necesita copiar la columna id.")
+        self.tabla = tabla
+        self.nueva = f"_nueva_{tabla}"
+        self.crear = crear
+        self.columnas = columnas
+        self.indices = tuple(indices)
+        self.catalogos = tuple(catalogos)
+        self.descripcion = descripcion or f"reconstruir tabla {tabla}"
+
+    def _copia(self, origen: str) -> str:
+        destino = ", ".join(self.columnas)
+        expresiones = ", ".join(self.columnas.values())
+        return f"INTO {self.nueva} ({destino}) SELECT {expresiones} FROM {self.tabla} WHERE {origen}"
+
+    def _preparar(self, con: sqlite3.Connection) -> None:
+        """Tabla nueva y triggers que le reflejan los cambios de la vieja."""
+
+        con.execute(self.crear.format(tabla=self.nueva).replace(
+            "CREATE TABLE ", "CREATE TABLE IF NOT EXISTS ", 1
+        ))
+        # OR IGNORE: una fila que todavía no entra en la tabla nueva (por
+        # ejemplo sin id de catálogo) no hace fallar la escritura de la
+        # aplicación; falta en la copia y la completa el reemplazo.
+        prefijo = f"_migracion_{self.tabla}"
+        con.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {prefijo}_ins AFTER INSERT ON {self.tabla} "
+            f"BEGIN DELETE FROM {self.nueva} WHERE id = NEW.id; "
+            f"INSERT OR IGNORE {self._copia('id = NEW.id')}; END"
+        )
+        con.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {prefijo}_upd AFTER UPDATE ON {self.tabla} "
+            f"BEGIN DELETE FROM {self.nueva} WHERE id IN (OLD.id, NEW.id); "
+            f"INSERT OR IGNORE {self._copia('id = NEW.id')}; END"
+        )
+        con.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {prefijo}_del AFTER DELETE ON {self.tabla} "
+            f"BEGIN DELETE FROM {self.nueva} WHERE id = OLD.id; END"
+        )
+
+    def _copiar(self, con: sqlite3.Connection, desde: int, hasta: int) -> None:
+        for catalogo in self.catalogos:
+            catalogo._procesar(con, desde, hasta)
+        # Si un trigger ya copió la fila, su versión es más nueva. Cualquier
+        # otra restricción que no se cumpla (NOT NULL...) corta la migración.
+        con.execute(
+            f"INSERT {self._copia('id > ? AND id <= ?')} ON CONFLICT (id) DO NOTHING",
+            (desde, hasta)
+        )
+
+    def _completar(self, con: sqlite3.Connection) -> None:
+        """Copia lo que los triggers no pudieron; dentro de la transacción del reemplazo."""
+
+        maximo = con.execute(f"SELECT max(id) FROM {self.tabla}").fetchone()[0] or 0
+        for catalogo in self.catalogos:
+            catalogo._procesar(con, 0, maximo)
+        con.execute(
+            f"INSERT {self._copia(f'id NOT IN (SELECT id FROM {self.nueva})')}"
+        )
+        viejas, nuevas = _contar(con, self.tabla), _contar(con, self.nueva)
+        if viejas != nuevas:
+            raise RuntimeError(
+                f"{self.tabla}: {viejas} filas en la tabla vieja y {nuevas} en la nueva."
+            )
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        con = ejecucion.con
+
+        with ejecucion.transaccion():
+            self._preparar(con)
+
+        ejecucion.por_lotes(self.tabla, lambda desde, hasta: self._copiar(con, desde, hasta))
+
+        # Reemplazo atómico. Con foreign_keys activo el DROP borraría en cascada
+        # o fallaría, así que se desactiva (solo puede hacerse fuera de la transacción).
+        fks = con.execute("PRAGMA foreign_keys").fetchone()[0]
+        con.execute("PRAGMA foreign_keys = OFF")
+        try:
+            with ejecucion.transaccion():
+                self._completar(con)
+                # Toda la base: también las tablas que apuntan a esta. Solo
+                # cuentan las violaciones nuevas; las previas se informan.
+                previas = {fila[:2] for fila in con.execute("PRAGMA foreign_key_check")}
+                con.execute(f"DROP TABLE {self.tabla}")
+                con.execute(f"ALTER TABLE {self.nueva} RENAME TO {self.tabla}")
+                for indice in self.indices:
+                    con.execute(indice.format(tabla=self.tabla))
+                errores = [
+                    fila for fila in con.execute("PRAGMA foreign_key_check")
+                    if fila[:2] not in previas
+                ]
+                if errores:
+                    raise RuntimeError(
+                        f"{self.tabla}: {len(errores)} filas quedan violando claves foráneas "
+                        f"(primera: {errores[0][0]} id {errores[0][1]})."
+                    )
+                if previas:
+                    ejecucion.progreso(
+                        f"    {len(previas)} filas ya violaban claves foráneas antes del reemplazo"
+                    )
+                ejecucion.terminar_paso()
+        finally:
+            con.execute(f"PRAGMA foreign_keys = {fks}")
+
+    def estimar(self, con: sqlite3.Connection) -> tuple[int, float]:
+        filas = _contar(con, self.tabla)
+        if not filas:
+            return 0, 0.0
+        self._preparar(con)
+        hasta = con.execute(
+            f"SELECT max(id) FROM (SELECT id FROM {self.tabla} ORDER BY id LIMIT {FILAS_MUESTRA})"
+        ).fetchone()[0]
+        inicio = time.perf_counter()
+        self._copiar(con, 0, hasta)
+        segundos = time.perf_counter() - inicio
+        return filas, segundos * filas / min(filas, FILAS_MUESTRA)
+
+
+class Catalogar(Paso):
+    """
+    Pasa los textos de `tabla.columna` al catálogo y completa
+    `columna_id`, de a lotes por id. Los textos con la misma clave
+    (ver normalizacion.clave_catalogo) van al mismo valor; los vacíos,
+    a `por_defecto` si se indica.
+    """
+
+    def __init__(
+        self,
+        tabla: str,
+        columna: str,
+        *,
+        catalogo: str,
+        columna_id: str,
+        sinonimos: dict[str, str] | None = None,
+        por_defecto: str | None = None
+    ):
+        self.tabla = tabla
+        self.columna = columna
+        self.catalogo = catalogo
+        self.columna_id = columna_id
+        self.sinonimos = sinonimos
+        self.por_defecto = por_defecto
+        self.descripcion = f"catalogar {tabla}.{columna} en {catalogo}"
+
+    def _id(self, con: sqlite3.Connection, texto: str, ids: dict[str, int]) -> int | None:
+        clave = clave_catalogo(texto, self.sinonimos)
+        if clave is None:
+            return None
+        if clave not in ids:
+            con.execute(
+                f"INSERT INTO {self.catalogo} (nombre, clave) VALUES (?, ?) "
+                f"ON CONFLICT (clave) DO NOTHING",
+                (nombre_catalogo(texto, self.sinonimos), clave)
+            )
+            ids[clave] = con.execute(
+                f"SELECT id FROM {self.catalogo} WHERE clave = ?", (clave,)
+            ).fetchone()[0]
+        return ids[clave]
+
+    def _procesar(self, con: sqlite3.Connection, desde: int, hasta: int) -> None:
+        filas = con.execute(
+            f"SELECT id, {self.columna} FROM {self.tabla} "
+            f"WHERE id > ? AND id <= ? AND {self.columna_id} IS NULL",
+            (desde, hasta)
+        ).fetchall()
+
+        ids: dict[str, int] = {}
+        cambios = []
+        for fila_id, texto in filas:
+            catalogo_id = self._id(con, texto, ids)
+            if catalogo_id is None and self.por_defecto is not None:
+                catalogo_id = self._id(con, self.por_defecto, ids)
+            if catalogo_id is not None:
+                cambios.append((catalogo_id, fila_id))
+        con.executemany(f"UPDATE {self.tabla} SET {self.columna_id} = ? WHERE id = ?", cambios)
+
+    def aplicar(self, ejecucion: _Ejecucion) -> None:
+        ejecucion.por_lotes(
+            self.tabla,
+            lambda desde, hasta: self._procesar(ejecucion.con, desde, hasta)
+        )
+
+    def estimar(self, con: sqlite3.Connection) -> tuple[int, float]:
+        filas = _contar(con, self.tabla)
+        if not filas:
+            return 0, 0.0
+        hasta = con.execute(
+            f"SELECT max(id) FROM (SELECT id FROM {self.tabla} ORDER BY id LIMIT {FILAS_MUESTRA})"
+        ).fetchone()[0]
+        inicio = time.perf_counter()
+        self._procesar(con, 0, hasta)
+        segundos = time.perf_counter() - inicio
+        return filas, segundos * filas / min(filas, FILAS_MUESTRA)
+
+
+# ---------------------------------------------------------
+# MIGRACIONES
+# ---------------------------------------------------------
+class Migracion(NamedTuple):
+    version: int
+    nombre: str
+    pasos: tuple[Paso, ...]
+
+
+class Estimacion(NamedTuple):
+    version: int
+    paso: str
+    filas: int
+    segundos: float
+
+
+def _claves_dueno(fila: tuple) -> dict:
+    dni, nombre, telefono, email = fila
+    claves = calcular_claves(dni, nombre, telefono, email)
+    return {
+        "dni_normalizado": claves.dni,
+        "telefono_normalizado": claves.telefono,
+        "email_normalizado": claves.email,
+        "nombre_fonetico": claves.nombre,
+    }
+
+
+def _posologia(fila: tuple) -> dict:
+    frecuencia, duracion = fila
+    return {
+        "intervalo_horas": parsear_frecuencia(frecuencia),
+        "duracion_dias": parsear_duracion(duracion),
+    }
+
+
+# Migración 7: el reemplazo de las tablas vuelve a correr estos pasos.
+_CATALOGAR_PACIENTES = (
+    Catalogar(
+        "pacientes", "especie", catalogo="especies", columna_id="especie_id",
+        sinonimos=SINONIMOS_ESPECIE, por_defecto=SIN_ESPECIFICAR
+    ),
+    Catalogar("pacientes", "raza", catalogo="razas", columna_id="raza_id"),
+)
+_CATALOGAR_TRATAMIENTOS = Catalogar(
+    "tratamientos", "nombre", catalogo="medicamentos", columna_id="medicamento_id",
+    por_defecto=SIN_ESPECIFICAR
+)
+
+TABLAS_VERSIONADAS = (
+    "duenos", "especies", "razas", "medicamentos", "pacientes", "veterinarios",
+    "consultas", "archivos_clinicos", "tratamientos", "dosis_programadas",
+    "turnos", "registros_eliminados",
+)
+
+
+MIGRACIONES: list[Migracion] = [
+    Migracion(1, "fecha de baja en las tablas con soft delete", tuple(
+        AgregarColumna(tabla, "fecha_baja", "DATETIME")
+        for tabla in (
+            "duenos", "pacientes", "veterinarios",
+            "consultas", "archivos_clinicos", "tratamientos",
+        )
+    )),
+    Migracion(2, "claves normalizadas de dueños", (
+        AgregarColumna("duenos", "dni_normalizado", "VARCHAR(20)"),
+        AgregarColumna("duenos", "telefono_normalizado", "VARCHAR"),
+        AgregarColumna("duenos", "email_normalizado", "VARCHAR"),
+        AgregarColumna("duenos", "nombre_fonetico", "VARCHAR"),
+        Rellenar(
+            "duenos",
+            columnas=("dni", "nombre", "telefono", "email"),
+            calcular=_claves_dueno,
+            descripcion="calcular claves normalizadas de dueños"
+        ),
+        CrearIndice("ix_duenos_dni_normalizado", "duenos", ["dni_normalizado"]),
+        CrearIndice("ix_duenos_telefono_normalizado", "duenos", ["telefono_normalizado"]),
+        CrearIndice("ix_duenos_email_normalizado", "duenos", ["email_normalizado"]),
+        CrearIndice("ix_duenos_nombre_fonetico", "duenos", ["nombre_fonetico"]),
+    )),
+    Migracion(3, "índices de consultas, archivos y tratamientos", (
+        CrearIndice("ix_consultas_paciente_fecha", "consultas", ["paciente_id", "fecha"]),
+        CrearIndice("ix_archivos_clinicos_consulta_id", "archivos_clinicos", ["consulta_id"]),
+        CrearIndice("ix_tratamientos_consulta_id", "tratamientos", ["consulta_id"]),
+    )),
+    Migracion(4, "posología interpretada de tratamientos", (
+        AgregarColumna("tratamientos", "intervalo_horas", "INTEGER"),
+        AgregarColumna("tratamientos", "duracion_dias", "INTEGER"),
+        Rellenar(
+            "tratamientos",
+            columnas=("frecuencia", "duracion"),
+            calcular=_posologia,
+            donde="frecuencia IS NOT NULL OR duracion IS NOT NULL",
+            descripcion="interpretar frecuencia y duración"
+        ),
+    )),
+    Migracion(5, "dosis programadas, turnos, tombstones y auditoría", (
+        CrearTabla("dosis_programadas", """
+            CREATE TABLE dosis_programadas (
+                id INTEGER NOT NULL,
+                fecha_hora DATETIME NOT NULL,
+                tratamiento_id INTEGER NOT NULL,
+                PRIMARY KEY (id),
+                FOREIGN KEY(tratamiento_id) REFERENCES tratamientos (id)
+            )"""),
+        CrearIndice("ix_dosis_programadas_fecha_hora", "dosis_programadas", ["fecha_hora"]),
+        CrearIndice("ix_dosis_programadas_tratamiento_id", "dosis_programadas", ["tratamiento_id"]),
+        CrearTabla("turnos", """
+            CREATE TABLE turnos (
+                id INTEGER NOT NULL,
+                inicio DATETIME NOT NULL,
+                fin DATETIME NOT NULL,
+                motivo VARCHAR,
+                activo BOOLEAN NOT NULL,
+                fecha_baja DATETIME,
+                veterinario_id INTEGER NOT NULL,
+                paciente_id INTEGER NOT NULL,
+                PRIMARY KEY (id),
+                FOREIGN KEY(veterinario_id) REFERENCES veterinarios (id),
+                FOREIGN KEY(paciente_id) REFERENCES pacientes (id)
+            )"""),
+        CrearIndice("ix_turnos_paciente_id", "turnos", ["paciente_id"]),
+        CrearIndice("ix_turnos_veterinario_inicio", "turnos", ["veterinario_id", "inicio"]),
+        CrearTabla("registros_eliminados", """
+            CREATE TABLE registros_eliminados (
+                id INTEGER NOT NULL,
+                tabla VARCHAR NOT NULL,
+                registro_id INTEGER NOT NULL,
+                datos TEXT NOT NULL,
+                fecha_eliminacion DATETIME NOT NULL,
+                PRIMARY KEY (id)
+            )"""),
+        CrearIndice(
+            "ix_registros_eliminados_tabla_registro", "registros_eliminados",
+            ["tabla", "registro_id"]
+        ),
+        CrearTabla("auditoria", """
+            CREATE TABLE auditoria (
+                id INTEGER NOT NULL,
+                tabla VARCHAR NOT NULL,
+                registro_id INTEGER NOT NULL,
+                campo VARCHAR NOT NULL,
+                valor_anterior TEXT,
+                valor_nuevo TEXT,
+                usuario VARCHAR,
+                fecha DATETIME NOT NULL,
+                PRIMARY KEY (id)
+            )"""),
+        CrearIndice(
+            "ix_auditoria_tabla_registro_fecha", "auditoria",
+            ["tabla", "registro_id", "fecha"]
+        ),
+    )),
+    Migracion(6, "diccionarios de compresión", (
+        CrearTabla("diccionarios_compresion", """
+            CREATE TABLE diccionarios_compresion (
+                id INTEGER NOT NULL,
+                datos BLOB NOT NULL,
+                muestras INTEGER NOT NULL,
+                fecha_creacion DATETIME NOT NULL,
+                PRIMARY KEY (id)
+            )"""),
+    )),
+    Migracion(7, "catálogos de especies, razas y medicamentos", (
+        CrearTabla("especies", """
+            CREATE TABLE especies (
+                id INTEGER NOT NULL,
+                nombre VARCHAR NOT NULL,
+                clave VARCHAR NOT NULL,
+                PRIMARY KEY (id),
+                UNIQUE (clave)
+            )"""),
+        CrearTabla("razas", """
+            CREATE TABLE razas (
+                id INTEGER NOT NULL,
+                nombre VARCHAR NOT NULL,
+                clave VARCHAR NOT NULL,
+                PRIMARY KEY (id),
+                UNIQUE (clave)
+            )"""),
+        CrearTabla("medicamentos", """
+            CREATE TABLE medicamentos (
+                id INTEGER NOT NULL,
+                nombre VARCHAR NOT NULL,
+                clave VARCHAR NOT NULL,
+                PRIMARY KEY (id),
+                UNIQUE (clave)
+            )"""),
+        AgregarColumna("pacientes", "especie_id", "INTEGER"),
+        AgregarColumna("pacientes", "raza_id", "INTEGER"),
+        AgregarColumna("tratamientos", "medicamento_id", "INTEGER"),
+        *_CATALOGAR_PACIENTES,
+        _CATALOGAR_TRATAMIENTOS,
+        ReconstruirTabla(
+            "pacientes",
+            crear="""
+                CREATE TABLE {tabla} (
+                    id INTEGER NOT NULL,
+                    nombre VARCHAR NOT NULL,
+                    especie_id INTEGER NOT NULL,
+                    raza_id INTEGER,
+                    sexo VARCHAR,
+                    fecha_nacimiento DATE,
+                    activo BOOLEAN NOT NULL,
+                    fecha_baja DATETIME,
+                    dueno_id INTEGER NOT NULL,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(especie_id) REFERENCES especies (id),
+                    FOREIGN KEY(raza_id) REFERENCES razas (id),
+                    FOREIGN KEY(dueno_id) REFERENCES duenos (id)
+                )""",
+            columnas={c: c for c in (
+                "id", "nombre", "especie_id", "raza_id", "sexo",
+                "fecha_nacimiento", "activo", "fecha_baja", "dueno_id",
+            )},
+            indices=["CREATE INDEX ix_pacientes_especie_id ON {tabla} (especie_id)"],
+            catalogos=_CATALOGAR_PACIENTES,
+            descripcion="quitar pacientes.especie y pacientes.raza"
+        ),
+        ReconstruirTabla(
+            "tratamientos",
+            crear="""
+                CREATE TABLE {tabla} (
+                    id INTEGER NOT NULL,
+                    medicamento_id INTEGER NOT NULL,
+                    dosis VARCHAR NOT NULL,
+                    frecuencia VARCHAR,
+                    duracion VARCHAR,
+                    observaciones TEXT,
+                    intervalo_horas INTEGER,
+                    duracion_dias INTEGER,
+                    fecha_inicio DATE NOT NULL,
+                    fecha_fin DATE,
+                    activo BOOLEAN NOT NULL,
+                    fecha_baja DATETIME,
+                    consulta_id INTEGER NOT NULL,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(medicamento_id) REFERENCES medicamentos (id),
+                    FOREIGN KEY(consulta_id) REFERENCES consultas (id)
+                )""",
+            columnas={c: c for c in (
+                "id", "medicamento_id", "dosis", "frecuencia", "duracion",
+                "observaciones", "intervalo_horas", "duracion_dias",
+                "fecha_inicio", "fecha_fin", "activo", "fecha_baja", "consulta_id",
+            )},
+            indices=[
+                "CREATE INDEX ix_tratamientos_medicamento_id ON {tabla} (medicamento_id)",
+                "CREATE INDEX ix_tratamientos_consulta_id ON {tabla} (consulta_id)",
+            ],
+            catalogos=[_CATALOGAR_TRATAMIENTOS],
+            descripcion="quitar tratamientos.nombre"
+        ),
+    )),
+    # Las filas existentes quedan con versión 1 (el DEFAULT, sin reescribirlas)
+    # y el reloj arranca en 1: desde la versión 0 se ve todo.
+    Migracion(8, "versión de fila y reloj de cambios", (
+        CrearTabla("reloj_cambios", """
+            CREATE TABLE reloj_cambios (
+                id INTEGER NOT NULL,
+                valor INTEGER NOT NULL,
+                PRIMARY KEY (id)
+            )"""),
+        EjecutarSentencias(
+            "iniciar reloj de cambios",
+            ["INSERT OR IGNORE INTO reloj_cambios (id, valor) VALUES (1, 1)"]
+        ),
+        *(
+            paso
+            for tabla in TABLAS_VERSIONADAS
+            for paso in (
+                AgregarColumna(tabla, "version", "INTEGER DEFAULT 1 NOT NULL"),
+                CrearIndice(f"ix_{tabla}_version", tabla, ["version"]),
+                EjecutarSentencias(f"triggers de versión de {tabla}", sql_triggers_version(tabla)),
+            )
+        ),
+    )),
+    Migracion(9, "índices de la purga de inactivos", (
+        *(
+            CrearIndice(f"ix_{tabla}_activo_fecha_baja", tabla, ["activo", "fecha_baja"])
+            for tabla in (
+                "archivos_clinicos", "tratamientos", "consultas", "turnos",
+                "pacientes", "veterinarios", "duenos",
+            )
+        ),
+        CrearIndice("ix_consultas_veterinario_id", "consultas", ["veterinario_id"]),
+        CrearIndice("ix_pacientes_dueno_id", "pacientes", ["dueno_id"]),
+    )),
+    Migracion(10, "paciente de tratamientos y archivos para el historial", (
+        *(
+            paso
+            for tabla in ("tratamientos", "archivos_clinicos")
+            for paso in (
+                AgregarColumna(tabla, "paciente_id", "INTEGER REFERENCES pacientes (id)"),
+                # Los triggers van antes del relleno: cubren lo que se inserte mientras tanto.
+                EjecutarSentencias(f"triggers de paciente de {tabla}", sql_triggers_paciente(tabla)),
+                Rellenar(
+                    tabla,
+                    asignar=(
+                        "paciente_id = (SELECT paciente_id FROM consultas "
+                        f"WHERE consultas.id = {tabla}.consulta_id)"
+                    ),
+                    donde="paciente_id IS NULL",
+                    descripcion=f"copiar el paciente de la consulta en {tabla}"
+                ),
+            )
+        ),
+        CrearIndice("ix_tratamientos_paciente_inicio", "tratamientos", ["paciente_id", "fecha_inicio"]),
+        CrearIndice("ix_tratamientos_paciente_fin", "tratamientos", ["paciente_id", "fecha_fin"]),
+        CrearIndice(
+            "ix_archivos_clinicos_paciente_fecha", "archivos_clinicos", ["paciente_id", "fecha_subida"]
+        ),
+    )),
+]
+
+
+# ---------------------------------------------------------
+# MIGRADOR
+# ---------------------------------------------------------
+class Migrador:
+    """Aplica, estima y registra las migraciones de una base."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        migraciones: Sequence[Migracion] = MIGRACIONES,
+        *,
+        lote: int = LOTE,
+        pausa: float = PAUSA_ENTRE_LOTES,
+        progreso: Callable[[str], None] = print
+    ):
+        self.engine = engine
+        self.migraciones = sorted(migraciones, key=lambda m: m.version)
+        self.lote = lote
+        self.pausa = pausa
+        self.progreso = progreso
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexión del pool en modo autocommit: las transacciones son explícitas."""
+
+        crudo = self.engine.raw_connection()
+        con = crudo.driver_connection
+        aislamiento = con.isolation_level
+        con.isolation_level = None
+        try:
+            con.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLA_VERSIONES} ("
+                "version INTEGER PRIMARY KEY, "
+                "nombre TEXT NOT NULL, "
+                "estado TEXT NOT NULL, "       # 'en_curso' | 'aplicada'
+                "paso INTEGER NOT NULL DEFAULT 0, "
+                "punto_control INTEGER, "      # último id procesado del paso actual
+                "fecha_inicio TEXT, "
+                "fecha_fin TEXT)"
+            )
+            yield con
+        finally:
+            con.isolation_level = aislamiento
+            crudo.close()
+
+    def _estado(self, con: sqlite3.Connection) -> dict[int, tuple]:
+        return {
+            version: (estado, paso, punto)
+            for version, estado, paso, punto in con.execute(
+                f"SELECT version, estado, paso, punto_control FROM {TABLA_VERSIONES}"
+            )
+        }
+
+    def _pendientes(self, con: sqlite3.Connection) -> list[Migracion]:
+        registradas = self._estado(con)
+        return [
+            m for m in self.migraciones
+            if registradas.get(m.version, (None,))[0] != "aplicada"
+        ]
+
+    def estado(self) -> dict[int, tuple]:
+        """version -> (estado, paso, punto_control) de las registradas."""
+
+        with self._conectar() as con:
+            return self._estado(con)
+
+    def pendientes(self) -> list[Migracion]:
+        with self._conectar() as con:
+            return self._pendientes(con)
+
+    def marcar_aplicadas(self) -> None:
+        """Registra todas como aplicadas (base recién creada con el esquema actual)."""
+
+        with self._conectar() as con, _transaccion(con):
+            con.executemany(
+                f"INSERT OR IGNORE INTO {TABLA_VERSIONES} "
+                "(version, nombre, estado, paso, fecha_inicio, fecha_fin) "
+                "VALUES (?, ?, 'aplicada', ?, ?, ?)",
+                [
+                    (m.version, m.nombre, len(m.pasos), _ahora(), _ahora())
+                    for m in self.migraciones
+                ]
+            )
+
+    def aplicar(self, hasta: int | None = None) -> list[int]:
+        """
+        Aplica las migraciones pendientes (hasta la versión `hasta`),
+        retomando las que quedaron a medias. Devuelve las versiones aplicadas.
+        """
+
+        aplicadas = []
+        with self._conectar() as con:
+            for migracion in self._pendientes(con):
+                if hasta is not None and migracion.version > hasta:
+                    break
+                self._aplicar_una(con, migracion)
+                aplicadas.append(migracion.version)
+        return aplicadas
+
+    def _aplicar_una(self, con: sqlite3.Connection, migracion: Migracion) -> None:
+        with _transaccion(con):
+            con.execute(
+                f"INSERT OR IGNORE INTO {TABLA_VERSIONES} "
+                "(version, nombre, estado, paso, fecha_inicio) VALUES (?, ?, 'en_curso', 0, ?)",
+                (migracion.version, migracion.nombre, _ahora())
+            )
+        paso, punto = con.execute(
+            f"SELECT paso, punto_control FROM {TABLA_VERSIONES} WHERE version = ?",
+            (migracion.version,)
+        ).fetchone()
+
+        self.progreso(f"{migracion.version}: {migracion.nombre}")
+        for indice in range(paso, len(migracion.pasos)):
+            actual = migracion.pasos[indice]
+            retoma = f" (retomando desde id {punto})" if punto else ""
+            self.progreso(f"  - {actual.descripcion}{retoma}")
+
+            ejecucion = _Ejecucion(
+                con, migracion.version, indice, punto,
+                lote=self.lote, pausa=self.pausa, progreso=self.progreso
+            )
+            actual.aplicar(ejecucion)
+            if not ejecucion.paso_terminado:
+                with _transaccion(con):
+                    ejecucion.terminar_paso()
+            punto = None
+
+        with _transaccion(con):
+            con.execute(
+                f"UPDATE {TABLA_VERSIONES} SET estado = 'aplicada', fecha_fin = ? WHERE version = ?",
+                (_ahora(), migracion.version)
+            )
+
+    def estimar(self) -> list[Estimacion]:
+        """
+        Duración estimada de cada paso pendiente, midiendo una muestra de
+        FILAS_MUESTRA filas y escalando por el tamaño de la tabla. Cada
+        paso se mide en una transacción diferida que se revierte (después
+        de ensayar los anteriores): el lock de escritura, si el paso lo
+        necesita, se suelta entre un paso y otro.
+        """
+
+        estimaciones = []
+        ensayados: list[Paso] = []
+        with self._conectar() as con:
+            registradas = self._estado(con)
+            for migracion in self._pendientes(con):
+                desde = registradas.get(migracion.version, (None, 0))[1]
+                for actual in migracion.pasos[desde:]:
+                    con.execute("BEGIN")
+                    try:
+                        for anterior in ensayados:
+                            anterior.ensayar(con)
+                        filas, segundos = actual.estimar(con)
+                    finally:
+                        con.execute("ROLLBACK")
+                    ensayados.append(actual)
+                    estimaciones.append(
+                        Estimacion(migracion.version, actual.descripcion, filas, segundos)
+                    )
+        return estimaciones
+
+
+def main() -> None:
+    from database.init_db import engine
+
+    parser = argparse.ArgumentParser(description="Migraciones de esquema de vete.db.")
+    parser.add_argument("--dry-run", action="store_true", help="listar y estimar duración")
+    parser.add_argument("--estado", action="store_true", help="mostrar versiones registradas")
+    parser.add_argument("--hasta", type=int, help="aplicar solo hasta esta versión")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    parser.add_argument("--pausa", type=float, default=PAUSA_ENTRE_LOTES, help="segundos entre lotes")
+    args = parser.parse_args()
+
+    migrador = Migrador(engine, lote=args.lote, pausa=args.pausa)
+
+    if args.estado:
+        registradas = migrador.estado()
+        for migracion in migrador.migraciones:
+            estado, paso, punto = registradas.get(migracion.version, ("pendiente", 0, None))
+            detalle = f" paso {paso}/{len(migracion.pasos)}" if estado == "en_curso" else ""
+            detalle += f", id {punto}" if punto else ""
+            print(f"{migracion.version:>4}  {estado:<10}{detalle}  {migracion.nombre}")
+        return
+
+    if args.dry_run:
+        estimaciones = migrador.estimar()
+        if not estimaciones:
+            print("No hay migraciones pendientes.")
+            return
+        for e in estimaciones:
+            print(f"{e.version:>4}  {e.paso:<55}{e.filas:>10} filas{e.segundos:>9.1f} s")
+        total = sum(e.segundos for e in estimaciones)
+        print(f"Total estimado: {total:.1f} s (sin contar pausas entre lotes)")
+        return
+
+    aplicadas = migrador.aplicar(args.hasta)
+    print(f"Migraciones aplicadas: {aplicadas or 'ninguna'}")
+
+
+if __name__ == "__main__":
+    main()
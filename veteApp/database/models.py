@@ -1,6 +1,7 @@
 from datetime import datetime, date
 
 from sqlalchemy import (
+    DDL,
     Column,
     Integer,
     String,
@@ -8,17 +9,101 @@ from sqlalchemy import (
     Date,
     DateTime,
     Boolean,
-    ForeignKey
+    ForeignKey,
+    Index,
+    LargeBinary,
+    event,
+    select,
+    text
 )
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship, declarative_base, object_session
+from sqlalchemy.schema import FetchedValue
+
+from database.tipos import TextoComprimido
 
 Base = declarative_base()
 
 
+# ---------------------------------------------------------
+# VERSIÓN DE FILA
+# ---------------------------------------------------------
+# Cada INSERT o UPDATE de una tabla versionada le pone a la fila el
+# valor siguiente del reloj de cambios de la base (reloj_cambios). Lo
+# hacen triggers de SQLite (ver sql_triggers_version), así que cubre
+# también las sentencias de Core y los UPDATE masivos. El reloj nunca
+# retrocede: una versión no se repite, ni entre tablas ni después de un
+# DELETE. Consultas de sincronización en database/versiones.py.
+class Versionado:
+    version = Column(
+        Integer,
+        nullable=False,
+        index=True,
+        server_default=text("1"),
+        server_onupdate=FetchedValue()
+    )
+
+    # El RETURNING de SQLite devuelve la fila de antes de los triggers:
+    # la versión se relee de la base la primera vez que se usa.
+    __mapper_args__ = {"eager_defaults": False}
+
+
+class RelojCambios(Base):
+    __tablename__ = "reloj_cambios"
+
+    id = Column(Integer, primary_key=True)  # una sola fila, id = 1
+    valor = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<RelojCambios(valor={self.valor})>"
+
+
+def sql_triggers_version(tabla: str) -> tuple[str, str]:
+    """CREATE TRIGGER que versionan las filas de `tabla` al insertar y al actualizar."""
+
+    asignar = (
+        "UPDATE reloj_cambios SET valor = valor + 1 WHERE id = 1; "
+        f"UPDATE {tabla} SET version = (SELECT valor FROM reloj_cambios WHERE id = 1) "
+        "WHERE id = NEW.id; "
+    )
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS version_{tabla}_ins AFTER INSERT ON {tabla} "
+        f"BEGIN {asignar}END",
+        # El UPDATE del propio trigger cambia la versión, así que no se vuelve a disparar.
+        f"CREATE TRIGGER IF NOT EXISTS version_{tabla}_upd AFTER UPDATE ON {tabla} "
+        f"WHEN NEW.version = OLD.version BEGIN {asignar}END",
+    )
+
+
+# ---------------------------------------------------------
+# PACIENTE DE TRATAMIENTOS Y ARCHIVOS
+# ---------------------------------------------------------
+# tratamientos y archivos_clinicos repiten el paciente_id de su consulta
+# para que el historial (crud/timeline.py) los recorra por índice, de a
+# una página. Lo mantienen triggers, como la versión: al insertar, al
+# cambiar de consulta y cuando la consulta cambia de paciente.
+
+
+def sql_triggers_paciente(tabla: str) -> tuple[str, ...]:
+    """CREATE TRIGGER que copian en `tabla` el paciente_id de su consulta."""
+
+    paciente = "(SELECT paciente_id FROM consultas WHERE id = NEW.consulta_id)"
+    asignar = f"BEGIN UPDATE {tabla} SET paciente_id = {paciente} WHERE id = NEW.id; END"
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS paciente_{tabla}_ins AFTER INSERT ON {tabla} "
+        f"WHEN NEW.paciente_id IS NOT {paciente} {asignar}",
+        f"CREATE TRIGGER IF NOT EXISTS paciente_{tabla}_upd AFTER UPDATE OF consulta_id ON {tabla} "
+        f"WHEN NEW.paciente_id IS NOT {paciente} {asignar}",
+        f"CREATE TRIGGER IF NOT EXISTS paciente_{tabla}_consulta AFTER UPDATE OF paciente_id ON consultas "
+        f"WHEN NEW.paciente_id IS NOT OLD.paciente_id "
+        f"BEGIN UPDATE {tabla} SET paciente_id = NEW.paciente_id WHERE consulta_id = NEW.id; END",
+    )
+
+
 # ---------------------------------------------------------
 # DUEÑO
 # ---------------------------------------------------------
-class Dueno(Base):
+class Dueno(Versionado, Base):
     __tablename__ = "duenos"
 
     id = Column(Integer, primary_key=True)
@@ -30,7 +115,20 @@ class Dueno(Base):
     email = Column(String)
     direccion = Column(String)
 
+    # Claves normalizadas para detectar dueños duplicados
+    # (ver database/normalizacion.py)
+    dni_normalizado = Column(String(20), index=True)
+    telefono_normalizado = Column(String, index=True)
+    email_normalizado = Column(String, index=True)
+    nombre_fonetico = Column(String, index=True)
+
     activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
+
+    # Búsqueda de bajas a purgar (database/purga.py)
+    __table_args__ = (
+        Index("ix_duenos_activo_fecha_baja", "activo", "fecha_baja"),
+    )
 
     pacientes = relationship(
         "Paciente",
@@ -45,22 +143,87 @@ class Dueno(Base):
 
 
 
+# ---------------------------------------------------------
+# CATÁLOGOS
+# ---------------------------------------------------------
+# Especies, razas y medicamentos se guardan una sola vez; pacientes y
+# tratamientos los referencian por id. Los textos se resuelven a id con
+# database/catalogos.py, que normaliza (ver normalizacion.clave_catalogo)
+# y cachea el mapeo para todo el proceso.
+class Especie(Versionado, Base):
+    __tablename__ = "especies"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, nullable=False)
+    clave = Column(String, nullable=False, unique=True)  # nombre normalizado
+
+    def __repr__(self):
+        return f"<Especie(id={self.id}, nombre='{self.nombre}')>"
+
+
+class Raza(Versionado, Base):
+    __tablename__ = "razas"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, nullable=False)
+    clave = Column(String, nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Raza(id={self.id}, nombre='{self.nombre}')>"
+
+
+class Medicamento(Versionado, Base):
+    __tablename__ = "medicamentos"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String, nullable=False)
+    clave = Column(String, nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Medicamento(id={self.id}, nombre='{self.nombre}')>"
+
+
+def _nombre_en_catalogo(objeto, catalogo, catalogo_id: int | None) -> str | None:
+    """
+    Lo resuelto con sesión queda guardado en el objeto; desasociado solo
+    responde con eso (nombre_de sin sesión lanza LookupError).
+    """
+
+    # Import diferido: database.catalogos importa este módulo.
+    from database.catalogos import nombre_de
+
+    if catalogo_id is None:
+        return None
+    resueltos = objeto.__dict__.setdefault("_nombres_catalogo", {})
+    db = object_session(objeto)
+    if db is None and (catalogo, catalogo_id) in resueltos:
+        return resueltos[(catalogo, catalogo_id)]
+    nombre = resueltos[(catalogo, catalogo_id)] = nombre_de(db, catalogo, catalogo_id)
+    return nombre
+
+
 # ---------------------------------------------------------
 # PACIENTE
 # ---------------------------------------------------------
-class Paciente(Base):
+class Paciente(Versionado, Base):
     __tablename__ = "pacientes"
 
     id = Column(Integer, primary_key=True)
     nombre = Column(String, nullable=False)
-    especie = Column(String, nullable=False)
-    raza = Column(String)
+    especie_id = Column(Integer, ForeignKey("especies.id"), nullable=False, index=True)
+    raza_id = Column(Integer, ForeignKey("razas.id"))
     sexo = Column(String)
     fecha_nacimiento = Column(Date)
 
     activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
 
-    dueno_id = Column(Integer, ForeignKey("duenos.id"), nullable=False)
+    # Búsqueda de bajas a purgar (database/purga.py)
+    __table_args__ = (
+        Index("ix_pacientes_activo_fecha_baja", "activo", "fecha_baja"),
+    )
+
+    dueno_id = Column(Integer, ForeignKey("duenos.id"), nullable=False, index=True)
 
     dueno = relationship(
         "Dueno",
@@ -73,6 +236,40 @@ class Paciente(Base):
         order_by="Consulta.fecha"
     )
 
+    turnos = relationship(
+        "Turno",
+        back_populates="paciente"
+    )
+
+    # Nombres del catálogo, de solo lectura; para filtrar usar especie_id.
+    # En SQL son subconsultas correlacionadas: seleccionadas solas
+    # necesitan .select_from(Paciente).
+    @hybrid_property
+    def especie(self) -> str:
+        return _nombre_en_catalogo(self, Especie, self.especie_id)
+
+    @especie.expression
+    def especie(cls):
+        return (
+            select(Especie.nombre)
+            .where(Especie.id == cls.especie_id)
+            .scalar_subquery()
+            .label("especie")
+        )
+
+    @hybrid_property
+    def raza(self) -> str | None:
+        return _nombre_en_catalogo(self, Raza, self.raza_id)
+
+    @raza.expression
+    def raza(cls):
+        return (
+            select(Raza.nombre)
+            .where(Raza.id == cls.raza_id)
+            .scalar_subquery()
+            .label("raza")
+        )
+
     def __repr__(self):
         return f"<Paciente(id={self.id}, nombre='{self.nombre}', activo={self.activo})>"
 
@@ -80,19 +277,30 @@ class Paciente(Base):
 # ---------------------------------------------------------
 # VETERINARIO
 # ---------------------------------------------------------
-class Veterinario(Base):
+class Veterinario(Versionado, Base):
     __tablename__ = "veterinarios"
 
     id = Column(Integer, primary_key=True)
     nombre = Column(String, nullable=False)
     matricula = Column(String, unique=True)
     activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
+
+    # Búsqueda de bajas a purgar (database/purga.py)
+    __table_args__ = (
+        Index("ix_veterinarios_activo_fecha_baja", "activo", "fecha_baja"),
+    )
 
     consultas = relationship(
         "Consulta",
         back_populates="veterinario"
     )
 
+    turnos = relationship(
+        "Turno",
+        back_populates="veterinario"
+    )
+
     def __repr__(self):
         return f"<Veterinario(id={self.id}, nombre='{self.nombre}', activo={self.activo})>"
 
@@ -100,20 +308,21 @@ class Veterinario(Base):
 # ---------------------------------------------------------
 # CONSULTA
 # ---------------------------------------------------------
-class Consulta(Base):
+class Consulta(Versionado, Base):
     __tablename__ = "consultas"
 
     id = Column(Integer, primary_key=True)
     fecha = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     motivo = Column(String, nullable=False)
-    diagnostico = Column(Text)
-    observaciones = Column(Text)
+    diagnostico = Column(TextoComprimido)
+    observaciones = Column(TextoComprimido)
 
     activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
 
     paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
-    veterinario_id = Column(Integer, ForeignKey("veterinarios.id"), nullable=False)
+    veterinario_id = Column(Integer, ForeignKey("veterinarios.id"), nullable=False, index=True)
 
     paciente = relationship(
         "Paciente",
@@ -135,6 +344,11 @@ class Consulta(Base):
         back_populates="consulta"
     )
 
+    __table_args__ = (
+        Index("ix_consultas_paciente_fecha", "paciente_id", "fecha"),
+        Index("ix_consultas_activo_fecha_baja", "activo", "fecha_baja"),  # purga
+    )
+
     def __repr__(self):
         return f"<Consulta(id={self.id}, fecha={self.fecha.date()}, activo={self.activo})>"
 
@@ -142,7 +356,7 @@ class Consulta(Base):
 # ---------------------------------------------------------
 # ARCHIVO CLÍNICO
 # ---------------------------------------------------------
-class ArchivoClinico(Base):
+class ArchivoClinico(Versionado, Base):
     __tablename__ = "archivos_clinicos"
 
     id = Column(Integer, primary_key=True)
@@ -153,8 +367,17 @@ class ArchivoClinico(Base):
     fecha_subida = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
 
-    consulta_id = Column(Integer, ForeignKey("consultas.id"), nullable=False)
+    # Búsqueda de bajas a purgar (database/purga.py) e historial del paciente
+    __table_args__ = (
+        Index("ix_archivos_clinicos_activo_fecha_baja", "activo", "fecha_baja"),
+        Index("ix_archivos_clinicos_paciente_fecha", "paciente_id", "fecha_subida"),
+    )
+
+    consulta_id = Column(Integer, ForeignKey("consultas.id"), nullable=False, index=True)
+    # Copia del paciente de la consulta (ver sql_triggers_paciente)
+    paciente_id = Column(Integer, ForeignKey("pacientes.id"), server_default=FetchedValue())
 
     consulta = relationship(
         "Consulta",
@@ -168,32 +391,213 @@ class ArchivoClinico(Base):
 # ---------------------------------------------------------
 # TRATAMIENTO
 # ---------------------------------------------------------
-class Tratamiento(Base):
+class Tratamiento(Versionado, Base):
     __tablename__ = "tratamientos"
 
     id = Column(Integer, primary_key=True)
 
-    nombre = Column(String, nullable=False)
+    medicamento_id = Column(Integer, ForeignKey("medicamentos.id"), nullable=False, index=True)
     dosis = Column(String, nullable=False)
     frecuencia = Column(String)
     duracion = Column(String)
-    observaciones = Column(Text)
+    observaciones = Column(TextoComprimido)
+
+    # frecuencia y duracion interpretadas (ver database/posologia.py)
+    intervalo_horas = Column(Integer)
+    duracion_dias = Column(Integer)
 
     fecha_inicio = Column(Date, nullable=False, default=date.today)
     fecha_fin = Column(Date)
 
     activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
+
+    # Búsqueda de bajas a purgar (database/purga.py) e historial del paciente
+    __table_args__ = (
+        Index("ix_tratamientos_activo_fecha_baja", "activo", "fecha_baja"),
+        Index("ix_tratamientos_paciente_inicio", "paciente_id", "fecha_inicio"),
+        Index("ix_tratamientos_paciente_fin", "paciente_id", "fecha_fin"),
+    )
 
-    consulta_id = Column(Integer, ForeignKey("consultas.id"), nullable=False)
+    consulta_id = Column(Integer, ForeignKey("consultas.id"), nullable=False, index=True)
+    # Copia del paciente de la consulta (ver sql_triggers_paciente)
+    paciente_id = Column(Integer, ForeignKey("pacientes.id"), server_default=FetchedValue())
 
     consulta = relationship(
         "Consulta",
         back_populates="tratamientos"
     )
 
+    dosis_programadas = relationship(
+        "DosisProgramada",
+        back_populates="tratamiento",
+        order_by="DosisProgramada.fecha_hora"
+    )
+
+    # Nombre del medicamento, de solo lectura; para filtrar usar medicamento_id.
+    # Seleccionado solo necesita .select_from(Tratamiento) (ver Paciente.especie).
+    @hybrid_property
+    def nombre(self) -> str:
+        return _nombre_en_catalogo(self, Medicamento, self.medicamento_id)
+
+    @nombre.expression
+    def nombre(cls):
+        return (
+            select(Medicamento.nombre)
+            .where(Medicamento.id == cls.medicamento_id)
+            .scalar_subquery()
+            .label("nombre")
+        )
+
     def __repr__(self):
         return (
             f"<Tratamiento(id={self.id}, nombre='{self.nombre}', "
             f"inicio={self.fecha_inicio}, fin={self.fecha_fin}, activo={self.activo})>"
         )
 
+
+# ---------------------------------------------------------
+# DOSIS PROGRAMADA
+# ---------------------------------------------------------
+class DosisProgramada(Versionado, Base):
+    __tablename__ = "dosis_programadas"
+
+    id = Column(Integer, primary_key=True)
+    fecha_hora = Column(DateTime, nullable=False, index=True)
+
+    tratamiento_id = Column(Integer, ForeignKey("tratamientos.id"), nullable=False, index=True)
+
+    tratamiento = relationship(
+        "Tratamiento",
+        back_populates="dosis_programadas"
+    )
+
+    def __repr__(self):
+        return f"<DosisProgramada(tratamiento_id={self.tratamiento_id}, fecha_hora={self.fecha_hora})>"
+
+
+# ---------------------------------------------------------
+# TURNO
+# ---------------------------------------------------------
+class Turno(Versionado, Base):
+    __tablename__ = "turnos"
+
+    id = Column(Integer, primary_key=True)
+    inicio = Column(DateTime, nullable=False)
+    fin = Column(DateTime, nullable=False)
+    motivo = Column(String)
+
+    activo = Column(Boolean, default=True, nullable=False)
+    fecha_baja = Column(DateTime)  # cuándo se desactivó (soft delete)
+
+    veterinario_id = Column(Integer, ForeignKey("veterinarios.id"), nullable=False)
+    paciente_id = Column(Integer, ForeignKey("pacientes.id"), nullable=False, index=True)
+
+    veterinario = relationship(
+        "Veterinario",
+        back_populates="turnos"
+    )
+
+    paciente = relationship(
+        "Paciente",
+        back_populates="turnos"
+    )
+
+    __table_args__ = (
+        Index("ix_turnos_veterinario_inicio", "veterinario_id", "inicio"),
+        Index("ix_turnos_activo_fecha_baja", "activo", "fecha_baja"),  # purga
+    )
+
+    def __repr__(self):
+        return (
+            f"<Turno(id={self.id}, veterinario_id={self.veterinario_id}, "
+            f"inicio={self.inicio}, fin={self.fin}, activo={self.activo})>"
+        )
+
+
+# ---------------------------------------------------------
+# REGISTRO ELIMINADO (TOMBSTONE)
+# ---------------------------------------------------------
+class RegistroEliminado(Versionado, Base):
+    __tablename__ = "registros_eliminados"
+
+    id = Column(Integer, primary_key=True)
+    tabla = Column(String, nullable=False)
+    registro_id = Column(Integer, nullable=False)
+    datos = Column(Text, nullable=False)  # fila original en JSON
+
+    fecha_eliminacion = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_registros_eliminados_tabla_registro", "tabla", "registro_id"),
+    )
+
+    def __repr__(self):
+        return f"<RegistroEliminado(tabla='{self.tabla}', registro_id={self.registro_id})>"
+
+
+# ---------------------------------------------------------
+# AUDITORÍA (SOLO INSERCIÓN)
+# ---------------------------------------------------------
+class RegistroAuditoria(Base):
+    __tablename__ = "auditoria"
+
+    id = Column(Integer, primary_key=True)
+    tabla = Column(String, nullable=False)
+    registro_id = Column(Integer, nullable=False)
+    campo = Column(String, nullable=False)
+    valor_anterior = Column(Text)
+    valor_nuevo = Column(Text)
+    usuario = Column(String)
+
+    fecha = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_auditoria_tabla_registro_fecha", "tabla", "registro_id", "fecha"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<RegistroAuditoria(tabla='{self.tabla}', registro_id={self.registro_id}, "
+            f"campo='{self.campo}', fecha={self.fecha})>"
+        )
+
+
+# ---------------------------------------------------------
+# DICCIONARIO DE COMPRESIÓN
+# ---------------------------------------------------------
+class DiccionarioCompresion(Base):
+    __tablename__ = "diccionarios_compresion"
+
+    id = Column(Integer, primary_key=True)  # versión, guardada en cada valor comprimido
+    datos = Column(LargeBinary, nullable=False)
+    muestras = Column(Integer, nullable=False)
+
+    fecha_creacion = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<DiccionarioCompresion(version={self.id}, bytes={len(self.datos)}, "
+            f"muestras={self.muestras})>"
+        )
+
+
+# ---------------------------------------------------------
+# TRIGGERS DE VERSIÓN
+# ---------------------------------------------------------
+event.listen(
+    RelojCambios.__table__,
+    "after_create",
+    DDL("INSERT INTO reloj_cambios (id, valor) VALUES (1, 1)")
+)
+
+for _modelo in Versionado.__subclasses__():
+    for _sentencia in sql_triggers_version(_modelo.__tablename__):
+        event.listen(_modelo.__table__, "after_create", DDL(_sentencia))
+
+# ---------------------------------------------------------
+# TRIGGERS DEL PACIENTE DE TRATAMIENTOS Y ARCHIVOS
+# ---------------------------------------------------------
+for _modelo in (Tratamiento, ArchivoClinico):
+    for _sentencia in sql_triggers_paciente(_modelo.__tablename__):
+        event.listen(_modelo.__table__, "after_create", DDL(_sentencia))
@@ -0,0 +1,186 @@
+# database/modo_estricto.py
+#
+# Modo estricto para tests y staging: detecta patrones N+1.
+#
+# - Con activar_modo_estricto(SessionLocal), toda carga perezosa de una
+#   relación que tenga que ir a la base (Dueno.pacientes, Consulta.archivos,
+#   Paciente.dueno, ...) lanza CargaPerezosaNoPermitida indicando la
+#   relación y la línea de código que la disparó. Es el equivalente a usar
+#   raiseload(sql_only=True) como estrategia por defecto: las relaciones
+#   ya cargadas o resueltas desde el identity map siguen funcionando.
+# - Las cargas intencionales se habilitan con la lista `permitidas` o,
+#   en un bloque puntual, con permitir_carga_perezosa("Clase.relacion").
+# - presupuesto_sentencias(engine, maximo) falla en cuanto un request
+#   ejecuta más sentencias SQL de las previstas.
+#
+# init_db.py lo activa sobre SessionLocal si VETE_MODO_ESTRICTO=1.
+
+import contextvars
+import os
+import sys
+import weakref
+from collections.abc import Iterable
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+VARIABLE_ENTORNO = "VETE_MODO_ESTRICTO"
+
+# Archivos que no cuentan como "origen" de una carga o sentencia.
+_INTERNOS = (os.sep + "sqlalchemy" + os.sep, os.path.abspath(__file__))
+
+_permitidas_contexto: contextvars.ContextVar[frozenset | None] = contextvars.ContextVar(
+    "vete_cargas_permitidas", default=frozenset()
+)
+_presupuesto: contextvars.ContextVar["_Presupuesto | None"] = contextvars.ContextVar(
+    "vete_presupuesto_sentencias", default=None
+)
+_engines_observados: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+class CargaPerezosaNoPermitida(Exception):
+    """Se accedió a una relación no cargada con el modo estricto activo."""
+
+    def __init__(self, relacion: str, origen: str):
+        self.relacion = relacion
+        self.origen = origen
+        super().__init__(
+            f"Carga perezosa de {relacion} en {origen}. "
+            f"Cargala con selectinload()/joinedload() o agregala a las permitidas."
+        )
+
+
+class PresupuestoExcedido(Exception):
+    """Un bloque ejecutó más sentencias SQL que las presupuestadas."""
+
+    def __init__(self, descripcion: str, maximo: int, sentencias: list[tuple[str, str]]):
+        self.descripcion = descripcion
+        self.maximo = maximo
+        self.sentencias = sentencias
+        detalle = "\n".join(
+            f"  {i}. [{origen}] {sql.splitlines()[0][:100]}"
+            for i, (origen, sql) in enumerate(sentencias, start=1)
+        )
+        super().__init__(
+            f"{descripcion}: más de {maximo} sentencias SQL.\n{detalle}"
+        )
+
+
+def _origen() -> str:
+    """Primer frame de la pila que no pertenece a SQLAlchemy ni a este módulo."""
+
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if not any(interno in archivo for interno in _INTERNOS):
+            return f"{archivo}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return "<desconocido>"
+
+
+# ---------------------------------------------------------
+# CARGAS PEREZOSAS
+# ---------------------------------------------------------
+def activar_modo_estricto(
+    session_factory: sessionmaker,
+    *,
+    permitidas: Iterable[str] = ()
+) -> None:
+    """
+    Hace que las sesiones de `session_factory` rechacen las cargas
+    perezosas que ejecutan SQL. `permitidas` lista relaciones
+    ("Consulta.paciente") cuya carga perezosa es intencional.
+    """
+
+    permitidas = frozenset(permitidas)
+
+    def _verificar(estado) -> None:
+        if estado.lazy_loaded_from is None:
+            return  # consulta explícita o carga eager (selectinload, etc.)
+
+        relacion = str(estado.loader_strategy_path[-1])
+        extra = _permitidas_contexto.get()
+        if extra is None or relacion in permitidas or relacion in extra:
+            return
+
+        raise CargaPerezosaNoPermitida(relacion, _origen())
+
+    event.listen(session_factory, "do_orm_execute", _verificar)
+
+
+@contextmanager
+def permitir_carga_perezosa(*relaciones: str):
+    """
+    Habilita cargas perezosas dentro del bloque: solo las relaciones
+    indicadas o, sin argumentos, todas.
+    """
+
+    actuales = _permitidas_contexto.get()
+    if not relaciones or actuales is None:
+        nuevas = None
+    else:
+        nuevas = actuales | frozenset(relaciones)
+
+    token = _permitidas_contexto.set(nuevas)
+    try:
+        yield
+    finally:
+        _permitidas_contexto.reset(token)
+
+
+# ---------------------------------------------------------
+# PRESUPUESTO DE SENTENCIAS
+# ---------------------------------------------------------
+class _Presupuesto:
+    def __init__(self, descripcion: str, maximo: int):
+        self.descripcion = descripcion
+        self.maximo = maximo
+        self.sentencias: list[tuple[str, str]] = []
+
+    @property
+    def usadas(self) -> int:
+        return len(self.sentencias)
+
+
+def _contar_sentencia(conn, cursor, statement, parameters, context, executemany) -> None:
+    presupuesto = _presupuesto.get()
+    if presupuesto is None:
+        return
+
+    presupuesto.sentencias.append((_origen(), statement))
+    if presupuesto.usadas > presupuesto.maximo:
+        raise PresupuestoExcedido(
+            presupuesto.descripcion, presupuesto.maximo, presupuesto.sentencias
+        )
+
+
+@contextmanager
+def presupuesto_sentencias(
+    engine: Engine,
+    maximo: int,
+    *,
+    descripcion: str = "request"
+):
+    """
+    Falla con PresupuestoExcedido si dentro del bloque el engine ejecuta
+    más de `maximo` sentencias. Devuelve el presupuesto, cuyo atributo
+    `usadas` sirve para ajustar el límite.
+    """
+
+    if engine not in _engines_observados:
+        event.listen(engine, "before_cursor_execute", _contar_sentencia)
+        _engines_observados.add(engine)
+
+    presupuesto = _Presupuesto(descripcion, maximo)
+    token = _presupuesto.set(presupuesto)
+    try:
+        yield presupuesto
+    finally:
+        _presupuesto.reset(token)
+
+
+def modo_estricto_pedido() -> bool:
+    """True si VETE_MODO_ESTRICTO pide activar el modo estricto."""
+    return os.environ.get(VARIABLE_ENTORNO, "").lower() in ("1", "true", "si", "sí")
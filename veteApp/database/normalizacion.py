@@ -0,0 +1,148 @@
+# database/normalizacion.py
+
+import re
+import unicodedata
+
+# ---------------------------------------------------------
+# CLAVES NORMALIZADAS DE DUEÑOS
+# ---------------------------------------------------------
+# Se usan como claves de bloqueo para detectar duplicados:
+# dos dueños con la misma clave son candidatos a comparar.
+
+_NO_DIGITOS = re.compile(r"\D+")
+
+# Reglas fonéticas simplificadas para nombres en castellano,
+# aplicadas en orden sobre texto en minúsculas y sin acentos.
+_REGLAS_FONETICAS = [
+    (re.compile(r"ch"), "x"),
+    (re.compile(r"ll"), "y"),
+    (re.compile(r"qu"), "k"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"v"), "b"),
+    (re.compile(r"w"), "b"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"y(?=$)"), "i"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+# Largo de la parte local de un teléfono (sin característica ni prefijos).
+DIGITOS_TELEFONO = 8
+
+
+def _sin_acentos(texto: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def normalizar_dni(dni: str | None) -> str | None:
+    """Deja solo los dígitos del DNI, sin ceros a la izquierda."""
+
+    if not dni:
+        return None
+    digitos = _NO_DIGITOS.sub("", dni).lstrip("0")
+    return digitos or None
+
+
+def normalizar_telefono(telefono: str | None) -> str | None:
+    """
+    Deja solo los últimos dígitos del teléfono, así "011 15-4567-8901"
+    y "+54 9 11 4567 8901" generan la misma clave.
+    """
+
+    if not telefono:
+        return None
+    digitos = _NO_DIGITOS.sub("", telefono)
+    if len(digitos) < 6:
+        return None
+    return digitos[-DIGITOS_TELEFONO:]
+
+
+def normalizar_email(email: str | None) -> str | None:
+    """Email sin espacios y en minúsculas."""
+
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def clave_fonetica(nombre: str | None) -> str | None:
+    """
+    Clave fonética del nombre: cada palabra simplificada según cómo suena
+    y las palabras ordenadas, así "Pérez, Juan" y "juan peres" coinciden.
+    """
+
+    if not nombre:
+        return None
+
+    palabras = re.findall(r"[a-z]+", _sin_acentos(nombre.lower()))  # la ñ ya quedó como n
+    claves = []
+    for palabra in palabras:
+        for patron, reemplazo in _REGLAS_FONETICAS:
+            palabra = patron.sub(reemplazo, palabra)
+        if palabra:
+            claves.append(palabra)
+    return " ".join(sorted(claves)) or None
+
+
+# ---------------------------------------------------------
+# CATÁLOGOS (ESPECIES, RAZAS, MEDICAMENTOS)
+# ---------------------------------------------------------
+# La clave decide qué textos son el mismo valor del catálogo:
+# "Canino", "canino " y "Perro" terminan en la misma especie.
+
+_ESPACIOS = re.compile(r"\s+")
+
+SINONIMOS_ESPECIE = {
+    "perro": "canino",
+    "perra": "canino",
+    "canina": "canino",
+    "can": "canino",
+    "gato": "felino",
+    "gata": "felino",
+    "felina": "felino",
+}
+
+# Valor de especie o medicamento cuando el texto llega vacío.
+SIN_ESPECIFICAR = "Sin especificar"
+
+
+def _limpiar_nombre(texto: str) -> str | None:
+    limpio = _ESPACIOS.sub(" ", texto).strip()
+    if limpio.isupper():
+        limpio = limpio.lower()  # "FELINO" -> "Felino"
+    return (limpio[:1].upper() + limpio[1:]) or None
+
+
+def clave_catalogo(
+    texto: str | None,
+    sinonimos: dict[str, str] | None = None
+) -> str | None:
+    """Texto en minúsculas, sin acentos ni espacios de más, con sinónimos resueltos."""
+
+    if not texto:
+        return None
+    clave = _ESPACIOS.sub(" ", _sin_acentos(texto.lower())).strip()
+    if sinonimos:
+        clave = sinonimos.get(clave, clave)
+    return clave or None
+
+
+def nombre_catalogo(
+    texto: str | None,
+    sinonimos: dict[str, str] | None = None
+) -> str | None:
+    """
+    Nombre para mostrar de un valor nuevo: espacios colapsados, primera
+    letra en mayúscula y, si es un sinónimo, el canónico ("Perro" -> "Canino").
+    """
+
+    clave = clave_catalogo(texto)
+    if clave is None:
+        return None
+    if sinonimos and clave in sinonimos:
+        return _limpiar_nombre(sinonimos[clave])
+    return _limpiar_nombre(texto)
@@ -0,0 +1,81 @@
+# database/posologia.py
+
+import re
+import unicodedata
+
+# ---------------------------------------------------------
+# PARSEO DE FRECUENCIA Y DURACIÓN
+# ---------------------------------------------------------
+# Tratamiento.frecuencia y Tratamiento.duracion son texto libre
+# ("cada 8 hs", "2 veces por día", "7 días"). Estas funciones los
+# convierten a horas entre dosis y días de tratamiento; devuelven
+# None cuando el texto no se puede interpretar.
+
+_NUMERO = r"(\d+)"
+
+_ABREVIATURAS_FRECUENCIA = {
+    "sid": 24,
+    "bid": 12,
+    "tid": 8,
+    "qid": 6,
+    "diario": 24,
+    "diaria": 24,
+}
+
+_FRECUENCIAS = [
+    # "cada 8 hs", "c/8h", "cada 12 horas"
+    (re.compile(rf"(?:cada|c/)\s*{_NUMERO}\s*(?:h|hs|hrs?|horas?)\b"), lambda n: n),
+    # "cada 2 días"
+    (re.compile(rf"(?:cada|c/)\s*{_NUMERO}\s*(?:d|dias?)\b"), lambda n: n * 24),
+    # "cada día"
+    (re.compile(r"(?:cada|c/)\s*dia\b"), lambda n: 24),
+    # "2 veces por día", "3 veces al dia", "1 vez x dia"
+    (re.compile(rf"{_NUMERO}\s*(?:vez|veces)\s*(?:al|por|x)\s*dia\b"), lambda n: 24 // n if n else None),
+    # "una vez al día"
+    (re.compile(r"una\s*vez\s*(?:al|por|x)\s*dia\b"), lambda n: 24),
+]
+
+_DURACIONES = [
+    (re.compile(rf"{_NUMERO}\s*(?:d|dias?)\b"), 1),
+    (re.compile(rf"{_NUMERO}\s*(?:sem|semanas?)\b"), 7),
+    (re.compile(rf"{_NUMERO}\s*(?:mes|meses)\b"), 30),
+]
+
+
+def _normalizar(texto: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).strip()
+
+
+def parsear_frecuencia(frecuencia: str | None) -> int | None:
+    """Devuelve las horas entre dosis ("cada 8 hs" -> 8) o None."""
+
+    if not frecuencia:
+        return None
+
+    texto = _normalizar(frecuencia)
+    for patron, horas in _FRECUENCIAS:
+        coincidencia = patron.search(texto)
+        if coincidencia:
+            n = int(coincidencia.group(1)) if patron.groups else 1
+            resultado = horas(n)
+            return resultado if resultado and resultado > 0 else None
+
+    for palabra in re.findall(r"[a-z]+", texto):
+        if palabra in _ABREVIATURAS_FRECUENCIA:
+            return _ABREVIATURAS_FRECUENCIA[palabra]
+    return None
+
+
+def parsear_duracion(duracion: str | None) -> int | None:
+    """Devuelve la cantidad de días de tratamiento ("2 semanas" -> 14) o None."""
+
+    if not duracion:
+        return None
+
+    texto = _normalizar(duracion)
+    for patron, dias in _DURACIONES:
+        coincidencia = patron.search(texto)
+        if coincidencia:
+            return int(coincidencia.group(1)) * dias or None
+    return None
@@ -0,0 +1,279 @@
+# database/purga.py
+#
+# Purga definitiva de registros dados de baja (soft delete) hace más
+# de un período de retención, seguida de vacuum incremental y ANALYZE.
+#
+# Uso (desde veteApp/):
+#     python -m database.purga --dias 365 [--dry-run] [--tombstone]
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from database.models import (
+    ArchivoClinico,
+    Consulta,
+    DosisProgramada,
+    Dueno,
+    Paciente,
+    RegistroEliminado,
+    Tratamiento,
+    Turno,
+    Veterinario
+)
+
+# Orden de borrado: primero los hijos, después los padres.
+ORDEN_PURGA = [
+    ArchivoClinico,
+    Tratamiento,
+    Consulta,
+    Turno,
+    Paciente,
+    Veterinario,
+    Dueno,
+]
+
+# Hijos que impiden borrar un registro mientras existan: (modelo, columna FK).
+_HIJOS = {
+    Consulta: [(ArchivoClinico, "consulta_id"), (Tratamiento, "consulta_id")],
+    Paciente: [(Consulta, "paciente_id"), (Turno, "paciente_id")],
+    Veterinario: [(Consulta, "veterinario_id"), (Turno, "veterinario_id")],
+    Dueno: [(Paciente, "dueno_id")],
+}
+
+# Filas sin soft delete propio que se borran junto con su padre.
+_DEPENDIENTES = {
+    Tratamiento: [(DosisProgramada, "tratamiento_id")],
+}
+
+LOTE = 500
+PAUSA_ENTRE_LOTES = 0.05  # segundos, para dejar pasar a la aplicación
+PAGINAS_VACUUM = 1000     # páginas liberadas por cada paso de vacuum
+LIMITE_ANALISIS = 400     # PRAGMA analysis_limit: ANALYZE acotado
+
+
+# ---------------------------------------------------------
+# CONDICIÓN DE PURGA
+# ---------------------------------------------------------
+def _purgable(modelo, limite: datetime, tabla=None):
+    """
+    Condición para que una fila sea purgable: inactiva, dada de baja
+    antes del límite y sin hijos que no sean también purgables.
+    """
+
+    tabla = modelo.__table__ if tabla is None else tabla
+    condiciones = [
+        tabla.c.activo.is_(False),
+        tabla.c.fecha_baja.is_not(None),
+        tabla.c.fecha_baja < limite,
+    ]
+    for hijo, columna in _HIJOS.get(modelo, []):
+        tabla_hijo = hijo.__table__.alias()
+        condiciones.append(
+            ~exists().where(
+                tabla_hijo.c[columna] == tabla.c.id,
+                ~_purgable(hijo, limite, tabla_hijo)
+            )
+        )
+    return and_(*condiciones)
+
+
+# ---------------------------------------------------------
+# FECHAR BAJAS ANTERIORES
+# ---------------------------------------------------------
+def fechar_bajas_sin_fecha(
+    db: Session,
+    *,
+    lote: int = LOTE,
+    pausa: float = PAUSA_ENTRE_LOTES
+) -> int:
+    """
+    Asigna fecha_baja = ahora a los registros inactivos que no la tienen
+    (dados de baja antes de que existiera la columna), para que empiecen
+    a contar el período de retención desde hoy. Recorre cada tabla por
+    id en lotes confirmados por separado, como purgar_inactivos.
+    """
+
+    total = 0
+    ahora = datetime.utcnow()
+    for modelo in ORDEN_PURGA:
+        tabla = modelo.__table__
+        ultimo_id = 0
+        while True:
+            ids = db.scalars(
+                select(tabla.c.id)
+                .where(
+                    tabla.c.activo.is_(False),
+                    tabla.c.fecha_baja.is_(None),
+                    tabla.c.id > ultimo_id
+                )
+                .order_by(tabla.c.id)
+                .limit(lote)
+            ).all()
+            if not ids:
+                break
+
+            db.execute(update(tabla).where(tabla.c.id.in_(ids)).values(fecha_baja=ahora))
+            db.commit()
+
+            total += len(ids)
+            ultimo_id = ids[-1]
+            time.sleep(pausa)
+    return total
+
+
+# ---------------------------------------------------------
+# PURGA POR LOTES
+# ---------------------------------------------------------
+def purgar_inactivos(
+    db: Session,
+    *,
+    retencion: timedelta,
+    dry_run: bool = False,
+    tombstone: bool = False,
+    lote: int = LOTE,
+    pausa: float = PAUSA_ENTRE_LOTES
+) -> dict[str, int]:
+    """
+    Borra los registros inactivos hace más de `retencion`, tabla por
+    tabla respetando el orden de las FK, en lotes confirmados por separado
+    para no retener el lock de escritura más de unos milisegundos.
+
+    Con tombstone=True cada fila se copia en JSON a registros_eliminados
+    antes de borrarse. Con dry_run=True solo cuenta lo que se borraría.
+    Devuelve la cantidad de filas por tabla.
+    """
+
+    limite = datetime.utcnow() - retencion
+    resultado = {}
+
+    for modelo in ORDEN_PURGA:
+        tabla = modelo.__table__
+        condicion = _purgable(modelo, limite)
+
+        if dry_run:
+            resultado[tabla.name] = db.scalar(
+                select(func.count()).select_from(tabla).where(condicion)
+            )
+            continue
+
+        # Cursor por id: cada lote sigue desde el anterior en lugar de
+        # volver a recorrer las filas que no son purgables.
+        borradas = 0
+        ultimo_id = 0
+        while True:
+            filas = db.execute(
+                select(tabla)
+                .where(condicion, tabla.c.id > ultimo_id)
+                .order_by(tabla.c.id)
+                .limit(lote)
+            ).mappings().all()
+            if not filas:
+                break
+
+            ids = [fila["id"] for fila in filas]
+            ultimo_id = ids[-1]
+            if tombstone:
+                db.execute(
+                    insert(RegistroEliminado),
+                    [
+                        {
+                            "tabla": tabla.name,
+                            "registro_id": fila["id"],
+                            "datos": json.dumps(dict(fila), default=str),
+                        }
+                        for fila in filas
+                    ]
+                )
+            for dependiente, columna in _DEPENDIENTES.get(modelo, []):
+                db.execute(
+                    delete(dependiente.__table__)
+                    .where(dependiente.__table__.c[columna].in_(ids))
+                )
+            db.execute(delete(tabla).where(tabla.c.id.in_(ids)))
+            db.commit()
+
+            borradas += len(ids)
+            time.sleep(pausa)
+
+        resultado[tabla.name] = borradas
+
+    return resultado
+
+
+# ---------------------------------------------------------
+# COMPACTACIÓN
+# ---------------------------------------------------------
+def compactar(
+    db: Session,
+    *,
+    paginas: int = PAGINAS_VACUUM,
+    pausa: float = PAUSA_ENTRE_LOTES
+) -> int:
+    """
+    Devuelve al sistema las páginas libres con vacuum incremental, de a
+    `paginas` por vez, y actualiza las estadísticas con un ANALYZE acotado.
+
+    Requiere auto_vacuum = INCREMENTAL (lo fija init_db en bases nuevas;
+    una base existente necesita un VACUUM completo una única vez).
+    Devuelve la cantidad de páginas liberadas.
+    """
+
+    liberadas = 0
+    conexion = db.connection()
+
+    if conexion.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+        libres = conexion.exec_driver_sql("PRAGMA freelist_count").scalar()
+        while libres:
+            conexion.exec_driver_sql(f"PRAGMA incremental_vacuum({paginas})")
+            db.commit()
+            conexion = db.connection()
+            restantes = conexion.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if restantes >= libres:
+                break
+            liberadas += libres - restantes
+            libres = restantes
+            time.sleep(pausa)
+
+    conexion.exec_driver_sql(f"PRAGMA analysis_limit = {LIMITE_ANALISIS}")
+    conexion.exec_driver_sql("ANALYZE")
+    db.commit()
+    return liberadas
+
+
+def main() -> None:
+    from database.init_db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Purga registros dados de baja.")
+    parser.add_argument("--dias", type=int, required=True, help="período de retención")
+    parser.add_argument("--dry-run", action="store_true", help="solo contar")
+    parser.add_argument("--tombstone", action="store_true", help="guardar copia JSON")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if not args.dry_run:
+            fechadas = fechar_bajas_sin_fecha(db, lote=args.lote)
+            if fechadas:
+                print(f"{fechadas} bajas sin fecha quedaron fechadas hoy.")
+
+        resultado = purgar_inactivos(
+            db,
+            retencion=timedelta(days=args.dias),
+            dry_run=args.dry_run,
+            tombstone=args.tombstone,
+            lote=args.lote
+        )
+        for tabla, cantidad in resultado.items():
+            print(f"{tabla:<20}{cantidad:>10}")
+
+        if not args.dry_run:
+            print(f"Páginas liberadas: {compactar(db)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,589 @@
+# database/replicacion.py
+#
+# Replicación continua de vete.db a un directorio de respaldo (otra
+# carpeta u otro disco local), enviando los frames del WAL a medida que
+# se confirman, sin copiar la base entera.
+#
+# Cómo funciona:
+# - La primaria pasa a journal_mode=WAL. El replicador mantiene abierta
+#   una transacción de lectura: mientras exista, ningún checkpoint puede
+#   reiniciar el WAL, así que los frames nuevos siempre se agregan al
+#   final y se pueden leer del archivo -wal sin tocar la base.
+# - Cada cierto intervalo lee los frames nuevos (hasta el tamaño que tenía
+#   el WAL al empezar), valida sal y checksum como lo hace SQLite y guarda
+#   los que forman transacciones completas en un segmento. La escritura
+#   de la aplicación no pasa por acá.
+# - Una "generación" es una copia base (backup API) más los segmentos
+#   que la siguen. `actual.db` es la réplica al día: cada segmento se
+#   aplica sobre ella apenas se guarda.
+# - Cuando el WAL crece, el replicador suelta la lectura, hace un
+#   checkpoint PASSIVE y, si todo lo enviado quedó en la base, deja que
+#   el WAL se reinicie. Si detecta un reinicio que no puede garantizar
+#   (frames que pudieron perderse), arranca una generación nueva.
+#
+# Uso (desde veteApp/):
+#     python -m database.replicacion replicar --destino /mnt/respaldo/vete
+#     python -m database.replicacion restaurar --destino /mnt/respaldo/vete \
+#         --salida vete_restaurada.db [--hasta "2026-10-19 12:30"]
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+INTERVALO = 1.0              # segundos entre lecturas del WAL
+FRAMES_ROTACION = 4000       # frames en el WAL antes de intentar reiniciarlo
+INTENTOS_SIN_BLOQUEO = 3     # rotaciones fallidas antes de frenar escritores
+VIDA_GENERACION = 24 * 3600  # segundos: acota el tiempo de restauración
+GENERACIONES = 2             # generaciones que se conservan
+
+_CABECERA_WAL = 32
+_CABECERA_FRAME = 24
+_ORDEN_CHECKSUM = {0x377F0682: "<", 0x377F0683: ">"}
+
+
+# ---------------------------------------------------------
+# FORMATO DEL WAL
+# ---------------------------------------------------------
+class CabeceraWal(NamedTuple):
+    orden: str              # orden de bytes de los checksums
+    tamano_pagina: int
+    secuencia: int          # se incrementa en cada reinicio del WAL
+    sal: tuple[int, int]
+    checksum: tuple[int, int]
+
+
+def _checksum(datos: bytes, s0: int, s1: int, orden: str) -> tuple[int, int]:
+    """Checksum acumulativo del WAL (https://www.sqlite.org/fileformat.html)."""
+
+    for par, impar in struct.iter_unpack(f"{orden}2I", datos):
+        s0 = (s0 + par + s1) & 0xFFFFFFFF
+        s1 = (s1 + impar + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+def _leer_cabecera(archivo) -> CabeceraWal | None:
+    archivo.seek(0)
+    datos = archivo.read(_CABECERA_WAL)
+    if len(datos) < _CABECERA_WAL:
+        return None
+
+    magic, _, pagina, secuencia, sal1, sal2, c1, c2 = struct.unpack(">8I", datos)
+    orden = _ORDEN_CHECKSUM.get(magic)
+    if orden is None or _checksum(datos[:24], 0, 0, orden) != (c1, c2):
+        return None
+    return CabeceraWal(orden, pagina, secuencia, (sal1, sal2), (c1, c2))
+
+
+def _leer_frames(
+    archivo,
+    cabecera: CabeceraWal,
+    offset: int,
+    checksum: tuple[int, int],
+    limite: int
+) -> tuple[bytes, int, tuple[int, int]]:
+    """
+    Lee desde `offset` hasta `limite` (bytes) los frames válidos que
+    terminan en un commit. El límite es el tamaño del WAL al empezar el
+    paso: lo que los escritores agreguen mientras tanto queda para el
+    siguiente, así un paso no persigue al WAL indefinidamente.
+    Devuelve (frames, offset siguiente, checksum acumulado).
+    """
+
+    tamano = _CABECERA_FRAME + cabecera.tamano_pagina
+    archivo.seek(offset)
+
+    confirmados = []
+    pendientes = []
+    s0, s1 = checksum
+    fin, checksum_fin = offset, checksum
+    while archivo.tell() + tamano <= limite and len(frame := archivo.read(tamano)) == tamano:
+        _, paginas_base, sal1, sal2, c1, c2 = struct.unpack(">6I", frame[:_CABECERA_FRAME])
+        if (sal1, sal2) != cabecera.sal:
+            break
+        s0, s1 = _checksum(frame[:8], s0, s1, cabecera.orden)
+        s0, s1 = _checksum(frame[_CABECERA_FRAME:], s0, s1, cabecera.orden)
+        if (s0, s1) != (c1, c2):
+            break
+
+        pendientes.append(frame)
+        if paginas_base:  # frame de commit
+            confirmados.extend(pendientes)
+            pendientes.clear()
+            fin = archivo.tell()
+            checksum_fin = (s0, s1)
+
+    return b"".join(confirmados), fin, checksum_fin
+
+
+def _aplicar_frames(base: Path, frames: bytes, tamano_pagina: int) -> None:
+    """Escribe las páginas de los frames sobre un archivo de base de datos."""
+
+    tamano = _CABECERA_FRAME + tamano_pagina
+    with open(base, "r+b") as archivo:
+        for inicio in range(0, len(frames), tamano):
+            pagina, paginas_base = struct.unpack(">2I", frames[inicio:inicio + 8])
+            archivo.seek((pagina - 1) * tamano_pagina)
+            archivo.write(frames[inicio + _CABECERA_FRAME:inicio + tamano])
+            if paginas_base:
+                archivo.truncate(paginas_base * tamano_pagina)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+
+
+def _escribir_atomico(ruta: Path, datos: bytes) -> None:
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    with open(temporal, "wb") as archivo:
+        archivo.write(datos)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+
+# ---------------------------------------------------------
+# ESTADO Y MÉTRICAS
+# ---------------------------------------------------------
+class Posicion(NamedTuple):
+    """Hasta dónde se envió el WAL actual de la primaria."""
+
+    sal: tuple[int, int] | None
+    secuencia: int | None
+    offset: int
+    checksum: tuple[int, int] | None
+    indice: int = 0                 # último segmento escrito
+    reinicio_seguro: bool = False   # todo lo enviado ya está en la base
+
+
+class MetricasReplicacion:
+    def __init__(self):
+        self.segmentos = 0
+        self.frames = 0
+        self.bytes = 0
+        self.generaciones = 0
+        self.retraso = 0.0       # segundos entre la escritura en la primaria y el envío
+        self.retraso_max = 0.0
+        self.ultimo_envio: float | None = None
+
+    def registrar_envio(self, frames: int, bytes_: int, escrito: float) -> None:
+        ahora = time.time()
+        self.segmentos += 1
+        self.frames += frames
+        self.bytes += bytes_
+        self.retraso = max(0.0, ahora - escrito)
+        self.retraso_max = max(self.retraso_max, self.retraso)
+        self.ultimo_envio = ahora
+
+    def __repr__(self):
+        return (
+            f"<MetricasReplicacion(segmentos={self.segmentos}, frames={self.frames}, "
+            f"retraso={self.retraso * 1000:.1f} ms, max={self.retraso_max * 1000:.1f} ms)>"
+        )
+
+
+# ---------------------------------------------------------
+# REPLICADOR
+# ---------------------------------------------------------
+class Replicador:
+    """Envía los frames confirmados de `primaria` a `destino`."""
+
+    def __init__(
+        self,
+        primaria: str | Path,
+        destino: str | Path,
+        *,
+        intervalo: float = INTERVALO,
+        frames_rotacion: int = FRAMES_ROTACION,
+        vida_generacion: float = VIDA_GENERACION,
+        generaciones: int = GENERACIONES
+    ):
+        self.primaria = Path(primaria)
+        self.wal = Path(f"{self.primaria}-wal")
+        self.destino = Path(destino)
+        self.intervalo = intervalo
+        self.frames_rotacion = frames_rotacion
+        self.vida_generacion = vida_generacion
+        self.generaciones = generaciones
+        self.metricas = MetricasReplicacion()
+
+        self._lector: sqlite3.Connection | None = None
+        self._carpeta: Path | None = None
+        self._inicio_generacion = 0.0
+        self._tamano_pagina = 0
+        self._pos = Posicion(None, None, _CABECERA_WAL, None)
+        self._rotaciones_fallidas = 0
+        self._detener = threading.Event()
+
+    # --- ciclo de vida ---
+
+    def iniciar(self) -> None:
+        self.destino.mkdir(parents=True, exist_ok=True)
+        self._lector = sqlite3.connect(
+            self.primaria, isolation_level=None, check_same_thread=False
+        )
+        self._lector.execute("PRAGMA busy_timeout = 5000")
+        modo = self._lector.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if modo != "wal":
+            raise RuntimeError(f"No se pudo pasar {self.primaria} a modo WAL ({modo}).")
+        self._tamano_pagina = self._lector.execute("PRAGMA page_size").fetchone()[0]
+
+        self._abrir_lectura()
+        if not self._retomar():
+            self._nueva_generacion()
+
+    def ejecutar(self) -> None:
+        """Replica hasta que se llame a detener()."""
+
+        if self._lector is None:
+            self.iniciar()
+        try:
+            while not self._detener.is_set():
+                self.paso()
+                self._detener.wait(self.intervalo)
+        finally:
+            self.cerrar()
+
+    def detener(self) -> None:
+        self._detener.set()
+
+    def cerrar(self) -> None:
+        if self._lector is not None:
+            self._lector.close()
+            self._lector = None
+
+    # --- lectura sostenida ---
+
+    def _abrir_lectura(self) -> None:
+        self._lector.execute("BEGIN")
+        self._lector.execute("SELECT count(*) FROM sqlite_master").fetchone()
+
+    def _cerrar_lectura(self) -> None:
+        self._lector.execute("COMMIT")
+
+    # --- envío ---
+
+    def paso(self) -> int:
+        """Envía los frames confirmados nuevos. Devuelve cuántos se enviaron."""
+
+        enviados = self._enviar()
+        if enviados is None:
+            self._nueva_generacion()
+            return 0
+
+        frames_wal = (self._pos.offset - _CABECERA_WAL) // (_CABECERA_FRAME + self._tamano_pagina)
+        if frames_wal >= self.frames_rotacion and not self._pos.reinicio_seguro:
+            self._rotar()
+        if time.time() - self._inicio_generacion >= self.vida_generacion:
+            self._nueva_generacion()
+        return enviados
+
+    def _enviar(self) -> int | None:
+        """Envía lo pendiente; None si se perdió la continuidad con la primaria."""
+
+        try:
+            archivo = open(self.wal, "rb")
+        except FileNotFoundError:
+            return 0 if self._aceptar_cabecera(None) else None
+
+        with archivo:
+            cabecera = _leer_cabecera(archivo)
+            if cabecera is None or cabecera.sal != self._pos.sal:
+                if not self._aceptar_cabecera(cabecera):
+                    return None
+                if cabecera is None:
+                    return 0
+
+            estado = os.fstat(archivo.fileno())
+            frames, offset, checksum = _leer_frames(
+                archivo, cabecera, self._pos.offset, self._pos.checksum, estado.st_size
+            )
+
+        if not frames:
+            return 0
+
+        indice = self._pos.indice + 1
+        nombre = f"{indice:010d}-{int(time.time() * 1000)}.seg"
+        _escribir_atomico(self._carpeta / "segmentos" / nombre, frames)
+        _aplicar_frames(self._carpeta / "actual.db", frames, self._tamano_pagina)
+
+        self._pos = self._pos._replace(
+            offset=offset, checksum=checksum, indice=indice, reinicio_seguro=False
+        )
+        self._guardar_posicion()
+
+        cantidad = len(frames) // (_CABECERA_FRAME + self._tamano_pagina)
+        self.metricas.registrar_envio(cantidad, len(frames), estado.st_mtime)
+        return cantidad
+
+    def _aceptar_cabecera(self, cabecera: CabeceraWal | None) -> bool:
+        """
+        El WAL cambió (se reinició, se truncó o apareció). Devuelve True
+        si se puede seguir en la misma generación sin perder frames.
+        """
+
+        if cabecera is None:
+            # WAL vacío o truncado: nada nuevo, pero solo es seguro si ya
+            # estaba todo enviado y en la base.
+            return self._pos.sal is None or self._pos.reinicio_seguro
+
+        seguro = (
+            self._pos.sal is None
+            or (self._pos.reinicio_seguro and cabecera.secuencia == self._pos.secuencia + 1)
+        )
+        if not seguro:
+            return False
+
+        self._pos = self._pos._replace(
+            sal=cabecera.sal,
+            secuencia=cabecera.secuencia,
+            offset=_CABECERA_WAL,
+            checksum=cabecera.checksum,
+            reinicio_seguro=False
+        )
+        self._guardar_posicion()
+
+        # Renovar la lectura para que vuelva a frenar reinicios del WAL nuevo.
+        self._cerrar_lectura()
+        self._abrir_lectura()
+        return True
+
+    def _rotar(self) -> None:
+        """
+        Deja que el WAL se reinicie: checkpoint PASSIVE sin la lectura
+        sostenida. Si entre el último envío y el checkpoint se escribieron
+        frames, no es seguro y se reintenta en el próximo paso; después de
+        INTENTOS_SIN_BLOQUEO fallos se frena a los escritores mientras dura.
+        """
+
+        bloqueo = None
+        if self._rotaciones_fallidas >= INTENTOS_SIN_BLOQUEO:
+            bloqueo = sqlite3.connect(self.primaria, isolation_level=None, timeout=30)
+            bloqueo.execute("BEGIN IMMEDIATE")
+
+        try:
+            if self._enviar() is None:
+                return
+
+            self._cerrar_lectura()
+            try:
+                ocupado, frames_log, copiados = self._lector.execute(
+                    "PRAGMA wal_checkpoint(PASSIVE)"
+                ).fetchone()
+            finally:
+                self._abrir_lectura()
+
+            enviados = (self._pos.offset - _CABECERA_WAL) // (_CABECERA_FRAME + self._tamano_pagina)
+            if ocupado == 0 and frames_log == copiados == enviados:
+                self._pos = self._pos._replace(reinicio_seguro=True)
+                self._guardar_posicion()
+                self._rotaciones_fallidas = 0
+            else:
+                self._rotaciones_fallidas += 1
+        finally:
+            if bloqueo is not None:
+                bloqueo.execute("ROLLBACK")
+                bloqueo.close()
+
+    # --- generaciones ---
+
+    def _nueva_generacion(self) -> None:
+        """Copia base consistente con el WAL actual; los segmentos siguen desde ahí."""
+
+        self._inicio_generacion = time.time()
+        carpeta = self.destino / datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        (carpeta / "segmentos").mkdir(parents=True)
+
+        # La lectura sostenida se abre antes de leer la cabecera: desde ese
+        # momento el WAL no puede reiniciarse. Aplicar todo el WAL desde el
+        # principio sobre una copia tomada después es correcto, porque cada
+        # frame deja la página como estaba en ese punto.
+        self._cerrar_lectura()
+        self._abrir_lectura()
+        try:
+            with open(self.wal, "rb") as archivo:
+                cabecera = _leer_cabecera(archivo)
+        except FileNotFoundError:
+            cabecera = None
+
+        temporal = carpeta / "base.db.tmp"
+        copia = sqlite3.connect(temporal)
+        try:
+            self._lector.backup(copia)
+        finally:
+            copia.close()
+        with open(temporal, "rb+") as archivo:
+            os.fsync(archivo.fileno())
+        os.replace(temporal, carpeta / "base.db")
+        shutil.copyfile(carpeta / "base.db", carpeta / "actual.db")
+
+        _escribir_atomico(carpeta / "generacion.json", json.dumps({
+            "primaria": str(self.primaria.resolve()),
+            "inicio": self._inicio_generacion,
+            "tamano_pagina": self._tamano_pagina,
+        }).encode())
+
+        self._carpeta = carpeta
+        if cabecera is None:
+            self._pos = Posicion(None, None, _CABECERA_WAL, None)
+        else:
+            self._pos = Posicion(cabecera.sal, cabecera.secuencia, _CABECERA_WAL, cabecera.checksum)
+        self._guardar_posicion()
+        self.metricas.generaciones += 1
+        self._podar_generaciones()
+
+    def _guardar_posicion(self) -> None:
+        _escribir_atomico(
+            self._carpeta / "posicion.json",
+            json.dumps(self._pos._asdict()).encode()
+        )
+
+    def _retomar(self) -> bool:
+        """Sigue la última generación si la primaria no cambió desde entonces."""
+
+        generaciones = _generaciones(self.destino)
+        if not generaciones:
+            return False
+        carpeta = generaciones[-1]
+        try:
+            datos = json.loads((carpeta / "posicion.json").read_text())
+            meta = json.loads((carpeta / "generacion.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if meta["primaria"] != str(self.primaria.resolve()):
+            return False
+        if time.time() - meta["inicio"] >= self.vida_generacion:
+            return False
+
+        pos = Posicion(
+            sal=tuple(datos["sal"]) if datos["sal"] else None,
+            secuencia=datos["secuencia"],
+            offset=datos["offset"],
+            checksum=tuple(datos["checksum"]) if datos["checksum"] else None,
+            indice=datos["indice"],
+            reinicio_seguro=datos["reinicio_seguro"]
+        )
+        try:
+            with open(self.wal, "rb") as archivo:
+                cabecera = _leer_cabecera(archivo)
+        except FileNotFoundError:
+            cabecera = None
+
+        # Mientras el replicador estuvo detenido el WAL pudo reiniciarse
+        # cualquier cantidad de veces: solo se retoma si sigue siendo el mismo.
+        if pos.sal is not None and (cabecera is None or cabecera.sal != pos.sal):
+            return False
+        if pos.sal is None and cabecera is not None:
+            return False
+
+        self._carpeta = carpeta
+        self._inicio_generacion = meta["inicio"]
+        self._pos = pos
+        return True
+
+    def _podar_generaciones(self) -> None:
+        for carpeta in _generaciones(self.destino)[:-self.generaciones]:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    # --- observación ---
+
+    def bytes_pendientes(self) -> int:
+        """Bytes del WAL todavía no enviados (cota superior)."""
+
+        try:
+            return max(0, self.wal.stat().st_size - self._pos.offset)
+        except FileNotFoundError:
+            return 0
+
+
+def _generaciones(destino: Path) -> list[Path]:
+    if not destino.exists():
+        return []
+    return sorted(
+        carpeta for carpeta in destino.iterdir()
+        if (carpeta / "generacion.json").exists()
+    )
+
+
+# ---------------------------------------------------------
+# RESTAURACIÓN
+# ---------------------------------------------------------
+def restaurar(
+    destino: str | Path,
+    salida: str | Path,
+    *,
+    hasta: datetime | None = None
+) -> Path:
+    """
+    Reconstruye la base en `salida`: el último estado replicado o, con
+    `hasta`, el último estado enviado hasta ese momento (hora local).
+    """
+
+    destino = Path(destino)
+    salida = Path(salida)
+    limite = hasta.timestamp() if hasta is not None else None
+
+    candidatas = []
+    for carpeta in _generaciones(destino):
+        meta = json.loads((carpeta / "generacion.json").read_text())
+        if limite is None or meta["inicio"] <= limite:
+            candidatas.append((carpeta, meta))
+    if not candidatas:
+        raise FileNotFoundError(f"No hay generaciones en {destino} para {hasta or 'restaurar'}.")
+    carpeta, meta = candidatas[-1]
+
+    for sufijo in ("-wal", "-shm"):
+        Path(f"{salida}{sufijo}").unlink(missing_ok=True)
+
+    if limite is None:
+        shutil.copyfile(carpeta / "actual.db", salida)
+        return salida
+
+    shutil.copyfile(carpeta / "base.db", salida)
+    for segmento in sorted((carpeta / "segmentos").glob("*.seg")):
+        enviado = int(segmento.stem.split("-")[1]) / 1000
+        if enviado > limite:
+            break
+        _aplicar_frames(salida, segmento.read_bytes(), meta["tamano_pagina"])
+    return salida
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replicación continua de vete.db.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    replicar = sub.add_parser("replicar", help="enviar frames del WAL en forma continua")
+    replicar.add_argument("--primaria", default="vete.db")
+    replicar.add_argument("--destino", required=True)
+    replicar.add_argument("--intervalo", type=float, default=INTERVALO, help="segundos")
+
+    restauracion = sub.add_parser("restaurar", help="reconstruir la base desde el respaldo")
+    restauracion.add_argument("--destino", required=True)
+    restauracion.add_argument("--salida", required=True)
+    restauracion.add_argument("--hasta", type=datetime.fromisoformat, help="AAAA-MM-DD HH:MM[:SS]")
+
+    args = parser.parse_args()
+
+    if args.comando == "restaurar":
+        salida = restaurar(args.destino, args.salida, hasta=args.hasta)
+        with sqlite3.connect(salida) as con:
+            print(f"{salida}: {con.execute('PRAGMA quick_check').fetchone()[0]}")
+        return
+
+    replicador = Replicador(args.primaria, args.destino, intervalo=args.intervalo)
+    replicador.iniciar()
+    print(f"Replicando {args.primaria} en {args.destino} (Ctrl+C para salir).")
+    try:
+        replicador.ejecutar()
+    except KeyboardInterrupt:
+        replicador.detener()
+    print(replicador.metricas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# database/servicios.py
+#
+# Altas validadas: antes de insertar verifican en una sola consulta que
+# los registros referenciados existan y estén activos, y lanzan la
+# excepción de dominio precisa. Las funciones de database/crud no
+# validan; con PRAGMA foreign_keys activo (ver init_db.py) la base
+# igual rechaza IDs inexistentes, pero con un IntegrityError genérico
+# y recién al hacer flush.
+
+from datetime import date
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from database.crud.archivo_clinico import crear_archivo_clinico
+from database.crud.consulta import crear_consulta
+from database.crud.tratamiento import crear_tratamiento
+from database.models import ArchivoClinico, Consulta, Paciente, Tratamiento, Veterinario
+from exceptions.domain import (
+    ConsultaNoEncontrada,
+    PacienteInactivo,
+    PacienteNoEncontrado,
+    VeterinarioInactivo,
+    VeterinarioNoEncontrado
+)
+
+# Cada subconsulta devuelve `activo` del registro, o NULL si no existe.
+_PADRES_DE_CONSULTA = select(
+    select(Paciente.activo)
+    .where(Paciente.id == bindparam("paciente_id"))
+    .scalar_subquery()
+    .label("paciente"),
+    select(Veterinario.activo)
+    .where(Veterinario.id == bindparam("veterinario_id"))
+    .scalar_subquery()
+    .label("veterinario")
+)
+
+_PADRES_DE_DETALLE = select(
+    select(Consulta.activo)
+    .where(Consulta.id == bindparam("consulta_id"))
+    .scalar_subquery()
+    .label("consulta"),
+    select(Paciente.activo)
+    .join(Consulta, Consulta.paciente_id == Paciente.id)
+    .where(Consulta.id == bindparam("consulta_id"))
+    .scalar_subquery()
+    .label("paciente")
+)
+
+
+def _verificar_consulta(db: Session, consulta_id: int) -> None:
+    """ConsultaNoEncontrada si no existe o está inactiva; PacienteInactivo si lo está su paciente."""
+
+    consulta, paciente = db.execute(_PADRES_DE_DETALLE, {"consulta_id": consulta_id}).one()
+    if not consulta:
+        raise ConsultaNoEncontrada(f"No existe una consulta activa con ID {consulta_id}")
+    if not paciente:
+        raise PacienteInactivo(f"El paciente de la consulta {consulta_id} está dado de baja")
+
+
+# ---------------------------------------------------------
+# CREAR CONSULTA VALIDADA
+# ---------------------------------------------------------
+def crear_consulta_validada(
+    db: Session,
+    *,
+    paciente_id: int,
+    veterinario_id: int,
+    motivo: str,
+    diagnostico: str | None = None,
+    observaciones: str | None = None
+) -> Consulta:
+    """
+    Igual que crear_consulta, pero lanza PacienteNoEncontrado,
+    PacienteInactivo, VeterinarioNoEncontrado o VeterinarioInactivo
+    si corresponde.
+    """
+
+    paciente, veterinario = db.execute(
+        _PADRES_DE_CONSULTA,
+        {"paciente_id": paciente_id, "veterinario_id": veterinario_id}
+    ).one()
+
+    if paciente is None:
+        raise PacienteNoEncontrado(f"No existe el paciente con ID {paciente_id}")
+    if not paciente:
+        raise PacienteInactivo(f"El paciente {paciente_id} está dado de baja")
+    if veterinario is None:
+        raise VeterinarioNoEncontrado(f"No existe el veterinario con ID {veterinario_id}")
+    if not veterinario:
+        raise VeterinarioInactivo(f"El veterinario {veterinario_id} está dado de baja")
+
+    return crear_consulta(
+        db,
+        paciente_id=paciente_id,
+        veterinario_id=veterinario_id,
+        motivo=motivo,
+        diagnostico=diagnostico,
+        observaciones=observaciones
+    )
+
+
+# ---------------------------------------------------------
+# CREAR TRATAMIENTO VALIDADO
+# ---------------------------------------------------------
+def crear_tratamiento_validado(
+    db: Session,
+    *,
+    nombre: str,
+    dosis: str,
+    frecuencia: str | None = None,
+    duracion: str | None = None,
+    observaciones: str | None = None,
+    fecha_inicio: date,
+    fecha_fin: date | None = None,
+    consulta_id: int
+) -> Tratamiento:
+    """
+    Igual que crear_tratamiento, pero lanza ConsultaNoEncontrada o
+    PacienteInactivo si corresponde.
+    """
+
+    _verificar_consulta(db, consulta_id)
+    return crear_tratamiento(
+        db,
+        nombre=nombre,
+        dosis=dosis,
+        frecuencia=frecuencia,
+        duracion=duracion,
+        observaciones=observaciones,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        consulta_id=consulta_id
+    )
+
+
+# ---------------------------------------------------------
+# CREAR ARCHIVO CLÍNICO VALIDADO
+# ---------------------------------------------------------
+def crear_archivo_clinico_validado(
+    db: Session,
+    *,
+    consulta_id: int,
+    nombre_original: str,
+    ruta_archivo: str,
+    tipo: str
+) -> ArchivoClinico:
+    """
+    Igual que crear_archivo_clinico, pero lanza ConsultaNoEncontrada o
+    PacienteInactivo si corresponde.
+    """
+
+    _verificar_consulta(db, consulta_id)
+    return crear_archivo_clinico(
+        db,
+        consulta_id=consulta_id,
+        nombre_original=nombre_original,
+        ruta_archivo=ruta_archivo,
+        tipo=tipo
+    )
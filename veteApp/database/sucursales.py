@@ -0,0 +1,149 @@
+# database/sucursales.py
+
+import heapq
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.init_db import crear_engine, inicializar_base
+from database.models import Dueno
+from database.crud.dueno import obtener_dueno_por_dni
+
+# ---------------------------
+# CONFIGURACIÓN DE SUCURSALES
+# ---------------------------
+
+# Cada sucursal tiene su propio archivo SQLite con el mismo esquema
+# que vete.db, así una importación pesada en una sucursal no bloquea
+# a las demás.
+DIRECTORIO_SUCURSALES = Path("sucursales")
+PATRON_ARCHIVO = "vete_{clinica_id}.db"
+
+_engines: dict[int, Engine] = {}
+_sesiones: dict[int, sessionmaker] = {}
+_lock = threading.Lock()
+
+
+def ruta_sucursal(clinica_id: int) -> Path:
+    """Devuelve la ruta del archivo SQLite de una sucursal."""
+    return DIRECTORIO_SUCURSALES / PATRON_ARCHIVO.format(clinica_id=clinica_id)
+
+
+def listar_sucursales() -> list[int]:
+    """Devuelve los IDs de las sucursales que ya tienen archivo de base."""
+
+    prefijo, _, sufijo = PATRON_ARCHIVO.partition("{clinica_id}")
+    ids = []
+    for archivo in DIRECTORIO_SUCURSALES.glob(f"{prefijo}*{sufijo}"):
+        valor = archivo.name[len(prefijo):len(archivo.name) - len(sufijo)]
+        if valor.isdigit():
+            ids.append(int(valor))
+    return sorted(ids)
+
+
+# ---------------------------
+# RUTEO DE SESIONES
+# ---------------------------
+
+def obtener_engine_sucursal(clinica_id: int) -> Engine:
+    """
+    Devuelve el engine de una sucursal, creándolo la primera vez que se
+    usa. Una base nueva se inicializa igual que vete.db (ver init_db).
+    """
+
+    engine = _engines.get(clinica_id)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        engine = _engines.get(clinica_id)
+        if engine is None:
+            DIRECTORIO_SUCURSALES.mkdir(parents=True, exist_ok=True)
+            engine = crear_engine(str(ruta_sucursal(clinica_id)), echo=False)
+            inicializar_base(engine)
+            _sesiones[clinica_id] = sessionmaker(
+                bind=engine,
+                autoflush=False,
+                autocommit=False
+            )
+            _engines[clinica_id] = engine
+    return engine
+
+
+def SessionSucursal(clinica_id: int) -> Session:
+    """
+    Equivalente a SessionLocal() pero apuntando a la base de una sucursal.
+    Las funciones de database/crud funcionan sin cambios sobre esta sesión.
+    """
+
+    obtener_engine_sucursal(clinica_id)
+    return _sesiones[clinica_id]()
+
+
+def cerrar_sucursales() -> None:
+    """Libera las conexiones de todas las sucursales abiertas."""
+
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _sesiones.clear()
+
+
+# ---------------------------
+# CONSULTAS ENTRE SUCURSALES
+# ---------------------------
+
+def consultar_sucursales(
+    consulta: Callable[[Session], Iterable[Any]],
+    *,
+    sucursales: Iterable[int] | None = None,
+    clave: Callable[[Any], Any] | None = None,
+    max_workers: int = 8
+) -> list[tuple[int, Any]]:
+    """
+    Ejecuta `consulta(db)` en paralelo contra cada sucursal y devuelve
+    los resultados como pares (clinica_id, fila).
+
+    Si se pasa `clave`, cada sucursal debe devolver sus filas ya ordenadas
+    por esa clave y el resultado se mezcla manteniendo el orden global.
+    Las entidades devueltas quedan desacopladas de su sesión.
+    """
+
+    sucursales = list(listar_sucursales() if sucursales is None else sucursales)
+    if not sucursales:
+        return []
+
+    def _ejecutar(clinica_id: int) -> list[tuple[int, Any]]:
+        with SessionSucursal(clinica_id) as db:
+            return [(clinica_id, fila) for fila in consulta(db)]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sucursales))) as pool:
+        parciales = list(pool.map(_ejecutar, sucursales))
+
+    if clave is None:
+        return [fila for parcial in parciales for fila in parcial]
+
+    return list(heapq.merge(*parciales, key=lambda par: clave(par[1])))
+
+
+def buscar_dueno_por_dni_en_sucursales(
+    dni: str,
+    *,
+    sucursales: Iterable[int] | None = None
+) -> list[tuple[int, Dueno]]:
+    """
+    Busca un dueño activo por DNI en todas las sucursales.
+    Devuelve pares (clinica_id, dueño) ordenados por sucursal.
+    """
+
+    def _buscar(db: Session) -> list[Dueno]:
+        dueno = obtener_dueno_por_dni(db, dni)
+        return [dueno] if dueno is not None else []
+
+    return consultar_sucursales(_buscar, sucursales=sucursales)
@@ -0,0 +1,176 @@
+# database/tipos.py
+#
+# Tipos de columna propios.
+#
+# TextoComprimido guarda texto libre clínico comprimido con zstd, usando
+# un diccionario entrenado sobre los textos de la propia base (ver
+# database/compresion.py). Cada valor comprimido lleva la versión del
+# diccionario con que se escribió, así que entrenar uno nuevo no vuelve
+# ilegibles las filas anteriores; las filas viejas guardadas como texto
+# plano se leen tal cual. La columna sigue siendo TEXT: SQLite guarda
+# en ella tanto texto como BLOB.
+#
+# La compresión se activa por engine con activar_compresion(engine)
+# (init_db.py lo hace para vete.db). Requiere el paquete `zstandard`;
+# sin él, o sin activar, se escribe texto plano.
+#
+# Los valores comprimidos no se pueden buscar con LIKE desde SQL.
+
+import struct
+import threading
+import weakref
+
+from sqlalchemy import Text, text
+from sqlalchemy.engine import Dialect, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # dependencia opcional
+    zstandard = None
+
+NIVEL = 3
+MINIMO_COMPRIMIR = 48  # bytes: los textos más cortos no ganan nada
+
+_MARCA = b"\x01"       # primer byte de un valor comprimido
+_CABECERA = struct.Struct(">cI")  # marca + versión del diccionario (0 = sin diccionario)
+
+
+class _Diccionarios:
+    """Diccionarios de una base y compresores por hilo."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.diccionarios: dict[int, "zstandard.ZstdCompressionDict | None"] = {0: None}
+        self.actual = 0
+        self.cargados = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def cargar(self) -> None:
+        """Lee los diccionarios de la base; el de mayor versión se usa al escribir."""
+
+        with self._lock:
+            try:
+                with self.engine.connect() as conexion:
+                    filas = conexion.execute(
+                        text("SELECT id, datos FROM diccionarios_compresion ORDER BY id")
+                    ).all()
+            except OperationalError:
+                filas = []  # base sin migrar: todavía no existe la tabla
+            for version, datos in filas:
+                if version not in self.diccionarios:
+                    self.diccionarios[version] = zstandard.ZstdCompressionDict(datos)
+            self.actual = max(self.diccionarios)
+            self.cargados = True
+
+    def _por_hilo(self, clase, version: int):
+        # Los (des)compresores de zstandard no se pueden compartir entre hilos.
+        cache = self._local.__dict__.setdefault(clase.__name__, {})
+        objeto = cache.get(version)
+        if objeto is None:
+            diccionario = self.diccionarios[version]
+            if clase is zstandard.ZstdCompressor:
+                objeto = clase(level=NIVEL, dict_data=diccionario, write_dict_id=False)
+            else:
+                objeto = clase(dict_data=diccionario)
+            cache[version] = objeto
+        return objeto
+
+    def comprimir(self, valor: str) -> str | bytes:
+        crudo = valor.encode()
+        if len(crudo) < MINIMO_COMPRIMIR:
+            return valor
+        if not self.cargados:
+            self.cargar()
+
+        version = self.actual
+        comprimido = self._por_hilo(zstandard.ZstdCompressor, version).compress(crudo)
+        if len(comprimido) + _CABECERA.size >= len(crudo):
+            return valor
+        return _CABECERA.pack(_MARCA, version) + comprimido
+
+    def descomprimir(self, valor: bytes) -> str:
+        _, version = _CABECERA.unpack_from(valor)
+        if version not in self.diccionarios:
+            self.cargar()  # entrenado por otro proceso después de cargar
+            if version not in self.diccionarios:
+                raise LookupError(f"No existe el diccionario de compresión versión {version}")
+        descompresor = self._por_hilo(zstandard.ZstdDecompressor, version)
+        return descompresor.decompress(valor[_CABECERA.size:]).decode()
+
+
+_por_dialecto: "weakref.WeakKeyDictionary[Dialect, _Diccionarios]" = weakref.WeakKeyDictionary()
+
+
+def activar_compresion(engine: Engine) -> None:
+    """
+    Comprime las columnas TextoComprimido que se escriban con este
+    engine. Los diccionarios se leen de la base la primera vez que se usan.
+    """
+
+    if zstandard is not None and engine.dialect not in _por_dialecto:
+        _por_dialecto[engine.dialect] = _Diccionarios(engine)
+
+
+def recargar_diccionarios(engine: Engine) -> None:
+    """Relee los diccionarios (por ejemplo, después de entrenar uno nuevo)."""
+
+    diccionarios = _por_dialecto.get(engine.dialect)
+    if diccionarios is not None:
+        diccionarios.cargar()
+
+
+def descomprimir_valor(valor: str | bytes | None, dialect: Dialect) -> str | None:
+    """Texto de un valor tal como está guardado (comprimido o plano)."""
+
+    if not isinstance(valor, bytes) or valor[:1] != _MARCA:
+        return valor
+    diccionarios = _por_dialecto.get(dialect)
+    if diccionarios is None:
+        if zstandard is None:
+            raise RuntimeError("Hay textos comprimidos y no está instalado `zstandard`.")
+        raise RuntimeError("Compresión no activada para este engine (activar_compresion).")
+    return diccionarios.descomprimir(valor)
+
+
+def version_de(valor: str | bytes | None) -> int | None:
+    """Versión del diccionario de un valor guardado; None si es texto plano."""
+
+    if not isinstance(valor, bytes) or valor[:1] != _MARCA:
+        return None
+    return _CABECERA.unpack_from(valor)[1]
+
+
+def version_actual(engine: Engine) -> int | None:
+    """Versión con la que se comprime al escribir; None si la compresión está inactiva."""
+
+    diccionarios = _por_dialecto.get(engine.dialect)
+    if diccionarios is None:
+        return None
+    if not diccionarios.cargados:
+        diccionarios.cargar()
+    return diccionarios.actual
+
+
+class TextoComprimido(TypeDecorator):
+    """Text que se guarda comprimido con zstd y diccionario."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        diccionarios = _por_dialecto.get(dialect)
+        if diccionarios is None:
+            return value
+        return diccionarios.comprimir(value)
+
+    def process_result_value(self, value, dialect):
+        return descomprimir_valor(value, dialect)
+
+    def coerce_compared_value(self, op, value):
+        # Los valores de comparación (LIKE, ==) van sin comprimir.
+        return Text()
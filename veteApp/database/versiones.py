@@ -0,0 +1,70 @@
+# database/versiones.py
+#
+# Sincronización de clientes por versión de fila (ver models.Versionado):
+# cada escritura en una tabla versionada le da a la fila el valor
+# siguiente del reloj de cambios, así que "qué cambió desde la última
+# vez" es un rango sobre el índice de `version`.
+#
+#     with SessionLocal() as db:
+#         marca = version_actual(db)      # antes de la carga completa
+#         pacientes = listar_pacientes(db)
+#     ...
+#     with SessionLocal() as db:
+#         cambios = cambios_desde(db, Paciente, marca)
+#         marca = max((p.version for p in cambios), default=marca)
+#
+# - La marca se toma antes de leer: un cambio que entra en el medio
+#   llega dos veces, nunca ninguna.
+# - SQLite asigna las versiones con el lock de escritura tomado, que se
+#   mantiene hasta el commit: se confirman en el mismo orden en que se
+#   numeran, y pedir "mayores que la última vista" no saltea ninguna.
+# - Las bajas lógicas son cambios: llegan con activo=False. Las filas
+#   que borra la purga no; con tombstone=True quedan en
+#   registros_eliminados, que también está versionada.
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from database.models import RelojCambios, Versionado
+
+VERSIONADOS: tuple[type, ...] = tuple(Versionado.__subclasses__())
+
+LIMITE = 500
+
+
+_RELOJ = select(RelojCambios.valor).where(RelojCambios.id == 1)
+
+_CAMBIOS = {
+    modelo: (
+        select(modelo)
+        .where(modelo.version > bindparam("version"))
+        .order_by(modelo.version)
+        .limit(bindparam("limite"))
+    )
+    for modelo in VERSIONADOS
+}
+
+
+def version_actual(db: Session) -> int:
+    """Último valor del reloj de cambios de la base."""
+
+    return db.scalar(_RELOJ)
+
+
+def cambios_desde(
+    db: Session,
+    modelo: type,
+    version: int,
+    *,
+    limite: int = LIMITE
+) -> list:
+    """
+    Filas de `modelo`, activas o no, escritas después de `version`, en
+    orden de versión y hasta `limite`. Para seguir, volver a llamar con
+    la versión de la última fila devuelta.
+    """
+
+    sentencia = _CAMBIOS.get(modelo)
+    if sentencia is None:
+        raise ValueError(f"{modelo.__name__} no tiene versión de fila")
+    return list(db.scalars(sentencia, {"version": version, "limite": limite}))
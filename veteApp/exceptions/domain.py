@@ -13,6 +13,10 @@ class DuenoSinPacientes(DomainError):
     pass
 
 
+class DuenoDuplicado(DomainError):
+    pass
+
+
 # -----------------------------
 # Pacientes
 # -----------------------------
@@ -84,6 +88,17 @@ class ArchivoClinicoInexistente(DomainError):
     pass
 
 
+# -----------------------------
+# Turnos
+# -----------------------------
+class TurnoNoEncontrado(DomainError):
+    pass
+
+
+class TurnoSuperpuesto(DomainError):
+    pass
+
+
 # -----------------------------
 # Generales
 # -----------------------------